@@ -0,0 +1,155 @@
+"""End-to-end API latency with Celery in eager mode
+
+Run from the api directory:
+
+    python -m benchmarks.bench_api [--rows N] [--repeat N] [--json] [--output PATH]
+
+The app runs in-process (FastAPI TestClient) from a temporary working
+directory, so it gets its own users.db, uploads/ and processed/. Celery
+runs tasks eagerly, inside the request that queues them, with an in-memory
+result backend, so no broker or worker is needed and every latency includes
+the processing it triggers:
+
+    upload      POST /api/upload-csv/ of a synthetic CSV (see benchmarks.datagen)
+    submit      POST /api/perform-operation/ with the result cache cleared,
+                i.e. the whole operation (the first filter/unique on an
+                input of COLUMN_STORE_MIN_COST or more also converts it
+                into its column store)
+    status      GET /api/task-status/ with the default 100-row preview
+    download    GET of the processed file
+    cached      POST /api/perform-operation/ again, served from the result cache
+
+Each of dedup, unique and filter is run --repeat times on a fresh upload.
+Inputs should stay under tasks.PARALLEL_MIN_BYTES: eager mode cannot run the
+chunked (chord) path, which waits on its chunk results.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.datagen import add_arguments, shape_options, write_csv
+from benchmarks.results import percentiles, write_results
+
+OPERATIONS = {
+    "dedup": {"operation": "dedup"},
+    "unique": {"operation": "unique", "column": "str_0"},
+    "filter": {"operation": "filter", "filter_conditions": {"num_0": {"operator": "gt", "value": 50_000}}},
+}
+STAGES = ("submit", "status", "download", "cached")
+
+
+def timed(call, *args, **kwargs):
+    """Call and return (response, seconds), failing on an error status"""
+    started = time.perf_counter()
+    response = call(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(f"{call.__name__.upper()} {args[0]}: {response.status_code} {response.text[:200]}")
+    return response, elapsed
+
+
+def run(rows: int, repeat: int, options: dict, operations: List[str]) -> dict:
+    """Upload a synthetic file and run each operation through the API, repeat times"""
+    with tempfile.TemporaryDirectory() as workdir:
+        input_path = write_csv(Path(workdir) / "input.csv", rows, **options)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return _run_in_workdir(input_path, repeat, operations)
+        finally:
+            os.chdir(cwd)
+
+
+def _run_in_workdir(input_path: Path, repeat: int, operations: List[str]) -> dict:
+    # Imported here: config, database and tasks create their files relative
+    # to the working directory when first imported
+    import tasks
+    tasks.celery_app.conf.update(
+        task_always_eager=True,
+        task_store_eager_result=True,
+        broker_url="memory://",
+        result_backend="cache+memory://",
+    )
+    from fastapi.testclient import TestClient
+    from database import get_db
+    from main import app
+    from services.auth_service import AuthService
+    
+    if input_path.stat().st_size >= tasks.PARALLEL_MIN_BYTES:
+        raise ValueError("input is large enough for the chunked path, which eager mode cannot run")
+    
+    headers = {"Authorization": f"Bearer {AuthService.create_access_token(1, 'bench@example.com')}"}
+    samples: Dict[str, List[float]] = {"upload": []}
+    for operation in operations:
+        for stage in STAGES:
+            samples[f"{operation}.{stage}"] = []
+    
+    with TestClient(app) as client:
+        for _ in range(repeat):
+            with open(input_path, 'rb') as f:
+                response, elapsed = timed(
+                    client.post, "/api/upload-csv/", files={"file": ("input.csv", f)}, headers=headers
+                )
+            samples["upload"].append(elapsed)
+            file_id = response.json()["file_id"]
+            
+            for operation in operations:
+                with get_db() as conn:
+                    conn.execute("DELETE FROM result_cache")
+                    conn.commit()
+                request = {"file_id": file_id, **OPERATIONS[operation]}
+                
+                response, elapsed = timed(client.post, "/api/perform-operation/", json=request, headers=headers)
+                samples[f"{operation}.submit"].append(elapsed)
+                task_id = response.json()["task_id"]
+                
+                response, elapsed = timed(client.get, "/api/task-status/", params={"task_id": task_id}, headers=headers)
+                samples[f"{operation}.status"].append(elapsed)
+                status = response.json()
+                if status["status"] != "SUCCESS":
+                    raise RuntimeError(f"{operation}: task ended {status['status']}: {status.get('error')}")
+                
+                _, elapsed = timed(client.get, "/api" + status["result"]["file_link"], headers=headers)
+                samples[f"{operation}.download"].append(elapsed)
+                
+                response, elapsed = timed(client.post, "/api/perform-operation/", json=request, headers=headers)
+                samples[f"{operation}.cached"].append(elapsed)
+                if not response.json().get("cached"):
+                    raise RuntimeError(f"{operation}: repeated request was not served from the cache")
+    
+    return {
+        "input_bytes": input_path.stat().st_size,
+        "latency": {name: percentiles(values) for name, values in samples.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser, rows=100_000)
+    parser.add_argument("--repeat", type=int, default=5, help="uploads, each running every operation")
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", type=Path, help="save results as JSON (see benchmarks.results)")
+    args = parser.parse_args()
+    
+    options = shape_options(args)
+    result = run(args.rows, args.repeat, options, args.operations)
+    if args.output:
+        params = {"rows": args.rows, "repeat": args.repeat, "operations": args.operations, **options}
+        write_results(args.output, "bench_api", params, result)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"{args.rows} rows ({result['input_bytes'] / 2**20:.2f} MiB), {args.repeat} runs")
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, stats in result["latency"].items():
+        print(f"{name:<16} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['max_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Throughput of the row-level processing functions in tasks.py
+
+Run from the api directory:
+
+    python -m benchmarks.bench_engine [--rows N] [--excel-rows N] [--repeat N] [--json] [--output PATH]
+
+Synthetic inputs (see benchmarks.datagen) are written to a temporary
+directory, then each function is timed --repeat times on the same data:
+
+    read_csv_file              the CSV input
+    read_excel_file            an .xlsx input of --excel-rows rows (openpyxl
+                               is far slower than csv, so it gets fewer rows)
+    perform_deduplication      the CSV rows
+    perform_unique_extraction  the CSV rows, on a low- and a high-cardinality column
+    perform_filtering          the CSV rows, a numeric and a string condition
+    write_csv_file             the deduplicated rows
+
+The best and median times are reported, with rows (and, for reads and
+writes, bytes) per second of the best run.
+"""
+import argparse
+import gc
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.datagen import add_arguments, shape_options, write_csv, write_xlsx
+from benchmarks.results import write_results
+from tasks import (
+    perform_deduplication,
+    perform_filtering,
+    perform_unique_extraction,
+    read_csv_file,
+    read_excel_file,
+    write_csv_file,
+)
+
+
+def measure(
+    name: str,
+    run: Callable[[], object],
+    rows: int,
+    repeat: int,
+    size: Optional[Callable[[], int]] = None
+) -> dict:
+    """Time run() repeat times; size() gives the bytes processed, once it has run"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    
+    best = min(timings)
+    result = {
+        "name": name,
+        "rows": rows,
+        "best_seconds": round(best, 4),
+        "median_seconds": round(statistics.median(timings), 4),
+        "rows_per_second": round(rows / best),
+    }
+    if size is not None:
+        result["mib_per_second"] = round(size() / 2**20 / best, 2)
+    return result
+
+
+def filter_cases(headers: List[str]) -> List[tuple[str, dict]]:
+    """A numeric and a string filter over the synthetic columns that exist"""
+    cases = []
+    if "num_0" in headers:
+        cases.append(("numeric_gt", {"num_0": {"operator": "gt", "value": 50_000}}))
+    if "str_0" in headers:
+        cases.append(("string_eq", {"str_0": {"operator": "eq", "value": "str_0_v3"}}))
+    return cases or [("id_lt", {"id": {"operator": "lt", "value": 1000}})]
+
+
+def unique_columns(headers: List[str]) -> List[str]:
+    """Low- and high-cardinality columns to extract unique values of"""
+    columns = [name for name in ("str_0", "str_1") if name in headers]
+    return columns or ["id"]
+
+
+def run(rows: int, excel_rows: int, repeat: int, options: dict) -> List[dict]:
+    """Generate the inputs and time every function on them"""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = write_csv(Path(workdir) / "input.csv", rows, **options)
+        headers, data = read_csv_file(csv_path)
+        
+        results.append(measure(
+            "read_csv_file", lambda: read_csv_file(csv_path), rows, repeat, lambda: csv_path.stat().st_size
+        ))
+        
+        if excel_rows:
+            xlsx_path = write_xlsx(Path(workdir) / "input.xlsx", excel_rows, **options)
+            results.append(measure(
+                "read_excel_file", lambda: read_excel_file(xlsx_path), excel_rows, repeat,
+                lambda: xlsx_path.stat().st_size
+            ))
+        
+        results.append(measure("perform_deduplication", lambda: perform_deduplication(headers, data), rows, repeat))
+        
+        for column in unique_columns(headers):
+            results.append(measure(
+                f"perform_unique_extraction[{column}]",
+                lambda: perform_unique_extraction(headers, data, column),
+                rows,
+                repeat
+            ))
+        
+        for case, conditions in filter_cases(headers):
+            results.append(measure(
+                f"perform_filtering[{case}]",
+                lambda: perform_filtering(headers, data, conditions),
+                rows,
+                repeat
+            ))
+        
+        deduplicated = perform_deduplication(headers, data)
+        out_path = Path(workdir) / "output.csv"
+        results.append(measure(
+            "write_csv_file",
+            lambda: write_csv_file(out_path, headers, deduplicated),
+            len(deduplicated),
+            repeat,
+            lambda: out_path.stat().st_size
+        ))
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--excel-rows", type=int, default=20_000, help="rows of the .xlsx input (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per function")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", type=Path, help="save results as JSON (see benchmarks.results)")
+    args = parser.parse_args()
+    
+    options = shape_options(args)
+    results = run(args.rows, args.excel_rows, args.repeat, options)
+    if args.output:
+        params = {"rows": args.rows, "excel_rows": args.excel_rows, "repeat": args.repeat, **options}
+        write_results(args.output, "bench_engine", params, results)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'function':<40} {'rows':>9} {'best s':>8} {'median s':>9} {'rows/s':>11} {'MiB/s':>7}")
+    for result in results:
+        print(
+            f"{result['name']:<40} {result['rows']:>9} {result['best_seconds']:>8.3f} "
+            f"{result['median_seconds']:>9.3f} {result['rows_per_second']:>11,} "
+            f"{result.get('mib_per_second', ''):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
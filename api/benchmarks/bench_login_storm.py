@@ -0,0 +1,148 @@
+"""Login storm against a live API process
+
+Run from the api directory:
+
+    python -m benchmarks.bench_login_storm [--clients N] [--requests N] [--json] [--output PATH]
+
+Starts uvicorn on a free port in a temporary working directory (so it gets
+its own users.db), registers a user, then fires concurrent logins, with a
+share of registrations mixed in as writes. A probe requests a static page
+throughout; its latency shows how long the event loop is held up by the
+storm.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.results import percentiles, write_results
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/docs")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def storm(base_url: str, clients: int, requests: int, register_share: float) -> dict:
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_until_up(client)
+        credentials = {"email": "storm@example.com", "password": "secret"}
+        await client.post("/api/register/", data={**credentials, "confirm_password": "secret"})
+        
+        logins, registrations, probes = [], [], []
+        failures = 0
+        issued = 0
+        done = asyncio.Event()
+        
+        async def worker(worker_id: int) -> None:
+            nonlocal failures, issued
+            while issued < requests:
+                issued += 1
+                register = (issued % round(1 / register_share) == 0) if register_share else False
+                started = time.perf_counter()
+                if register:
+                    email = f"user{worker_id}_{issued}@example.com"
+                    response = await client.post(
+                        "/api/register/",
+                        data={"email": email, "password": "secret", "confirm_password": "secret"}
+                    )
+                else:
+                    response = await client.post("/api/login/", data=credentials)
+                (registrations if register else logins).append(time.perf_counter() - started)
+                failures += response.status_code != 200
+        
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/docs")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+        
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    
+    return {
+        "clients": clients,
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed),
+        "failures": failures,
+        "login": percentiles(logins),
+        "register": percentiles(registrations) if registrations else None,
+        "probe": percentiles(probes),
+    }
+
+
+def run(clients: int, requests: int, register_share: float) -> dict:
+    """Start an API process in a scratch directory and storm it"""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {**os.environ, "PYTHONPATH": str(API_DIR)}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir,
+            env=env
+        )
+        try:
+            return asyncio.run(storm(f"http://127.0.0.1:{port}", clients, requests, register_share))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=5000, help="total auth requests")
+    parser.add_argument("--register-share", type=float, default=0.1, help="share of requests that register")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", type=Path, help="save results as JSON (see benchmarks.results)")
+    args = parser.parse_args()
+    
+    result = run(args.clients, args.requests, args.register_share)
+    if args.output:
+        params = {"clients": args.clients, "requests": args.requests, "register_share": args.register_share}
+        write_results(args.output, "bench_login_storm", params, result)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"{result['requests']} requests from {result['clients']} clients in {result['seconds']}s "
+          f"({result['requests_per_second']}/s, {result['failures']} failed)")
+    print(f"{'':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name in ("login", "register", "probe"):
+        if result[name]:
+            stats = result[name]
+            print(f"{name:<9} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Write time and file size of each processed output format
+
+Run from the api directory:
+
+    python -m benchmarks.bench_output_formats [--rows N] [--json] [--output PATH]
+
+The same synthetic rows are written in every format/compression through
+tasks.write_output_stream, then read back in full the way a downstream
+consumer would (csv.reader, json.loads per line, pyarrow).
+"""
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pyarrow
+import pyarrow.parquet
+
+from benchmarks.results import write_results
+from compression import open_output_text
+from output_formats import output_format_of, output_suffix
+from tasks import write_output_stream
+
+HEADERS = ["id", "name", "city", "amount", "created_at", "note"]
+CASES = [
+    ("csv", None),
+    ("csv", "gzip"),
+    ("csv", "zstd"),
+    ("ndjson", None),
+    ("ndjson", "zstd"),
+    ("parquet", None),
+    ("parquet", "zstd"),
+    ("arrow", None),
+    ("arrow", "zstd"),
+]
+
+
+def synthetic_rows(count: int, seed: int = 0) -> Iterator[List[str]]:
+    """Deterministic rows mixing ids, repeated strings, decimals and dates"""
+    rng = random.Random(seed)
+    names = [f"customer_{i}" for i in range(5000)]
+    cities = ["Berlin", "Lagos", "Lima", "Osaka", "Pune", "Quebec", "São Paulo"]
+    notes = ["", "", "priority", "gift, wrapped", 'said "hi"']
+    for i in range(count):
+        yield [
+            str(i),
+            rng.choice(names),
+            rng.choice(cities),
+            f"{rng.uniform(0, 10000):.2f}",
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            rng.choice(notes),
+        ]
+
+
+def read_back(file_path: Path) -> int:
+    """Read a whole output the way a consumer would and return its row count"""
+    output_format = output_format_of(file_path)
+    if output_format == "parquet":
+        return pyarrow.parquet.read_table(file_path).num_rows
+    if output_format == "arrow":
+        with pyarrow.memory_map(str(file_path)) as source:
+            return pyarrow.ipc.open_file(source).read_all().num_rows
+    with open_output_text(file_path) as f:
+        if output_format == "ndjson":
+            return len([json.loads(line) for line in f])
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def run(row_count: int) -> List[dict]:
+    """Write and read back row_count rows in every case"""
+    rows = list(synthetic_rows(row_count))
+    results = []
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for output_format, compression in CASES:
+            file_path = Path(workdir) / f"out{output_suffix(output_format, compression)}"
+            
+            started = time.perf_counter()
+            written = write_output_stream(file_path, HEADERS, iter(rows), output_format, compression)
+            write_seconds = time.perf_counter() - started
+            
+            started = time.perf_counter()
+            read = read_back(file_path)
+            read_seconds = time.perf_counter() - started
+            
+            if written != row_count or read != row_count:
+                raise RuntimeError(f"{file_path.name}: wrote {written}, read {read} of {row_count} rows")
+            
+            results.append({
+                "format": output_format,
+                "compression": compression,
+                "rows": row_count,
+                "bytes": file_path.stat().st_size,
+                "write_seconds": round(write_seconds, 4),
+                "read_seconds": round(read_seconds, 4),
+                "write_rows_per_second": round(row_count / write_seconds),
+            })
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="number of rows to write")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", type=Path, help="save results as JSON (see benchmarks.results)")
+    args = parser.parse_args()
+    
+    results = run(args.rows)
+    if args.output:
+        write_results(args.output, "bench_output_formats", {"rows": args.rows}, results)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    csv_bytes = results[0]["bytes"]
+    print(f"{'format':<8} {'compression':<11} {'MiB':>8} {'vs csv':>7} {'write s':>8} {'read s':>7}")
+    for result in results:
+        print(
+            f"{result['format']:<8} {result['compression'] or '-':<11} "
+            f"{result['bytes'] / 2**20:>8.2f} {result['bytes'] / csv_bytes:>7.2f} "
+            f"{result['write_seconds']:>8.2f} {result['read_seconds']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compare two saved runs of a benchmark
+
+Run from the api directory:
+
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold PCT] [--all]
+
+Both files are records written with --output (see benchmarks.results).
+Their results are flattened into named metrics (a list entry is named by
+its string fields, e.g. "perform_filtering[numeric_gt]" or "csv/gzip"), and
+each metric both runs have is compared:
+
+    *_seconds, *_ms              lower is better
+    *_per_second                 higher is better
+
+Metrics that got worse by more than --threshold percent are listed as
+regressions, and the exit status is 1 if there are any.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from benchmarks.results import load_results
+
+LOWER_IS_BETTER = ("_seconds", "_ms")
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a result structure, by dotted path"""
+    if isinstance(value, dict):
+        metrics = {}
+        for key, item in value.items():
+            metrics.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return metrics
+    if isinstance(value, list):
+        metrics = {}
+        for index, item in enumerate(value):
+            label = entry_label(item) or str(index)
+            metrics.update(flatten(item, f"{prefix}.{label}" if prefix else label))
+        return metrics
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def entry_label(entry: Any) -> Optional[str]:
+    """Name of a list entry from its string fields, e.g. "parquet/zstd" """
+    if not isinstance(entry, dict):
+        return None
+    return "/".join(value for value in entry.values() if isinstance(value, str)) or None
+
+
+def direction(metric: str) -> int:
+    """-1 if lower is better, 1 if higher is better, 0 if the metric is not a measurement"""
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """
+    Changes of the metrics both records have
+    
+    Returns:
+        list: (metric, baseline value, candidate value, percent improvement,
+        regressed) tuples; improvement is negative when the candidate is worse
+    """
+    old = flatten(baseline["results"])
+    new = flatten(candidate["results"])
+    changes = []
+    for metric, old_value in old.items():
+        sign = direction(metric)
+        if not sign or metric not in new or not old_value:
+            continue
+        improvement = sign * (new[metric] - old_value) / old_value * 100
+        changes.append((metric, old_value, new[metric], improvement, improvement < -threshold))
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent a metric may worsen by")
+    parser.add_argument("--all", action="store_true", help="list every metric, not only regressions")
+    args = parser.parse_args()
+    
+    baseline = load_results(args.baseline)
+    candidate = load_results(args.candidate)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        parser.error(f"cannot compare {baseline.get('benchmark')} with {candidate.get('benchmark')}")
+    if baseline.get("params") != candidate.get("params"):
+        print("warning: the runs used different params", file=sys.stderr)
+    
+    for name, record in (("baseline", baseline), ("candidate", candidate)):
+        env = record.get("environment", {})
+        commit = (env.get("commit") or "?")[:12] + (" (dirty)" if env.get("dirty") else "")
+        print(f"{name:<10} {commit:<21} {env.get('timestamp', '')}")
+    
+    changes = compare(baseline, candidate, args.threshold)
+    shown = changes if args.all else [change for change in changes if change[4]]
+    if shown:
+        width = max(len(change[0]) for change in shown)
+        print(f"\n{'metric':<{width}} {'baseline':>12} {'candidate':>12} {'change':>8}")
+        for metric, old_value, new_value, improvement, regressed in shown:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{metric:<{width}} {old_value:>12,} {new_value:>12,} {improvement:>+7.1f}%{flag}")
+    
+    regressions = sum(change[4] for change in changes)
+    print(f"\n{len(changes)} metrics compared, {regressions} regressed by more than {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Synthetic CSV/XLSX inputs for the benchmarks
+
+Run from the api directory to write a file:
+
+    python -m benchmarks.datagen out.csv [--rows N] [--width N] [--duplicate-ratio R] [--numeric-share S]
+
+Column 0 is an integer row id. Of the other columns, a numeric_share of them
+hold numbers (integers and decimals, alternating) and the rest hold strings
+drawn from vocabularies of 10 to 10,000 values, so unique extraction has
+both low- and high-cardinality columns to work on. A duplicate_ratio of the
+rows repeat an earlier row exactly (same id and cells), so deduplication
+keeps about (1 - duplicate_ratio) of them.
+
+Cells are derived from the row id by hashing, so the same arguments always
+produce the same file and no rows are kept in memory.
+"""
+import argparse
+import csv
+import random
+from pathlib import Path
+from typing import Iterator, List
+
+DEFAULT_ROWS = 200_000
+DEFAULT_WIDTH = 8
+DEFAULT_DUPLICATE_RATIO = 0.2
+DEFAULT_NUMERIC_SHARE = 0.5
+# Distinct values of string column k (cycling); the first is the lowest
+STRING_CARDINALITIES = (10, 1000, 100, 10_000)
+
+
+def column_headers(width: int, numeric_share: float) -> List[str]:
+    """Header of a synthetic file: id, then num_<k> and str_<k> columns"""
+    if width < 1:
+        raise ValueError("width must be at least 1")
+    numeric = round((width - 1) * numeric_share)
+    return (
+        ["id"]
+        + [f"num_{k}" for k in range(numeric)]
+        + [f"str_{k}" for k in range(width - 1 - numeric)]
+    )
+
+
+def _mix(row_id: int, column: int) -> int:
+    """Deterministic 32-bit hash of a cell position"""
+    h = (row_id * 0x9E3779B1 + column * 0x85EBCA77) & 0xFFFFFFFF
+    h ^= h >> 15
+    h = (h * 0x2C1B3C6D) & 0xFFFFFFFF
+    return h ^ (h >> 12)
+
+
+def make_row(row_id: int, headers: List[str]) -> List[str]:
+    """Cells of the row with the given id"""
+    row = [str(row_id)]
+    numeric_index = string_index = 0
+    for column, name in enumerate(headers[1:], 1):
+        h = _mix(row_id, column)
+        if name.startswith("num_"):
+            row.append(str(h % 100_000) if numeric_index % 2 == 0 else f"{h % 10_000_000 / 100:.2f}")
+            numeric_index += 1
+        else:
+            cardinality = STRING_CARDINALITIES[string_index % len(STRING_CARDINALITIES)]
+            row.append(f"{name}_v{h % cardinality}")
+            string_index += 1
+    return row
+
+
+def generate_rows(
+    rows: int,
+    width: int = DEFAULT_WIDTH,
+    duplicate_ratio: float = DEFAULT_DUPLICATE_RATIO,
+    numeric_share: float = DEFAULT_NUMERIC_SHARE,
+    seed: int = 0
+) -> tuple[List[str], Iterator[List[str]]]:
+    """
+    Headers and a lazy stream of synthetic rows
+    
+    Returns:
+        tuple: (headers, rows)
+    """
+    if not 0 <= duplicate_ratio < 1:
+        raise ValueError("duplicate_ratio must be in [0, 1)")
+    if not 0 <= numeric_share <= 1:
+        raise ValueError("numeric_share must be in [0, 1]")
+    headers = column_headers(width, numeric_share)
+    
+    def generate() -> Iterator[List[str]]:
+        rng = random.Random(seed)
+        distinct = 0
+        for _ in range(rows):
+            if distinct and rng.random() < duplicate_ratio:
+                yield make_row(rng.randrange(distinct), headers)
+            else:
+                yield make_row(distinct, headers)
+                distinct += 1
+    
+    return headers, generate()
+
+
+def write_csv(file_path: Path, rows: int, **options) -> Path:
+    """Write a synthetic CSV file (options as for generate_rows)"""
+    headers, data = generate_rows(rows, **options)
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(data)
+    return file_path
+
+
+def write_xlsx(file_path: Path, rows: int, **options) -> Path:
+    """Write a synthetic .xlsx workbook of one sheet (options as for generate_rows)"""
+    from openpyxl import Workbook
+    
+    headers, data = generate_rows(rows, **options)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("data")
+    ws.append(headers)
+    for row in data:
+        ws.append(row)
+    wb.save(file_path)
+    return file_path
+
+
+def add_arguments(parser: argparse.ArgumentParser, rows: int = DEFAULT_ROWS) -> None:
+    """Add the data shape options shared by the benchmarks"""
+    parser.add_argument("--rows", type=int, default=rows, help="number of data rows")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="number of columns")
+    parser.add_argument("--duplicate-ratio", type=float, default=DEFAULT_DUPLICATE_RATIO,
+                        help="share of rows repeating an earlier row")
+    parser.add_argument("--numeric-share", type=float, default=DEFAULT_NUMERIC_SHARE,
+                        help="share of non-id columns holding numbers")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+
+
+def shape_options(args: argparse.Namespace) -> dict:
+    """generate_rows options from parsed add_arguments options"""
+    return {
+        "width": args.width,
+        "duplicate_ratio": args.duplicate_ratio,
+        "numeric_share": args.numeric_share,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="file to write (.csv or .xlsx)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    write = write_xlsx if args.output.suffix.lower() == ".xlsx" else write_csv
+    write(args.output, args.rows, **shape_options(args))
+    print(f"wrote {args.output} ({args.output.stat().st_size / 2**20:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Machine-readable benchmark results
+
+Every benchmark can save its results with --output PATH as one JSON record:
+
+    {
+      "benchmark": "bench_engine",
+      "environment": {"commit": ..., "python": ..., "cpu_count": ..., ...},
+      "params": {...},       # the options it ran with
+      "results": ...         # its own result structure
+    }
+
+Two records of the same benchmark are compared with benchmarks.compare.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, List
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentiles(samples: List[float]) -> dict:
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    
+    def at(fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000, 2)
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def git_revision() -> dict:
+    """Commit of the working tree and whether it has uncommitted changes (None outside git)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=API_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": bool(dirty)}
+
+
+def environment() -> dict:
+    """Where and when a benchmark ran"""
+    return {
+        **git_revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(file_path: Path, benchmark: str, params: dict, results: Any) -> dict:
+    """Save a benchmark's results, with its environment and params, as JSON"""
+    record = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "params": params,
+        "results": results,
+    }
+    Path(file_path).write_text(json.dumps(record, indent=2) + "\n")
+    return record
+
+
+def load_results(file_path: Path) -> dict:
+    """Read a record saved by write_results"""
+    record = json.loads(Path(file_path).read_text())
+    if not isinstance(record, dict) or "results" not in record:
+        raise ValueError(f"{file_path} is not a benchmark results file")
+    return record
@@ -0,0 +1,362 @@
+"""Memory-mappable columnar copy of an uploaded file
+
+An upload is converted once, in the background, into a directory next to it
+(<upload>.columns/) holding one set of flat files per column:
+
+    c<j>.offsets    byte offsets into c<j>.data (rows + 1 entries); int32
+                    unless the column holds 2GB of text or more, then int64
+    c<j>.data       UTF-8 cell text, concatenated
+    c<j>.numbers    value of each cell, for numeric columns only (every cell
+                    parses as a float); int32 while every value is an
+                    integer in its range, float64 otherwise
+
+plus lengths.bin (int32 cell count of each row, so ragged rows round-trip
+exactly; only written if some row is not as wide as the header) and
+meta.json (headers, row count, per-column flags and the size and mtime of
+the source it was built from). Everything is opened with mmap,
+so operations read only the columns and rows they touch and never re-parse
+CSV/Excel text or re-run float() on numeric columns; numeric conditions on
+other columns parse the cells they read, as the row engine does.
+
+Uploads are converted on demand, when an operation that would read the
+store is requested (see SchedulerService.route_conversion).
+"""
+import json
+import mmap
+import os
+import shutil
+import uuid
+from itertools import pairwise
+from pathlib import Path
+from typing import List, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from columnar import iter_batches, column_cells, parse_column, select_rows
+
+FORMAT_VERSION = 2
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+# Columns whose text outgrows int32 offsets switch to int64 ones
+INT32_OFFSET_LIMIT = INT32_MAX
+
+
+def column_store_path(file_path: Path) -> Path:
+    """Directory holding the columnar copy of an upload"""
+    return file_path.with_name(f"{file_path.name}.columns")
+
+
+def source_signature(file_path: Path) -> dict:
+    """Size and mtime used to tell whether a store still matches its source"""
+    stat = file_path.stat()
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def write_column_store(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    batch_size: int
+) -> dict:
+    """
+    Convert the rows of file_path into a column store
+    
+    The store is built in a temporary directory and renamed into place, so
+    readers only ever see a complete store.
+    
+    Returns:
+        dict: The store's metadata
+    """
+    target = column_store_path(file_path)
+    signature = source_signature(file_path)
+    workdir = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+    workdir.mkdir()
+    
+    try:
+        row_count = 0
+        columns = []
+        ragged = False
+        
+        for batch in iter_batches(rows, batch_size):
+            lengths = np.fromiter(map(len, batch), dtype=np.int32, count=len(batch))
+            width = max(len(headers), int(lengths.max()))
+            ragged = ragged or int(lengths.min()) != len(headers) or width != len(headers)
+            
+            # A column first seen in this batch is empty for all earlier rows
+            while len(columns) < width:
+                columns.append(_start_column(workdir, len(columns), row_count))
+            
+            for column_index, column in enumerate(columns):
+                _append_column(workdir, column_index, column, column_cells(batch, column_index))
+            
+            with open(workdir / "lengths.bin", 'ab') as f:
+                lengths.tofile(f)
+            row_count += len(batch)
+        
+        while len(columns) < len(headers):
+            columns.append(_start_column(workdir, len(columns), row_count))
+        if not ragged:
+            (workdir / "lengths.bin").unlink(missing_ok=True)
+        
+        meta = {
+            "format": FORMAT_VERSION,
+            **signature,
+            "headers": headers,
+            "rows": row_count,
+            "ragged": ragged,
+            "columns": [
+                {"ascii": column["ascii"], "numbers": column["numbers"], "offsets": column["offsets"]}
+                for column in columns
+            ]
+        }
+        with open(workdir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(workdir, target)
+    
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    
+    return meta
+
+
+def _start_column(workdir: Path, column_index: int, row_count: int) -> dict:
+    """Create the files of a new column, padded with row_count empty cells"""
+    np.zeros(row_count + 1, dtype=np.int32).tofile(workdir / f"c{column_index}.offsets")
+    (workdir / f"c{column_index}.data").touch()
+    # Empty cells are not numbers
+    numbers = "int32" if row_count == 0 else None
+    if numbers is not None:
+        (workdir / f"c{column_index}.numbers").touch()
+    return {"size": 0, "ascii": True, "numbers": numbers, "offsets": "int32"}
+
+
+def _append_column(workdir: Path, column_index: int, column: dict, cells: List[str]) -> None:
+    """Append one batch of cells to a column's files"""
+    text = ''.join(cells)
+    if text.isascii():
+        data = text.encode('ascii')
+        sizes = np.fromiter(map(len, cells), dtype=np.int64, count=len(cells))
+    else:
+        encoded = [cell.encode('utf-8', 'surrogatepass') for cell in cells]
+        data = b''.join(encoded)
+        sizes = np.fromiter(map(len, encoded), dtype=np.int64, count=len(cells))
+        column["ascii"] = False
+    
+    offsets = np.cumsum(sizes) + column["size"]
+    column["size"] += len(data)
+    
+    prefix = workdir / f"c{column_index}"
+    if column["offsets"] == "int32" and column["size"] > INT32_OFFSET_LIMIT:
+        column["offsets"] = _widen(f"{prefix}.offsets", "int32", "int64")
+    with open(f"{prefix}.offsets", 'ab') as f:
+        offsets.astype(column["offsets"]).tofile(f)
+    with open(f"{prefix}.data", 'ab') as f:
+        f.write(data)
+    
+    if column["numbers"] is None:
+        return
+    try:
+        numbers = np.fromiter(map(float, cells), dtype=np.float64, count=len(cells))
+    except ValueError:
+        # Not numeric after all: its cells are parsed when read
+        column["numbers"] = None
+        os.unlink(f"{prefix}.numbers")
+        return
+    
+    if column["numbers"] == "int32" and not (
+        np.all((numbers >= INT32_MIN) & (numbers <= INT32_MAX)) and np.all(numbers == np.trunc(numbers))
+    ):
+        column["numbers"] = _widen(f"{prefix}.numbers", "int32", "float64")
+    with open(f"{prefix}.numbers", 'ab') as f:
+        numbers.astype(column["numbers"]).tofile(f)
+
+
+def _widen(path: str, dtype: str, wider: str) -> str:
+    """Rewrite a flat array file with a wider dtype, returning that dtype"""
+    np.fromfile(path, dtype=dtype).astype(wider).tofile(path)
+    return wider
+
+
+def open_column_store(file_path: Path) -> Optional["ColumnStore"]:
+    """Open the column store of an upload, or None if it is missing or stale"""
+    path = column_store_path(file_path)
+    try:
+        with open(path / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            return None
+        signature = source_signature(file_path)
+    except (OSError, ValueError):
+        return None
+    
+    if any(meta.get(key) != value for key, value in signature.items()):
+        return None
+    return ColumnStore(path, meta)
+
+
+class ColumnStore:
+    """Read access to a column store; files are mapped on first use"""
+    
+    def __init__(self, path: Path, meta: dict):
+        self.path = path
+        self.headers = meta["headers"]
+        self.row_count = meta["rows"]
+        self._columns = meta["columns"]
+        self._arrays = {}
+        self._data = {}
+        if meta["ragged"]:
+            self.lengths = self._array("lengths.bin", np.int32, self.row_count)
+        else:
+            # Every row is as wide as the header
+            self.lengths = np.broadcast_to(np.int32(len(self.headers)), (self.row_count,))
+    
+    def _array(self, name: str, dtype, count: int) -> np.ndarray:
+        if name not in self._arrays:
+            if count:
+                self._arrays[name] = np.memmap(self.path / name, dtype=dtype, mode='r', shape=(count,))
+            else:
+                self._arrays[name] = np.zeros(0, dtype=dtype)
+        return self._arrays[name]
+    
+    def _column_data(self, column_index: int):
+        if column_index not in self._data:
+            with open(self.path / f"c{column_index}.data", 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._data[column_index] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    self._data[column_index] = b''
+        return self._data[column_index]
+    
+    def cells(self, column_index: int, indexes: np.ndarray) -> List[str]:
+        """Text of a column at the given row indexes ('' where a row is too short)"""
+        if column_index >= len(self._columns):
+            return [''] * len(indexes)
+        if not len(indexes):
+            return []
+        
+        offsets = self._array(
+            f"c{column_index}.offsets", self._columns[column_index]["offsets"], self.row_count + 1
+        )
+        data = self._column_data(column_index)
+        first, last = int(indexes[0]), int(indexes[-1])
+        
+        if last - first + 1 == len(indexes):
+            # Contiguous rows: decode the whole span once and slice it
+            bounds = offsets[first:last + 2] - offsets[first]
+            block = data[int(offsets[first]):int(offsets[last + 1])]
+            if self._columns[column_index]["ascii"]:
+                text = block.decode('ascii')
+                return [text[start:end] for start, end in pairwise(bounds.tolist())]
+            return [
+                block[start:end].decode('utf-8', 'surrogatepass')
+                for start, end in pairwise(bounds.tolist())
+            ]
+        
+        return [
+            data[start:end].decode('utf-8', 'surrogatepass')
+            for start, end in zip(offsets[indexes].tolist(), offsets[indexes + 1].tolist())
+        ]
+    
+    def numbers(self, column_index: int, indexes: np.ndarray) -> tuple[str, np.ndarray, np.ndarray]:
+        """
+        Numeric values of a column, as returned by columnar.parse_column
+        
+        Stored values are used for numeric columns; the cells of other
+        columns are parsed.
+        """
+        dtype = self._columns[column_index]["numbers"] if column_index < len(self._columns) else None
+        if dtype is None:
+            return parse_column(self.cells(column_index, indexes))
+        numbers = self._array(f"c{column_index}.numbers", dtype, self.row_count)[indexes]
+        return "number", numbers.astype(np.float64, copy=False), np.ones(len(indexes), dtype=bool)
+    
+    def rows(self, indexes: np.ndarray) -> List[List[str]]:
+        """Rebuild the rows at the given indexes exactly as they were read"""
+        lengths = self.lengths[indexes]
+        width = int(lengths.max()) if len(lengths) else 0
+        if not width:
+            return [[] for _ in range(len(indexes))]
+        
+        rows = list(map(list, zip(*(self.cells(j, indexes) for j in range(width)))))
+        for i in np.flatnonzero(lengths != width).tolist():
+            del rows[i][lengths[i]:]
+        return rows
+    
+    def iter_rows(self, batch_size: int) -> Iterator[List[str]]:
+        """Yield every row in order"""
+        for start in range(0, self.row_count, batch_size):
+            yield from self.rows(np.arange(start, min(start + batch_size, self.row_count)))
+
+
+class StoreColumn:
+    """One column of a ColumnStore restricted to some rows (see columnar.condition_mask)"""
+    
+    def __init__(self, store: ColumnStore, column_index: int, indexes: np.ndarray):
+        self._store = store
+        self._column_index = column_index
+        self._indexes = indexes
+    
+    def cells(self) -> List[str]:
+        return self._store.cells(self._column_index, self._indexes)
+    
+    def numbers(self) -> tuple[str, np.ndarray, np.ndarray]:
+        return self._store.numbers(self._column_index, self._indexes)
+
+
+def iter_store_filtering(
+    store: ColumnStore,
+    conditions: List[tuple],
+    batch_size: int,
+    progress: Optional[Callable[[int], None]] = None
+) -> Iterator[List[str]]:
+    """
+    Yield rows matching all conditions, evaluated on the stored columns
+    
+    Numeric comparisons use the pre-parsed values; only matching rows are
+    rebuilt. conditions is the output of tasks.parse_filter_conditions.
+    progress, if given, is called with the number of rows scanned after
+    each batch.
+    """
+    for start in range(0, store.row_count, batch_size):
+        stop = min(start + batch_size, store.row_count)
+        
+        def column_at(alive: np.ndarray, column_index: int) -> StoreColumn:
+            return StoreColumn(store, column_index, alive + start)
+        
+        selected = select_rows(store.lengths[start:stop], conditions, column_at)
+        if len(selected):
+            yield from store.rows(selected + start)
+        if progress is not None:
+            progress(stop)
+
+
+def iter_store_unique(
+    store: ColumnStore,
+    column_index: int,
+    batch_size: int,
+    progress: Optional[Callable[[int], None]] = None
+) -> Iterator[List[str]]:
+    """
+    Yield the first row for each distinct value of a column, decoding only that column
+    
+    progress is called as in iter_store_filtering.
+    """
+    seen = set()
+    
+    for start in range(0, store.row_count, batch_size):
+        stop = min(start + batch_size, store.row_count)
+        positions = np.flatnonzero(store.lengths[start:stop] > column_index) + start
+        
+        selected = []
+        for position, value in zip(positions.tolist(), store.cells(column_index, positions)):
+            if value not in seen:
+                seen.add(value)
+                selected.append(position)
+        
+        if selected:
+            yield from store.rows(np.array(selected, dtype=np.intp))
+        if progress is not None:
+            progress(stop)
@@ -0,0 +1,254 @@
+"""NumPy columnar execution engine for filter and unique operations
+
+Rows are consumed in batches; the columns an operation touches are turned
+into typed NumPy arrays (one inferred type per column) and evaluated with
+vectorized masks. Results are identical to the row-based functions in tasks.py,
+including the row-order and error semantics.
+"""
+from itertools import islice
+from operator import itemgetter
+from typing import Any, List, Iterable, Iterator, Optional
+
+import numpy as np
+
+NUMERIC_UFUNCS = {
+    "gt": np.greater,
+    "lt": np.less,
+    "gte": np.greater_equal,
+    "lte": np.less_equal,
+}
+
+
+def iter_batches(rows: Iterable[List[str]], batch_size: int) -> Iterator[List[List[str]]]:
+    """Yield lists of up to batch_size rows"""
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_column(cells: List[str]) -> tuple[str, np.ndarray, np.ndarray]:
+    """
+    Infer a column type and parse its numeric values
+    
+    Returns:
+        tuple: (kind, numbers, is_number) where kind is "number" if every
+        cell parses as a float and "string" otherwise; numbers holds NaN
+        where is_number is False
+    """
+    try:
+        numbers = np.fromiter(map(float, cells), dtype=np.float64, count=len(cells))
+        return "number", numbers, np.ones(len(cells), dtype=bool)
+    except ValueError:
+        pass
+    
+    # Text columns repeat values a lot; parse each distinct value once
+    parsed = {}
+    for cell in set(cells):
+        try:
+            parsed[cell] = float(cell)
+        except ValueError:
+            pass
+    
+    numbers = np.fromiter(
+        (parsed.get(cell, np.nan) for cell in cells),
+        dtype=np.float64,
+        count=len(cells)
+    )
+    is_number = np.fromiter((cell in parsed for cell in cells), dtype=bool, count=len(cells))
+    return "string", numbers, is_number
+
+
+def column_cells(rows: List[List[str]], column_index: int) -> List[str]:
+    """Column as a list of strings, '' where a row is too short"""
+    try:
+        return list(map(itemgetter(column_index), rows))
+    except IndexError:
+        return [row[column_index] if column_index < len(row) else '' for row in rows]
+
+
+class RowsColumn:
+    """One column of a list of rows, parsed on demand"""
+    
+    def __init__(self, rows: List[List[str]], column_index: int):
+        self._rows = rows
+        self._column_index = column_index
+        self._cells = None
+    
+    def cells(self) -> List[str]:
+        if self._cells is None:
+            self._cells = column_cells(self._rows, self._column_index)
+        return self._cells
+    
+    def numbers(self) -> tuple[str, np.ndarray, np.ndarray]:
+        return parse_column(self.cells())
+
+
+def condition_mask(
+    column,
+    op: str,
+    filter_value: Any,
+    filter_numeric: Optional[float]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate one parsed condition over a column
+    
+    column provides cells() (list of strings) and numbers() (see
+    parse_column); only what the operator needs is requested.
+    
+    Returns:
+        tuple: (matched, non_numeric) where non_numeric flags cells that make
+        gt/lt/gte/lte invalid (always all-False for other operators)
+    """
+    if op in ("eq", "ne"):
+        if filter_numeric is None:
+            equal = np.array(column.cells(), dtype=object) == str(filter_value)
+        else:
+            kind, numbers, is_number = column.numbers()
+            equal = numbers == filter_numeric
+            if kind != "number":
+                text_equal = np.array(column.cells(), dtype=object) == str(filter_value)
+                equal = np.where(is_number, equal, text_equal)
+        matched = ~equal if op == "ne" else equal
+        return matched, np.zeros(len(matched), dtype=bool)
+    
+    if op in NUMERIC_UFUNCS:
+        kind, numbers, is_number = column.numbers()
+        matched = NUMERIC_UFUNCS[op](numbers, filter_numeric)
+        if kind != "number":
+            return matched, ~is_number
+        return matched, np.zeros(len(matched), dtype=bool)
+    
+    cells = column.cells()
+    if op == "contains":
+        needle = str(filter_value).lower()
+        matched = np.fromiter(
+            (needle in cell.lower() for cell in cells),
+            dtype=bool,
+            count=len(cells)
+        )
+    else:  # op == "in"
+        options = np.array(list({str(v) for v in filter_value}), dtype=object)
+        matched = np.isin(np.array(cells, dtype=object), options)
+    
+    return matched, np.zeros(len(cells), dtype=bool)
+
+
+def select_rows(lengths: np.ndarray, conditions: List[tuple], column_at) -> np.ndarray:
+    """
+    Evaluate parsed filter conditions over rows with the given cell counts
+    
+    column_at(alive, column_index) returns the column (see condition_mask)
+    restricted to the row indexes in alive. Conditions are applied in order
+    and each one only looks at the rows that passed all earlier ones, so
+    columns are parsed no more often than by the row-based predicate. A
+    non-numeric cell under gt/lt/gte/lte raises for the earliest offending
+    row, exactly as the row-based predicate would.
+    
+    Returns:
+        np.ndarray: Indexes of matching rows, in order
+    """
+    alive = np.arange(len(lengths))
+    errors = []
+    
+    for column, column_index, op, filter_value, filter_numeric in conditions:
+        if not len(alive):
+            break
+        
+        in_range = lengths[alive] > column_index
+        matched, non_numeric = condition_mask(
+            column_at(alive, column_index), op, filter_value, filter_numeric
+        )
+        
+        bad = in_range & non_numeric
+        if bad.any():
+            errors.append((
+                int(alive[np.argmax(bad)]),
+                f"Cannot use '{op}' operator on non-numeric column '{column}'"
+            ))
+            matched &= ~bad
+        
+        alive = alive[in_range & matched]
+    
+    if errors:
+        raise ValueError(min(errors)[1])
+    
+    return alive
+
+
+def filter_mask(rows: List[List[str]], conditions: List[tuple]) -> np.ndarray:
+    """
+    Evaluate parsed filter conditions over a batch of rows
+    
+    Returns:
+        np.ndarray: Indexes of matching rows, in order
+    """
+    lengths = np.fromiter(map(len, rows), dtype=np.intp, count=len(rows))
+    
+    def column_at(alive: np.ndarray, column_index: int) -> RowsColumn:
+        subset = rows if len(alive) == len(rows) else list(map(rows.__getitem__, alive.tolist()))
+        return RowsColumn(subset, column_index)
+    
+    return select_rows(lengths, conditions, column_at)
+
+
+def iter_columnar_filtering(
+    rows: Iterable[List[str]],
+    conditions: List[tuple],
+    batch_size: int
+) -> Iterator[List[str]]:
+    """
+    Yield rows matching all conditions, evaluated batch by batch
+    
+    conditions is the output of tasks.parse_filter_conditions.
+    """
+    for batch in iter_batches(rows, batch_size):
+        yield from map(batch.__getitem__, filter_mask(batch, conditions).tolist())
+
+
+def first_occurrences(cells: List[str]) -> np.ndarray:
+    """
+    Positions of the first occurrence of each distinct cell, ascending
+    
+    Factorized through a dict built in C from the reversed cells (so the
+    first occurrence is the one written last), which needs memory for the
+    distinct values only; a fixed-width NumPy string array for np.unique
+    would take rows x longest cell.
+    """
+    first = dict(zip(reversed(cells), range(len(cells) - 1, -1, -1)))
+    index = np.fromiter(first.values(), dtype=np.intp, count=len(first))
+    index.sort()
+    return index
+
+
+def iter_columnar_unique(
+    rows: Iterable[List[str]],
+    column_index: int,
+    batch_size: int
+) -> Iterator[List[str]]:
+    """
+    Yield the first row for each distinct value of a column
+    
+    Each batch is reduced to its first occurrences (see first_occurrences);
+    only the batch-distinct values are checked against the values seen so far.
+    """
+    seen = set()
+    
+    for batch in iter_batches(rows, batch_size):
+        lengths = np.fromiter(map(len, batch), dtype=np.intp, count=len(batch))
+        positions = np.flatnonzero(lengths > column_index)
+        if not len(positions):
+            continue
+        
+        cells = column_cells(batch, column_index)
+        if len(positions) != len(batch):
+            cells = [cells[i] for i in positions.tolist()]
+        for i in positions[first_occurrences(cells)].tolist():
+            row = batch[i]
+            value = row[column_index]
+            if value not in seen:
+                seen.add(value)
+                yield row
+
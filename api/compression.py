@@ -0,0 +1,81 @@
+"""Compressed processed outputs
+
+A compressed output (CSV or NDJSON) is a sequence of independently
+decodable gzip members (or zstd frames): one holding the CSV header row,
+then one per row-index block (see row_index.py). Their concatenation is an
+ordinary .gz/.zst file, so it can be served as-is with a Content-Encoding,
+while the row index records the byte offset at which each block's member
+starts and a page can still be read by seeking there and decompressing only
+from that point.
+"""
+import gzip
+import io
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional, TextIO
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+COMPRESSION_LEVELS = {"gzip": 6, "zstd": 3}
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression requires the zstandard package") from None
+    return zstandard
+
+
+def compression_of(file_path: Path) -> Optional[str]:
+    """Compression of an output file, from its suffix (None if uncompressed)"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if file_path.suffix == suffix:
+            return compression
+    return None
+
+
+def uncompressed_name(file_path: Path) -> str:
+    """File name of an output once decompressed"""
+    if compression_of(file_path):
+        return file_path.stem
+    return file_path.name
+
+
+def compressor(compression: str) -> Callable[[bytes], bytes]:
+    """Function compressing a block of bytes into one complete member/frame"""
+    level = COMPRESSION_LEVELS[compression]
+    if compression == "gzip":
+        return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    return _import_zstandard().ZstdCompressor(level=level).compress
+
+
+def decompressed(raw: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Binary stream decompressing raw from its current position across members"""
+    if compression is None:
+        return raw
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    reader = _import_zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    return io.BufferedReader(reader)
+
+
+@contextmanager
+def open_output_text(file_path: Path, offset: int = 0) -> Iterator[TextIO]:
+    """
+    Open a (possibly compressed) text output (CSV or NDJSON)
+    
+    offset is a byte offset in the stored file at which a member (or, for
+    uncompressed files, a record) starts.
+    """
+    with open(file_path, 'rb') as raw:
+        raw.seek(offset)
+        with io.TextIOWrapper(decompressed(raw, compression_of(file_path)), encoding='utf-8', newline='') as f:
+            yield f
+
+
+def iter_decompressed(file_path: Path, chunk_size: int) -> Iterator[bytes]:
+    """Yield the decompressed content of an output file in chunks"""
+    with open(file_path, 'rb') as raw:
+        stream = decompressed(raw, compression_of(file_path))
+        while chunk := stream.read(chunk_size):
+            yield chunk
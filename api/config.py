@@ -12,7 +12,80 @@ PROCESSED_DIR.mkdir(exist_ok=True)
 # File validation configuration
 ALLOWED_EXTENSIONS = {".csv", ".xlsx", ".xls"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB read/write chunks while streaming uploads
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB chunks while streaming processed files
+
+# Chunked (resumable) uploads, see services/upload_session_service.py
+MAX_CHUNKED_UPLOAD_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024  # default chunk size
+MIN_UPLOAD_SESSION_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_SESSION_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # seconds an unfinished session is kept
+# Per user: open sessions, and bytes their part files reserve together
+MAX_OPEN_UPLOAD_SESSIONS = 8
+MAX_UPLOAD_SESSION_BYTES = 4 * 1024 * 1024 * 1024  # 4GB
 
 # Operation configuration
 VALID_OPERATIONS = ["dedup", "unique", "filter"]
+VALID_ENGINES = ["auto", "row", "columnar"]
+VALID_SEEN_SETS = ["exact", "fingerprint", "fingerprint_verify"]
+VALID_COMPRESSIONS = ["gzip", "zstd"]
+VALID_OUTPUT_FORMATS = ["csv", "ndjson", "parquet", "arrow"]
+MAX_PIPELINE_STEPS = 10
+
+# Task lanes (see services/scheduler_service.py): each worker pool consumes one
+# queue, so bulk jobs cannot hold up interactive ones. A task's cost is its
+# input size scaled by how much slower than a plain CSV scan its format and
+# operations are; under FAST_LANE_MAX_COST it goes to the fast queue.
+FAST_QUEUE = "fast"
+BULK_QUEUE = "bulk"
+FAST_LANE_MIN_COST = 64 * 1024  # cost given the highest fast priority
+FAST_LANE_MAX_COST = 8 * 1024 * 1024  # CSV-scan-equivalent bytes
+BULK_LANE_MAX_COST = 2 * 1024 * 1024 * 1024  # cost given the lowest bulk priority
+FORMAT_COST_FACTORS = {".csv": 1.0, ".xls": 3.0, ".xlsx": 6.0}  # parsing cost per input byte
+OPERATION_COST_FACTORS = {"filter": 1.0, "unique": 1.0, "dedup": 2.0, "convert": 2.0}
+COLUMN_STORE_COST_FACTOR = 0.25  # filter/unique (and Excel reads) served from the column store
+# An upload is converted into its column store (see column_store.py) when an
+# operation that would read one is first requested on it, if parsing the
+# upload costs at least COLUMN_STORE_MIN_COST; cheaper inputs are parsed each time
+COLUMN_STORE_MIN_COST = 8 * 1024 * 1024  # CSV-scan-equivalent bytes
+COLUMN_STORE_RETRY_AFTER = 60 * 60  # seconds before a conversion that left no store is queued again
+TASK_MAX_PRIORITY = 9  # priorities run 0 (served first) to TASK_MAX_PRIORITY within a lane
+TASK_VISIBILITY_TIMEOUT = 2 * 60 * 60  # seconds before an unacknowledged task is redelivered
+
+# Result cache configuration (LRU over processed outputs)
+RESULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1GB
+RESULT_CACHE_MAX_ENTRIES = 1000
+
+# Retention of uploads and processed outputs (see services/retention_service.py),
+# enforced by a periodic task (celery beat). Files unused for RETENTION_TTL are
+# removed, and least recently used ones while the directories exceed the quota.
+RETENTION_MAX_BYTES = 10 * 1024 * 1024 * 1024  # 10GB across UPLOAD_DIR and PROCESSED_DIR
+RETENTION_LOW_WATERMARK = 0.9  # evict down to this share of the quota
+RETENTION_TTL = 7 * 24 * 60 * 60  # seconds since last use
+RETENTION_MIN_AGE = 2 * 60 * 60  # files used this recently are kept (queued/running tasks)
+RETENTION_STALE_TEMP_AGE = 6 * 60 * 60  # age of abandoned temporary files removed
+RETENTION_INTERVAL = 15 * 60  # seconds between runs
+RETENTION_TOUCH_INTERVAL = 60  # seconds between recorded uses of a file (per API process)
+TASK_RESULT_EXPIRES = 24 * 60 * 60  # seconds task results are kept in the result backend
+
+# Task-status caching (per API process; finished tasks never change)
+TASK_STATE_CACHE_SIZE = 10000  # finished task states kept without re-asking the result backend
+TASK_PREVIEW_CACHE_ROWS = 100000  # rows held across memoized result previews
+
+# SQLite (users.db): pooled WAL connections; auth DB work runs on a bounded thread pool
+DB_POOL_SIZE = 8  # idle connections kept for reuse
+DB_BUSY_TIMEOUT = 5  # seconds a connection waits for a lock held by another writer
+AUTH_DB_THREADS = 8  # register/login calls running at once
+
+# Verified-token cache (per API process); entries expire with the token
+TOKEN_CACHE_SIZE = 10000  # verified token payloads kept
+TOKEN_CACHE_MAX_TTL = 300  # seconds a payload is trusted without decoding again, at most
+
 
+# Task event streams (Server-Sent Events); one backend poller per watched task
+TASK_EVENTS_POLL_INTERVAL = 0.5  # seconds between result backend lookups
+TASK_EVENTS_KEEPALIVE = 15  # seconds of silence before a keep-alive comment
+# The backend reports unknown task ids as PENDING, like queued tasks; a stream
+# still PENDING after this many seconds ends with an UNKNOWN event
+TASK_EVENTS_PENDING_TIMEOUT = 600
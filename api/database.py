@@ -1,16 +1,80 @@
 """Database configuration and models"""
+import os
 import sqlite3
+import threading
 from pathlib import Path
 from contextlib import contextmanager
+from config import DB_POOL_SIZE, DB_BUSY_TIMEOUT
 
 DB_PATH = Path("users.db")
 
+# Applied to every connection; journal_mode=WAL is persistent and set once in init_db
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",  # with WAL: no fsync per commit, still never corrupt
+    "PRAGMA cache_size=-8192",  # 8MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def connect() -> sqlite3.Connection:
+    """Open a connection with the shared settings (usable from any one thread at a time)"""
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class _ConnectionPool:
+    """
+    LIFO pool of idle connections
+    
+    Connections are reused, so each keeps its page cache and its cache of
+    prepared statements across requests. At most size idle connections are
+    kept; a busy pool opens extra connections rather than waiting, and
+    closes them when they are returned. A forked process (Celery worker)
+    starts with an empty pool instead of sharing its parent's connections.
+    """
+    
+    def __init__(self, size: int):
+        self._size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return connect()
+    
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self._size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+_pool = _ConnectionPool(DB_POOL_SIZE)
+
 
 def init_db():
     """Initialize the database and create tables"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT)
     cursor = conn.cursor()
     
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,19 +84,107 @@ def init_db():
         )
     """)
     
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            inferred_schema TEXT,
+            path TEXT,
+            ext TEXT,
+            line_count INTEGER,
+            row_count INTEGER,
+            headers TEXT,
+            owner_id TEXT
+        )
+    """)
+    _add_missing_columns(cursor, "files", {
+        "inferred_schema": "TEXT",  # JSON, see sniffing.py
+        "path": "TEXT",
+        "ext": "TEXT",
+        "line_count": "INTEGER",
+        "row_count": "INTEGER",  # data rows, known once the column store is built
+        "headers": "TEXT",  # JSON list (default sheet for Excel files)
+        "owner_id": "TEXT",
+        "column_store_requested_at": "REAL",  # when its conversion was last queued
+    })
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            upload_id TEXT PRIMARY KEY,
+            owner_id TEXT,
+            filename TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            sha256 TEXT,
+            expires_at REAL NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_chunks (
+            upload_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            PRIMARY KEY (upload_id, chunk_index)
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            processed_file TEXT NOT NULL,
+            result TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used_at REAL NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_access (
+            path TEXT PRIMARY KEY,
+            last_accessed_at REAL NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_result_cache_last_used
+        ON result_cache (last_used_at)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_result_cache_task_id
+        ON result_cache (task_id)
+    """)
+    
     conn.commit()
     conn.close()
 
 
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: dict) -> None:
+    """Add columns introduced after a table was first created (name -> declaration)"""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, declaration in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+
 @contextmanager
 def get_db():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    Context manager for database connections
+    
+    The connection is borrowed from the pool; uncommitted changes are
+    rolled back when it is returned.
+    """
+    conn = _pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        _pool.release(conn)
 
 
 # Initialize database on import
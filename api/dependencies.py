@@ -7,7 +7,7 @@ security = HTTPBearer()
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Dependency to get current authenticated user from JWT token"""
+    """Dependency to get current authenticated user from JWT token (verified payloads are cached, see AuthService.verify_token)"""
     token = credentials.credentials
     try:
         payload = AuthService.verify_token(token)
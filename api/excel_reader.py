@@ -0,0 +1,216 @@
+"""Streaming Excel row sources
+
+Rows are stringified one at a time as they are read, so no operation holds a
+materialized copy of a sheet. .xlsx files are read with openpyxl in read-only
+mode; legacy .xls files need xlrd, which loads the selected sheet (but not
+the rest of the workbook) before rows are produced.
+"""
+from pathlib import Path
+from typing import Any, List, Iterator, Optional
+
+import openpyxl
+
+
+def cell_text(value: Any) -> str:
+    """String form of a cell value, '' for an empty cell"""
+    return str(value) if value is not None else ''
+
+
+def _import_xlrd():
+    try:
+        import xlrd
+    except ImportError:
+        raise RuntimeError("Reading .xls files requires the xlrd package") from None
+    return xlrd
+
+
+def _sheet_not_found(sheet: str) -> ValueError:
+    return ValueError(f"Sheet '{sheet}' not found in workbook")
+
+
+def excel_sheet_names(file_path: Path) -> List[str]:
+    """Names of the worksheets in a workbook, in tab order"""
+    if file_path.suffix == '.xls':
+        book = _import_xlrd().open_workbook(file_path, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def excel_row_count(file_path: Path, sheet: Optional[str] = None) -> int:
+    """Number of data rows in a sheet, from the sheet's recorded dimensions"""
+    if file_path.suffix == '.xls':
+        book = _import_xlrd().open_workbook(file_path, on_demand=True)
+        try:
+            return max(_xls_sheet(book, sheet).nrows - 1, 0)
+        finally:
+            book.release_resources()
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return max((_xlsx_sheet(wb, sheet).max_row or 0) - 1, 0)
+    finally:
+        wb.close()
+
+
+def outline_row_count(outline: Optional[dict], sheet: Optional[str] = None) -> Optional[int]:
+    """Number of data rows in a sheet according to a workbook outline (see inspect_excel), if it lists the sheet"""
+    if not outline:
+        return None
+    return outline["sheet_rows"].get(outline["default_sheet"] if sheet is None else sheet)
+
+
+def inspect_excel(file_path: Path) -> tuple[dict, List[str], Iterator[List[str]]]:
+    """
+    Open a workbook once for its outline and the rows of its default sheet
+    (see stream_excel)
+    
+    The outline is kept in the file catalog, so later requests need not
+    open the workbook to check or size a sheet.
+    
+    Returns:
+        tuple: (outline, headers, rows); outline is a dict of default_sheet
+        (the sheet read when none is named) and sheet_rows, the number of
+        data rows of each worksheet (from its recorded dimensions) in tab order
+    """
+    if file_path.suffix == '.xls':
+        book = _import_xlrd().open_workbook(file_path, on_demand=True)
+        try:
+            outline = _xls_outline(book)
+        except BaseException:
+            book.release_resources()
+            raise
+        return (outline, *_stream_xls_book(book))
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        outline = _xlsx_outline(wb)
+    except BaseException:
+        wb.close()
+        raise
+    return (outline, *_stream_xlsx_workbook(wb))
+
+
+def stream_excel(file_path: Path, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """
+    Open a sheet of an Excel file as headers and a lazy iterator over data rows
+    
+    sheet is a worksheet name; by default the active sheet of an .xlsx file
+    and the first sheet of an .xls file are read.
+    """
+    if file_path.suffix == '.xls':
+        return stream_xls(file_path, sheet)
+    return stream_xlsx(file_path, sheet)
+
+
+def _xlsx_sheet(wb, sheet: Optional[str]):
+    if sheet is None:
+        return wb.active
+    if sheet not in wb.sheetnames:
+        raise _sheet_not_found(sheet)
+    return wb[sheet]
+
+
+def _xlsx_outline(wb) -> dict:
+    return {
+        "default_sheet": wb.active.title if wb.active is not None else wb.sheetnames[0],
+        "sheet_rows": {ws.title: max((ws.max_row or 0) - 1, 0) for ws in wb.worksheets}
+    }
+
+
+def stream_xlsx(file_path: Path, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """Stream a sheet of an .xlsx file (see stream_excel)"""
+    return _stream_xlsx_workbook(openpyxl.load_workbook(file_path, read_only=True), sheet)
+
+
+def _stream_xlsx_workbook(wb, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """Stream a sheet of an open .xlsx workbook, closing it when done"""
+    try:
+        sheet_rows = _xlsx_sheet(wb, sheet).iter_rows(values_only=True)
+        headers = list(map(cell_text, next(sheet_rows)))
+    except BaseException:
+        wb.close()
+        raise
+    
+    def rows() -> Iterator[List[str]]:
+        try:
+            for row in sheet_rows:
+                yield list(map(cell_text, row))
+        finally:
+            wb.close()
+    
+    return headers, rows()
+
+
+def _xls_sheet(book, sheet: Optional[str]):
+    if sheet is None:
+        return book.sheet_by_index(0)
+    if sheet not in book.sheet_names():
+        raise _sheet_not_found(sheet)
+    return book.sheet_by_name(sheet)
+
+
+def _xls_outline(book) -> dict:
+    sheet_rows = {}
+    for name in book.sheet_names():
+        loaded = book.sheet_loaded(name)
+        sheet_rows[name] = max(book.sheet_by_name(name).nrows - 1, 0)
+        if not loaded:
+            book.unload_sheet(name)
+    return {"default_sheet": book.sheet_names()[0], "sheet_rows": sheet_rows}
+
+
+def stream_xls(file_path: Path, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """
+    Stream a sheet of a legacy .xls file (see stream_excel)
+    
+    Cells are rendered the way openpyxl renders the same values from .xlsx:
+    whole numbers without a decimal point, dates as datetimes (times of day
+    as times), booleans as True/False and error cells as their error text.
+    """
+    return _stream_xls_book(_import_xlrd().open_workbook(file_path, on_demand=True), sheet)
+
+
+def _stream_xls_book(book, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """Stream a sheet of an open .xls workbook, releasing it when done"""
+    xlrd = _import_xlrd()
+    
+    def render(ctype: int, value: Any) -> str:
+        if ctype == xlrd.XL_CELL_TEXT:
+            return value
+        if ctype == xlrd.XL_CELL_NUMBER:
+            return str(int(value)) if value.is_integer() else str(value)
+        if ctype == xlrd.XL_CELL_DATE:
+            moment = xlrd.xldate_as_datetime(value, book.datemode)
+            return str(moment.time() if value < 1 else moment)
+        if ctype == xlrd.XL_CELL_BOOLEAN:
+            return str(bool(value))
+        if ctype == xlrd.XL_CELL_ERROR:
+            return xlrd.error_text_from_code.get(value, '')
+        return ''  # XL_CELL_EMPTY / XL_CELL_BLANK
+    
+    def sheet_rows(ws) -> Iterator[List[str]]:
+        for rowx in range(ws.nrows):
+            yield list(map(render, ws.row_types(rowx), ws.row_values(rowx)))
+    
+    try:
+        source = sheet_rows(_xls_sheet(book, sheet))
+        headers = next(source)
+    except BaseException:
+        book.release_resources()
+        raise
+    
+    def rows() -> Iterator[List[str]]:
+        try:
+            yield from source
+        finally:
+            book.release_resources()
+    
+    return headers, rows()
@@ -0,0 +1,138 @@
+"""External-memory (spill-to-disk) deduplication
+
+Rows are deduplicated in memory until the seen-set outgrows a memory budget.
+After that, rows that are not already known are hash-partitioned into bucket
+files on disk together with their input position. Each bucket is then
+deduplicated on its own and the survivors are merged back by position, so
+the output keeps the first-occurrence order of the in-memory implementation.
+"""
+import csv
+import heapq
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Iterable, Iterator, Optional
+
+# Rough CPython footprint used to estimate seen-set memory per distinct row:
+# set slot + tuple header, then pointer + str header per cell
+ROW_OVERHEAD = 96
+CELL_OVERHEAD = 57
+
+
+def estimate_row_size(row: List[str]) -> int:
+    """Approximate bytes held by a row tuple stored in a set"""
+    return ROW_OVERHEAD + CELL_OVERHEAD * len(row) + sum(map(len, row))
+
+
+class SpillingDeduplicator:
+    """
+    Iterate the first occurrence of each distinct row within a memory budget
+    
+    stats is filled in while iterating and is complete once the iterator is
+    exhausted.
+    """
+    
+    def __init__(
+        self,
+        rows: Iterable[List[str]],
+        memory_budget: int,
+        partitions: int,
+        spill_dir: Optional[Path] = None
+    ):
+        self._rows = rows
+        self._memory_budget = memory_budget
+        self._partitions = partitions
+        self._spill_dir = spill_dir
+        self.stats = {
+            "spilled": False,
+            "spill_partitions": 0,
+            "spilled_rows": 0,
+            "spill_bytes": 0,
+            "max_partition_rows": 0
+        }
+    
+    def __iter__(self) -> Iterator[List[str]]:
+        seen = set()
+        used = 0
+        rows = iter(self._rows)
+        
+        for position, row in enumerate(rows):
+            row_tuple = tuple(row)
+            if row_tuple in seen:
+                continue
+            seen.add(row_tuple)
+            yield row
+            
+            used += estimate_row_size(row)
+            if used > self._memory_budget:
+                break
+        else:
+            return
+        
+        # Budget exceeded: everything after this point goes through buckets
+        workdir = Path(tempfile.mkdtemp(prefix="dedup_", dir=self._spill_dir))
+        try:
+            bucket_paths = self._partition(rows, seen, position + 1, workdir)
+            seen = None
+            survivor_paths = [self._dedup_bucket(path) for path in bucket_paths]
+            yield from self._merge(survivor_paths)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    def _partition(self, rows: Iterator[List[str]], seen: set, start: int, workdir: Path) -> List[Path]:
+        """Write unseen rows to hash buckets as (position, *row)"""
+        self.stats["spilled"] = True
+        self.stats["spill_partitions"] = self._partitions
+        
+        paths = [workdir / f"bucket_{i}.csv" for i in range(self._partitions)]
+        files = [open(path, 'w', encoding='utf-8', newline='') for path in paths]
+        try:
+            writers = [csv.writer(f) for f in files]
+            spilled = 0
+            for position, row in enumerate(rows, start):
+                row_tuple = tuple(row)
+                if row_tuple in seen:
+                    continue
+                writers[hash(row_tuple) % self._partitions].writerow([position, *row])
+                spilled += 1
+            self.stats["spilled_rows"] = spilled
+        finally:
+            for f in files:
+                f.close()
+        
+        self.stats["spill_bytes"] = sum(path.stat().st_size for path in paths)
+        return paths
+    
+    def _dedup_bucket(self, path: Path) -> Path:
+        """Deduplicate one bucket in memory, keeping rows in position order"""
+        survivors_path = path.with_name(f"{path.stem}_unique.csv")
+        seen = set()
+        count = 0
+        
+        with open(path, 'r', encoding='utf-8', newline='') as src, \
+                open(survivors_path, 'w', encoding='utf-8', newline='') as dst:
+            writer = csv.writer(dst)
+            for record in csv.reader(src):
+                count += 1
+                row_tuple = tuple(record[1:])
+                if row_tuple not in seen:
+                    seen.add(row_tuple)
+                    writer.writerow(record)
+        
+        path.unlink()
+        self.stats["max_partition_rows"] = max(self.stats["max_partition_rows"], count)
+        return survivors_path
+    
+    def _merge(self, survivor_paths: List[Path]) -> Iterator[List[str]]:
+        """Merge per-bucket survivors back into input order"""
+        files = [open(path, 'r', encoding='utf-8', newline='') for path in survivor_paths]
+        try:
+            streams = [
+                ((int(record[0]), record[1:]) for record in csv.reader(f))
+                for f in files
+            ]
+            for _, row in heapq.merge(*streams, key=lambda item: item[0]):
+                yield row
+        finally:
+            for f in files:
+                f.close()
@@ -0,0 +1,200 @@
+"""Compact fingerprint-based seen-sets for dedup and unique
+
+Instead of keeping every distinct row tuple (or cell string) in a Python set,
+FingerprintSet stores a fixed-width 128-bit BLAKE2b digest of each key in an
+open-addressing table backed by flat arrays. With verify enabled, every key
+is also appended to an on-disk key log so that digest matches can be checked
+byte-for-byte, which rules out false duplicates from digest collisions.
+"""
+import hashlib
+import os
+import tempfile
+from array import array
+from typing import List, Iterable, Iterator, Optional
+from external_dedup import ROW_OVERHEAD, CELL_OVERHEAD
+
+MASK_64 = (1 << 64) - 1
+MAX_LOAD = 0.6
+
+# Rough CPython footprint of one distinct cell string held in a set
+VALUE_OVERHEAD = 73
+
+
+def zeros(typecode: str, length: int) -> array:
+    """Zero-filled array of the given typecode"""
+    return array(typecode, bytes(array(typecode).itemsize * length))
+
+
+def row_key(row: List[str]) -> bytes:
+    """Unambiguous byte encoding of a whole row (repr escapes quotes and surrogates)"""
+    return repr(row).encode('utf-8')
+
+
+def value_key(value: str) -> bytes:
+    """Byte encoding of a single cell value"""
+    return value.encode('utf-8', 'surrogatepass')
+
+
+class FingerprintSet:
+    """Open-addressing hash set of 128-bit key digests"""
+    
+    def __init__(self, verify: bool = False, spill_dir: Optional[str] = None, capacity: int = 1024):
+        self._capacity = capacity
+        self._hi = zeros('Q', capacity)
+        self._lo = zeros('Q', capacity)
+        self._size = 0
+        self._verify = verify
+        
+        if verify:
+            self._offsets = zeros('q', capacity)
+            self._lengths = zeros('I', capacity)
+            self._log = tempfile.TemporaryFile(dir=spill_dir)
+            self._log_size = 0
+            self._log_flushed = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the in-memory table"""
+        total = self._hi.itemsize * len(self._hi) + self._lo.itemsize * len(self._lo)
+        if self._verify:
+            total += self._offsets.itemsize * len(self._offsets) + self._lengths.itemsize * len(self._lengths)
+        return total
+    
+    def add(self, key: bytes) -> bool:
+        """Add key, returning True if it was not already present"""
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), 'little')
+        hi = digest >> 64
+        lo = (digest & MASK_64) or 1  # (0, 0) marks an empty slot
+        
+        lo_table = self._lo
+        mask = self._capacity - 1
+        slot = lo & mask
+        current = lo_table[slot]
+        while current:
+            if current == lo and self._hi[slot] == hi:
+                if not self._verify or self._read_key(slot) == key:
+                    return False
+            slot = (slot + 1) & mask
+            current = lo_table[slot]
+        
+        self._hi[slot] = hi
+        self._lo[slot] = lo
+        if self._verify:
+            self._offsets[slot] = self._log_size
+            self._lengths[slot] = len(key)
+            self._log.write(key)
+            self._log_size += len(key)
+        self._size += 1
+        
+        if self._size > self._capacity * MAX_LOAD:
+            self._grow()
+        return True
+    
+    def close(self) -> None:
+        """Release the key log, if any"""
+        if self._verify:
+            self._log.close()
+    
+    def _read_key(self, slot: int) -> bytes:
+        offset = self._offsets[slot]
+        length = self._lengths[slot]
+        if offset + length > self._log_flushed:
+            self._log.flush()
+            self._log_flushed = self._log_size
+        return os.pread(self._log.fileno(), length, offset)
+    
+    def _grow(self) -> None:
+        """Double the table and reinsert every digest"""
+        old_hi, old_lo = self._hi, self._lo
+        if self._verify:
+            old_offsets, old_lengths = self._offsets, self._lengths
+        
+        capacity = self._capacity * 2
+        mask = capacity - 1
+        self._hi = zeros('Q', capacity)
+        self._lo = zeros('Q', capacity)
+        if self._verify:
+            self._offsets = zeros('q', capacity)
+            self._lengths = zeros('I', capacity)
+        
+        for old_slot, lo in enumerate(old_lo):
+            if not lo:
+                continue
+            slot = lo & mask
+            while self._lo[slot]:
+                slot = (slot + 1) & mask
+            self._hi[slot] = old_hi[old_slot]
+            self._lo[slot] = lo
+            if self._verify:
+                self._offsets[slot] = old_offsets[old_slot]
+                self._lengths[slot] = old_lengths[old_slot]
+        
+        self._capacity = capacity
+
+
+class FingerprintDeduplicator:
+    """
+    Iterate the first row for each distinct row (column_index=None) or
+    distinct column value, tracking keys in a FingerprintSet
+    
+    stats reports the table size next to an estimate of what the equivalent
+    exact Python set would hold, both normalised per million distinct keys.
+    """
+    
+    def __init__(
+        self,
+        rows: Iterable[List[str]],
+        column_index: Optional[int] = None,
+        verify: bool = False,
+        spill_dir: Optional[str] = None
+    ):
+        self._rows = rows
+        self._column_index = column_index
+        self._verify = verify
+        self._spill_dir = spill_dir
+        self.stats = {
+            "seen_set": "fingerprint_verify" if verify else "fingerprint",
+            "distinct_keys": 0,
+            "seen_set_bytes": 0,
+            "exact_set_bytes_estimate": 0,
+            "bytes_per_million_keys": 0,
+            "exact_bytes_per_million_keys": 0
+        }
+    
+    def __iter__(self) -> Iterator[List[str]]:
+        seen = FingerprintSet(self._verify, self._spill_dir)
+        column_index = self._column_index
+        exact_bytes = 0
+        
+        add = seen.add
+        
+        try:
+            if column_index is None:
+                for row in self._rows:
+                    key = row_key(row)
+                    if add(key):
+                        # The encoded key is about as long as the cells it covers
+                        exact_bytes += ROW_OVERHEAD + CELL_OVERHEAD * len(row) + len(key)
+                        yield row
+            else:
+                for row in self._rows:
+                    if column_index < len(row):
+                        key = value_key(row[column_index])
+                        if add(key):
+                            exact_bytes += VALUE_OVERHEAD + len(key)
+                            yield row
+        finally:
+            seen.close()
+            self._report(seen, exact_bytes)
+    
+    def _report(self, seen: FingerprintSet, exact_bytes: int) -> None:
+        keys = len(seen)
+        self.stats["distinct_keys"] = keys
+        self.stats["seen_set_bytes"] = seen.nbytes
+        self.stats["exact_set_bytes_estimate"] = exact_bytes
+        if keys:
+            self.stats["bytes_per_million_keys"] = seen.nbytes * 1_000_000 // keys
+            self.stats["exact_bytes_per_million_keys"] = exact_bytes * 1_000_000 // keys
@@ -1,6 +1,6 @@
 """Main FastAPI application"""
 from fastapi import FastAPI
-from routers import upload, operations, tasks, files, auth
+from routers import upload, operations, tasks, files, auth, metrics
 
 app = FastAPI(title="CSV Processing API", version="1.0.0")
 
@@ -10,6 +10,7 @@ app.include_router(upload.router)
 app.include_router(operations.router)
 app.include_router(tasks.router)
 app.include_router(files.router)
+app.include_router(metrics.router)  # Prometheus scrape endpoint (no auth)
 
 
 if __name__ == "__main__":
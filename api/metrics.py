@@ -0,0 +1,100 @@
+"""Prometheus metrics of the API and its Celery workers
+
+Exposed at GET /metrics (see routers/metrics.py):
+
+    csv_upload_bytes                     histogram  size of accepted uploads, by method
+    csv_upload_duration_seconds          histogram  upload request latency, by method
+    csv_task_queue_wait_seconds          histogram  time from submission to a worker starting the task
+    csv_task_stage_duration_seconds      histogram  time per stage (prepare, read, operate, write,
+                                                    merge, total), by operation
+    csv_task_rows_per_second             histogram  input rows per second of task run time
+    csv_task_peak_rss_bytes              histogram  peak resident memory of a task
+    csv_result_cache_hits_total          counter    operations served from the result cache
+    csv_result_cache_misses_total        counter    operations that had to run
+    csv_failures_total                   counter    failed uploads, operation requests and tasks
+
+Task metrics are recorded by the Celery workers running them, from the
+task_postrun and task_failure signals (see tasks.py), using the timings
+each result carries (see tasks.process_csv_operation).
+
+With PROMETHEUS_MULTIPROC_DIR set, every process (API and worker
+processes alike) writes its metrics to files in that directory, and
+/metrics of any API process reports the sum over all of them. The
+directory must be shared by the API and the workers, and emptied before
+they start (see docker-compose.yml). Without it, each process keeps its
+own metrics and task metrics are not exposed.
+"""
+import os
+from typing import Any, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# 64KB .. 4GB, x4
+SIZE_BUCKETS = tuple(64 * 1024 * 4 ** i for i in range(9))
+# 5ms .. ~20min
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+# 1k .. 10M rows/s
+RATE_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+# 16MB .. 16GB, x4
+MEMORY_BUCKETS = tuple(16 * 1024 * 1024 * 4 ** i for i in range(6))
+TASK_STAGES = ("prepare", "read", "operate", "write", "merge", "total")
+
+UPLOAD_BYTES = Histogram(
+    "csv_upload_bytes", "Size of accepted uploads", ["method"], buckets=SIZE_BUCKETS
+)
+UPLOAD_SECONDS = Histogram(
+    "csv_upload_duration_seconds", "Upload request latency", ["method"], buckets=DURATION_BUCKETS
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "csv_task_queue_wait_seconds", "Time tasks waited for a worker", ["operation"], buckets=DURATION_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "csv_task_stage_duration_seconds", "Task time per stage", ["operation", "stage"], buckets=DURATION_BUCKETS
+)
+ROWS_PER_SECOND = Histogram(
+    "csv_task_rows_per_second", "Input rows per second of task run time", ["operation"], buckets=RATE_BUCKETS
+)
+PEAK_RSS_BYTES = Histogram(
+    "csv_task_peak_rss_bytes", "Peak resident memory of tasks", ["operation"], buckets=MEMORY_BUCKETS
+)
+CACHE_HITS = Counter("csv_result_cache_hits", "Operations served from the result cache")
+CACHE_MISSES = Counter("csv_result_cache_misses", "Operations not found in the result cache")
+FAILURES = Counter("csv_failures", "Failed uploads, operation requests and tasks", ["stage"])
+
+
+def observe_upload(method: str, size: int, seconds: float) -> None:
+    """Record an accepted upload ("single" request or "chunked" session completion)"""
+    UPLOAD_BYTES.labels(method).observe(size)
+    UPLOAD_SECONDS.labels(method).observe(seconds)
+
+
+def observe_task_result(result: Dict[str, Any]) -> None:
+    """Record the timings of a successful process_csv_operation result"""
+    operation = result.get("operation") or "unknown"
+    timings = result.get("timings") or {}
+    
+    if timings.get("queue_wait_seconds") is not None:
+        QUEUE_WAIT_SECONDS.labels(operation).observe(timings["queue_wait_seconds"])
+    for stage in TASK_STAGES:
+        if timings.get(f"{stage}_seconds") is not None:
+            STAGE_SECONDS.labels(operation, stage).observe(timings[f"{stage}_seconds"])
+    if result.get("rows_per_second") is not None:
+        ROWS_PER_SECOND.labels(operation).observe(result["rows_per_second"])
+    if result.get("peak_rss_bytes") is not None:
+        PEAK_RSS_BYTES.labels(operation).observe(result["peak_rss_bytes"])
+
+
+def count_failure(stage: str) -> None:
+    """Count a failed "upload", "operation" request or "task" """
+    FAILURES.labels(stage).inc()
+
+
+def render() -> tuple[bytes, str]:
+    """Metrics in the Prometheus text format, and its content type"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Aggregate the files written by all processes
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
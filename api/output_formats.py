@@ -0,0 +1,265 @@
+"""Processed output formats
+
+Processed rows can be written as CSV (the default), NDJSON, Parquet or
+Arrow IPC. All of them are written batch by batch as rows are produced:
+
+    ndjson   one JSON object per line, keyed by header; row-indexed like CSV
+             (see row_index.py) and optionally gzip/zstd compressed
+    parquet  one row group per OUTPUT_BATCH_SIZE rows, string columns;
+             compression selects the Parquet codec (snappy by default)
+    arrow    Arrow IPC file, one record batch per OUTPUT_BATCH_SIZE rows,
+             string columns; compression selects the IPC codec (zstd only).
+             The batch size is kept in the schema metadata, so a page is
+             located without reading the batches before it
+
+Rows are fitted to the header: missing trailing cells become null and cells
+beyond the last header are dropped, since they have no field to go into.
+"""
+import json
+import operator
+from array import array
+from itertools import islice
+from json.encoder import encode_basestring
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+import numpy as np
+
+from columnar import column_cells, iter_batches
+from compression import COMPRESSION_SUFFIXES, compressor, open_output_text, uncompressed_name
+from row_index import ROW_INDEX_STRIDE, load_row_index, read_row_page, row_index_path, write_row_index
+
+# Format -> (file suffix, media type)
+OUTPUT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+# Formats written as text, which compression applies to as a whole
+TEXT_OUTPUT_FORMATS = {"csv", "ndjson"}
+OUTPUT_BATCH_SIZE = 65_536
+# Schema metadata key of the rows per record batch (all but the last) of an Arrow output
+ARROW_BATCH_ROWS_KEY = b"batch_rows"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow IPC output require the pyarrow package") from None
+    return pyarrow
+
+
+def output_suffix(output_format: Optional[str], compression: Optional[str] = None) -> str:
+    """File suffix of a processed output, including any compression suffix"""
+    output_format = output_format or "csv"
+    suffix = OUTPUT_FORMATS[output_format][0]
+    if compression and output_format in TEXT_OUTPUT_FORMATS:
+        suffix += COMPRESSION_SUFFIXES[compression]
+    return suffix
+
+
+def output_format_of(file_path: Path) -> str:
+    """Format of a processed output, from its suffix"""
+    suffix = Path(uncompressed_name(file_path)).suffix
+    for output_format, (format_suffix, _) in OUTPUT_FORMATS.items():
+        if suffix == format_suffix:
+            return output_format
+    return "csv"
+
+
+def media_type_of(file_path: Path) -> str:
+    """Media type of a processed output (of its content, once decompressed)"""
+    return OUTPUT_FORMATS[output_format_of(file_path)][1]
+
+
+def write_output(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    output_format: str,
+    compression: Optional[str] = None
+) -> int:
+    """
+    Write rows as NDJSON, Parquet or Arrow IPC and return the row count
+    
+    A partially written file (and index) is removed on failure.
+    """
+    writers = {"ndjson": write_ndjson, "parquet": write_parquet, "arrow": write_arrow}
+    try:
+        return writers[output_format](file_path, headers, rows, compression)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        row_index_path(file_path).unlink(missing_ok=True)
+        raise
+
+
+def write_ndjson(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    compression: Optional[str] = None
+) -> int:
+    """Write rows as NDJSON with a row index, one compressed member per index block if compression is given"""
+    compress = compressor(compression) if compression else None
+    width = len(headers)
+    keys = [encode_basestring(name) + ':' for name in headers]
+    offsets = array('q')
+    count = 0
+    
+    def record(row: List[str]) -> str:
+        # Cells are always strings, so objects are assembled from encoded keys and values
+        if len(row) == width:
+            values = map(encode_basestring, row)
+        else:
+            values = [encode_basestring(cell) for cell in row[:width]] + ['null'] * (width - len(row))
+        return '{' + ','.join(map(operator.add, keys, values)) + '}\n'
+    
+    with open(file_path, 'wb') as f:
+        for batch in iter_batches(rows, ROW_INDEX_STRIDE):
+            offsets.append(f.tell())
+            data = ''.join([record(row) for row in batch]).encode('utf-8')
+            f.write(compress(data) if compress else data)
+            count += len(batch)
+    
+    write_row_index(file_path, ROW_INDEX_STRIDE, count, offsets)
+    return count
+
+
+def _string_arrays(pa, batch: List[List[str]], width: int) -> list:
+    """Arrow string arrays of a batch's first width columns, null where a row is too short"""
+    lengths = np.fromiter(map(len, batch), dtype=np.intp, count=len(batch))
+    arrays = []
+    for column_index in range(width):
+        missing = lengths <= column_index
+        arrays.append(pa.array(
+            column_cells(batch, column_index),
+            type=pa.string(),
+            mask=missing if missing.any() else None
+        ))
+    return arrays
+
+
+def write_parquet(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    compression: Optional[str] = None
+) -> int:
+    """Write rows as a Parquet file of string columns, one row group per batch"""
+    pa = _import_pyarrow()
+    schema = pa.schema([pa.field(name, pa.string()) for name in headers])
+    count = 0
+    
+    with pa.parquet.ParquetWriter(file_path, schema, compression=compression or "snappy") as writer:
+        for batch in iter_batches(rows, OUTPUT_BATCH_SIZE):
+            writer.write_table(
+                pa.Table.from_arrays(_string_arrays(pa, batch, len(headers)), schema=schema),
+                row_group_size=len(batch)
+            )
+            count += len(batch)
+    return count
+
+
+def write_arrow(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    compression: Optional[str] = None
+) -> int:
+    """Write rows as an Arrow IPC file of string columns, one record batch per batch"""
+    pa = _import_pyarrow()
+    schema = pa.schema(
+        [pa.field(name, pa.string()) for name in headers],
+        metadata={ARROW_BATCH_ROWS_KEY: str(OUTPUT_BATCH_SIZE)}
+    )
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    count = 0
+    
+    with pa.OSFile(str(file_path), 'wb') as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for batch in iter_batches(rows, OUTPUT_BATCH_SIZE):
+            writer.write_batch(
+                pa.RecordBatch.from_arrays(_string_arrays(pa, batch, len(headers)), schema=schema)
+            )
+            count += len(batch)
+    return count
+
+
+def read_output_page(file_path: Path, offset: int, limit: int) -> tuple[List[dict], int]:
+    """
+    Read up to limit rows of a processed output starting at row offset, as dicts
+    
+    Returns:
+        tuple: (rows, row_count) where row_count is the total number of rows
+    """
+    output_format = output_format_of(file_path)
+    if output_format == "ndjson":
+        return read_ndjson_page(file_path, offset, limit)
+    if output_format == "parquet":
+        pa = _import_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(file_path)
+        metadata = parquet_file.metadata
+        return _read_parts_page(
+            [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)],
+            parquet_file.read_row_group,
+            offset,
+            limit
+        )
+    if output_format == "arrow":
+        pa = _import_pyarrow()
+        with pa.memory_map(str(file_path)) as source:
+            reader = pa.ipc.open_file(source)
+            return _read_parts_page(_arrow_batch_rows(reader), reader.get_batch, offset, limit)
+    return read_row_page(file_path, offset, limit)
+
+
+def read_ndjson_page(file_path: Path, offset: int, limit: int) -> tuple[List[dict], int]:
+    """Read a page of an NDJSON output through its row index (see read_output_page)"""
+    index = load_row_index(file_path)
+    if index is None:
+        with open_output_text(file_path) as f:
+            rows, row_count = [], 0
+            for row_count, line in enumerate(f, 1):
+                if offset < row_count <= offset + limit:
+                    rows.append(json.loads(line))
+            return rows, row_count
+    
+    stride, row_count, offsets = index
+    if offset >= row_count:
+        return [], row_count
+    
+    block = offset // stride
+    with open_output_text(file_path, offsets[block]) as f:
+        skip = offset - block * stride
+        return [json.loads(line) for line in islice(f, skip, skip + limit)], row_count
+
+
+def _arrow_batch_rows(reader) -> List[int]:
+    """Row counts of the record batches of an Arrow IPC file, reading as few batches as possible"""
+    batch_count = reader.num_record_batches
+    if not batch_count:
+        return []
+    batch_rows = (reader.schema.metadata or {}).get(ARROW_BATCH_ROWS_KEY)
+    if batch_rows is None:
+        # Written without the batch size: each batch is read for its row count
+        return [reader.get_batch(i).num_rows for i in range(batch_count)]
+    return [int(batch_rows)] * (batch_count - 1) + [reader.get_batch(batch_count - 1).num_rows]
+
+
+def _read_parts_page(
+    part_rows: List[int],
+    read_part: Callable[[int], Any],
+    offset: int,
+    limit: int
+) -> tuple[List[dict], int]:
+    """Page through a file stored as parts (row groups / record batches) of known row counts"""
+    rows = []
+    position = 0
+    for part, count in enumerate(part_rows):
+        if position + count > offset and len(rows) < limit:
+            skip = max(offset - position, 0)
+            rows.extend(read_part(part).slice(skip, limit - len(rows)).to_pylist())
+        position += count
+    return rows, position
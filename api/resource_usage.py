@@ -0,0 +1,43 @@
+"""Peak memory of the current process
+
+Workers run many tasks in one process, so the lifetime peak (ru_maxrss)
+says little about one task. On Linux the peak resident set size (VmHWM)
+can be reset, so a task resets it when it starts and reads it when it
+ends. Elsewhere the lifetime peak is reported instead.
+"""
+import resource
+import sys
+from typing import Optional
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+# Writing this to clear_refs resets VmHWM to the current RSS (Linux 4.0+)
+_RESET_PEAK_RSS = "5"
+
+
+def reset_peak_rss() -> bool:
+    """Start measuring the peak RSS from now; False if only the lifetime peak is available"""
+    try:
+        with open(_CLEAR_REFS, 'w') as f:
+            f.write(_RESET_PEAK_RSS)
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size since the last reset_peak_rss (or process start), in bytes"""
+    try:
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    try:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (OSError, ValueError):
+        return None
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -1,10 +1,16 @@
 """Authentication router"""
+import anyio
 from fastapi import APIRouter, Form, HTTPException
 from fastapi.responses import JSONResponse
+from config import AUTH_DB_THREADS
 from services.auth_service import AuthService
 
 router = APIRouter(prefix="/api", tags=["auth"])
 
+# Register/login hit SQLite, so they run off the event loop on their own
+# bounded share of worker threads
+auth_db_limiter = anyio.CapacityLimiter(AUTH_DB_THREADS)
+
 
 @router.post("/register/")
 async def register(
@@ -16,7 +22,10 @@ async def register(
     Register a new user
     """
     try:
-        result = AuthService.register_user(email, password, confirm_password)
+        result = await anyio.to_thread.run_sync(
+            AuthService.register_user, email, password, confirm_password,
+            limiter=auth_db_limiter
+        )
         return JSONResponse(status_code=200, content=result)
     except HTTPException:
         raise
@@ -36,7 +45,10 @@ async def login(
     Login user and get JWT token
     """
     try:
-        result = AuthService.login_user(email, password)
+        result = await anyio.to_thread.run_sync(
+            AuthService.login_user, email, password,
+            limiter=auth_db_limiter
+        )
         return JSONResponse(status_code=200, content=result)
     except HTTPException:
         raise
@@ -1,21 +1,148 @@
 """File download router"""
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
+import re
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from compression import compression_of, uncompressed_name, iter_decompressed
+from config import DOWNLOAD_CHUNK_SIZE
+from output_formats import media_type_of
 from services.file_service import FileService
+from services.retention_service import RetentionService
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api", tags=["files"])
 
+# Content-Encoding tokens accepted for each output compression
+ENCODING_ALIASES = {"gzip": {"gzip", "x-gzip"}, "zstd": {"zstd"}}
+
 
 @router.get("/processed/{filename}")
 async def download_file(
     filename: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Download processed file"""
+    """
+    Download processed file
+    
+    Compressed outputs (.gz/.zst) are sent as stored, with a Content-Encoding,
+    to clients that accept it, and decompressed on the fly for others.
+    Stored bytes are served with single-range support (Range / If-Range),
+    so downloads can be resumed or fetched in parallel.
+    """
     try:
         file_path = FileService.get_processed_file(filename)
-        return FileResponse(file_path, filename=filename)
+        await run_in_threadpool(RetentionService.touch, file_path)
+        compression = compression_of(file_path)
+        disposition = f'attachment; filename="{uncompressed_name(file_path)}"'
+        
+        if compression and not accepts_encoding(accept_encoding, compression):
+            return StreamingResponse(
+                iter_decompressed(file_path, DOWNLOAD_CHUNK_SIZE),
+                media_type=media_type_of(file_path),
+                headers={
+                    "Content-Disposition": disposition,
+                    "Accept-Ranges": "none",
+                    "Vary": "Accept-Encoding"
+                }
+            )
+        
+        stat = file_path.stat()
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        headers = {
+            "Content-Disposition": disposition,
+            "Accept-Ranges": "bytes",
+            "ETag": etag
+        }
+        if compression:
+            headers["Content-Encoding"] = compression
+            headers["Vary"] = "Accept-Encoding"
+        
+        byte_range = None
+        if range_header and (if_range is None or if_range.strip() == etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range == ():
+                return Response(
+                    status_code=416,
+                    headers={"Accept-Ranges": "bytes", "ETag": etag, "Content-Range": f"bytes */{size}"}
+                )
+        
+        start, stop = byte_range or (0, size)
+        headers["Content-Length"] = str(stop - start)
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        
+        return StreamingResponse(
+            FileService.iter_file_range(file_path, start, stop),
+            status_code=206 if byte_range else 200,
+            media_type=media_type_of(file_path),
+            headers=headers
+        )
     except HTTPException:
         raise
 
+
+def accepts_encoding(accept_encoding: Optional[str], compression: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows a compression's Content-Encoding
+    
+    An explicitly listed coding takes precedence over "*"; q=0 refuses it.
+    """
+    if not accept_encoding:
+        return False
+    
+    tokens = ENCODING_ALIASES[compression]
+    explicit, wildcard = None, None
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        q = re.search(r"q\s*=\s*([0-9.]+)", params)
+        try:
+            quality = float(q.group(1)) if q else 1.0
+        except ValueError:
+            quality = 0.0
+        if coding in tokens:
+            explicit = max(explicit or 0.0, quality)
+        elif coding == "*":
+            wildcard = quality
+    
+    quality = explicit if explicit is not None else wildcard
+    return bool(quality)
+
+
+def parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """
+    Resolve a single-range Range header against a file size
+    
+    Returns:
+        tuple: (start, stop) byte offsets to send, () if the range cannot be
+        satisfied, or None to ignore the header and send the whole file
+        (unsupported units, multiple ranges or malformed values)
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    match = re.fullmatch(r"\s*(\d*)\s*-\s*(\d*)\s*", spec)
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return ()
+        return max(size - length, 0), size
+    
+    start = int(first)
+    stop = size if last == "" else min(int(last) + 1, size)
+    if last != "" and int(last) < start:
+        return None
+    if start >= size:
+        return ()
+    return start, stop
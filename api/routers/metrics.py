@@ -0,0 +1,15 @@
+"""Metrics router"""
+from fastapi import APIRouter, Response
+import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics of this API process, or of all API and worker
+    processes when PROMETHEUS_MULTIPROC_DIR is set (see metrics.py)
+    """
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
@@ -1,10 +1,17 @@
 """Operations router"""
+import time
+from pathlib import Path
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from schemas import OperationRequest, OperationResponse
 from services.file_service import FileService
-from validators import validate_operation_request
-from tasks import process_csv_operation
+from services.cache_service import CacheService
+from services.scheduler_service import SchedulerService
+from services.retention_service import RetentionService
+from metrics import CACHE_HITS, CACHE_MISSES, count_failure
+from validators import validate_operation_request, validate_sheet, validate_columns
+from tasks import process_csv_operation, build_column_store
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api", tags=["operations"])
@@ -19,35 +26,134 @@ async def perform_operation(
     Perform operations on uploaded CSV/Excel file
     """
     try:
-        # Verify file exists
-        FileService.find_file_by_id(request.file_id)
+        # Verify file exists (through the file catalog); catalog, disk and
+        # column store lookups below run off the event loop
+        file_record = await run_in_threadpool(FileService.get_file_record, request.file_id)
+        file_path = await run_in_threadpool(FileService.find_file_by_id, request.file_id, file_record)
+        await run_in_threadpool(RetentionService.touch, file_path)
         
-        # Validate operation and requirements
+        steps = None
+        if request.steps is not None:
+            steps = [step.model_dump() for step in request.steps]
+        
+        # Validate operation (or pipeline steps) and requirements
         validate_operation_request(
             request.operation,
             request.column,
-            request.filter_conditions
+            request.filter_conditions,
+            request.engine,
+            request.seen_set,
+            steps,
+            request.compression,
+            request.output_format
+        )
+        
+        if request.sheet is not None:
+            await run_in_threadpool(validate_sheet, file_path, request.sheet, file_record)
+        elif file_record and file_record["headers"] is not None:
+            # Reject unknown columns now rather than in a worker after reading the file
+            validate_columns(
+                file_record["headers"],
+                request.operation,
+                request.column,
+                request.filter_conditions,
+                steps
+            )
+        
+        # Serve repeated operations on identical content from the cache
+        cache_key = None
+        content_hash = file_record["sha256"] if file_record else None
+        if content_hash:
+            cache_key = CacheService.build_cache_key(
+                content_hash,
+                request.operation,
+                request.column,
+                request.filter_conditions,
+                request.sheet,
+                steps,
+                request.compression,
+                request.output_format
+            )
+            cached = await run_in_threadpool(CacheService.get, cache_key)
+            (CACHE_HITS if cached else CACHE_MISSES).inc()
+            if cached:
+                await run_in_threadpool(RetentionService.touch, Path(cached["result"]["processed_file"]))
+                return JSONResponse(
+                    status_code=200,
+                    content={
+                        "message": "Operation result served from cache",
+                        "task_id": cached["task_id"],
+                        "cached": True,
+                        "file_link": f"/processed/{Path(cached['result']['processed_file']).name}",
+                        "result": {
+                            key: value for key, value in cached["result"].items() if key != "processed_file"
+                        }
+                    }
+                )
+        
+        # Create Celery task, in the lane (queue) and priority its estimated cost calls for
+        routing = await run_in_threadpool(
+            SchedulerService.route_operation,
+            file_path,
+            file_record,
+            request.operation,
+            steps,
+            request.engine,
+            request.sheet
+        )
+        task = process_csv_operation.apply_async(
+            kwargs={
+                "file_id": request.file_id,
+                "operation": request.operation,
+                "column": request.column,
+                "filter_conditions": request.filter_conditions,
+                "engine": request.engine,
+                "seen_set": request.seen_set,
+                "cache_key": cache_key,
+                "sheet": request.sheet,
+                "steps": steps,
+                "compression": request.compression,
+                "output_format": request.output_format,
+                "queued_at": time.time()
+            },
+            **routing
         )
         
-        # Create Celery task
-        task = process_csv_operation.delay(
-            file_id=request.file_id,
-            operation=request.operation,
-            column=request.column,
-            filter_conditions=request.filter_conditions
+        # Convert the upload into its column store the first time an operation
+        # would read from one; this operation parses the upload meanwhile
+        conversion_task_id = None
+        conversion = await run_in_threadpool(
+            SchedulerService.route_conversion,
+            file_path,
+            file_record,
+            request.operation,
+            steps,
+            request.engine,
+            request.sheet
         )
+        if conversion is not None and await run_in_threadpool(FileService.claim_column_store, request.file_id):
+            # Conversion only speeds up later operations; this one was queued either way
+            try:
+                conversion_task_id = build_column_store.apply_async((request.file_id,), **conversion).id
+            except Exception:
+                pass
         
         return JSONResponse(
             status_code=200,
             content={
                 "message": "Operation started",
-                "task_id": task.id
+                "task_id": task.id,
+                "queue": routing["queue"],
+                "conversion_task_id": conversion_task_id
             }
         )
     
-    except HTTPException:
+    except HTTPException as e:
+        if e.status_code >= 500:
+            count_failure("operation")
         raise
     except Exception as e:
+        count_failure("operation")
         raise HTTPException(
             status_code=500,
             detail=f"Operation failed: {str(e)}"
@@ -1,7 +1,10 @@
 """Task status router"""
-from fastapi import APIRouter, Query, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, Query, Header, HTTPException, Depends, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from services.task_service import TaskService
+from services.progress_service import ProgressService
 from schemas import TaskStatusResponse
 from dependencies import get_current_user
 
@@ -12,14 +15,22 @@ router = APIRouter(prefix="/api", tags=["tasks"])
 async def task_status(
     task_id: str = Query(..., description="Task ID to check status"),
     n: int = Query(100, ge=1, le=10000, description="Number of records to return"),
+    offset: int = Query(0, ge=0, description="Index of the first record to return"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Check task status and get results
+    
+    Responses carry an ETag; sending it back in If-None-Match returns 304
+    while the response would be unchanged.
     """
     try:
-        result = TaskService.get_task_status(task_id, n)
-        return JSONResponse(status_code=200, content=result)
+        # Backend lookups, result pages and recorded uses block: run them off the event loop
+        result, etag = await run_in_threadpool(TaskService.get_task_status_with_etag, task_id, n, offset)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(status_code=200, content=result, headers={"ETag": etag})
     
     except HTTPException:
         raise
@@ -29,3 +40,39 @@ async def task_status(
             detail=f"Failed to fetch task status: {str(e)}"
         )
 
+
+@router.get("/task-events/")
+async def task_events(
+    task_id: str = Query(..., description="Task ID to stream"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream task state changes as Server-Sent Events
+    
+    Each event's data is a JSON object with task_id and status, plus the
+    task's row-level progress (rows, bytes_read, percent, eta_seconds, ...)
+    while it runs, a result summary on success or the error on failure.
+    The stream ends with the final state; fetch the results page from
+    /api/task-status/ then instead of reconnecting. A task still PENDING
+    after TASK_EVENTS_PENDING_TIMEOUT seconds (an unknown id, or one queued
+    that long) ends the stream with status UNKNOWN.
+    """
+    return StreamingResponse(
+        ProgressService.stream_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
@@ -1,8 +1,13 @@
 """Upload file router"""
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+import time
+from typing import Optional
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Header, Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from metrics import count_failure, observe_upload
 from services.file_service import FileService
-from schemas import UploadResponse
+from services.upload_session_service import UploadSessionService
+from schemas import UploadResponse, UploadSessionRequest
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api", tags=["upload"])
@@ -16,19 +21,124 @@ async def upload_csv(
     """
     Upload a CSV or Excel file for processing
     """
+    started = time.perf_counter()
     try:
-        file_id, _ = await FileService.save_uploaded_file(file)
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "message": "File uploaded successfully",
-                "file_id": file_id
-            }
-        )
+        file_id, _, file_info = await FileService.save_uploaded_file(file, current_user["user_id"])
+        observe_upload("single", file_info["size"], time.perf_counter() - started)
+        return upload_response(file_id, file_info)
     
-    except HTTPException:
+    except HTTPException as e:
+        if e.status_code >= 500:
+            count_failure("upload")
         raise
     except Exception as e:
+        count_failure("upload")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+
+@router.post("/uploads/", status_code=201)
+async def create_upload_session(
+    request: UploadSessionRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Open a chunked upload session, for files over the single-request size
+    limit or uploads that must survive interruptions
+    
+    Chunks are then sent with PUT /api/uploads/{upload_id}/chunks/{index}
+    (any order, in parallel) and the upload is finished with
+    POST /api/uploads/{upload_id}/complete.
+    """
+    session = await run_in_threadpool(
+        UploadSessionService.create_session,
+        request.filename,
+        request.size,
+        current_user["user_id"],
+        request.chunk_size,
+        request.sha256
+    )
+    return UploadSessionService.get_status(session)
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the chunks received so far, to resume an interrupted upload
+    """
+    session = await run_in_threadpool(UploadSessionService.get_session, upload_id, current_user["user_id"])
+    return await run_in_threadpool(UploadSessionService.get_status, session)
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    upload_checksum: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upload one chunk (the raw request body) of a chunked upload
+    
+    An Upload-Checksum header ("sha256 <base64 digest>") has the chunk
+    verified before it is recorded. A chunk can be sent again to replace it.
+    """
+    session = await run_in_threadpool(UploadSessionService.get_session, upload_id, current_user["user_id"])
+    return await UploadSessionService.write_chunk(session, index, request.stream(), upload_checksum)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadResponse)
+async def complete_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Finish a chunked upload once every chunk has been received
+    
+    The file is validated and catalogued as by /api/upload-csv/, and
+    the response is the same.
+    """
+    started = time.perf_counter()
+    try:
+        session = await run_in_threadpool(UploadSessionService.get_session, upload_id, current_user["user_id"])
+        file_id, _, file_info = await UploadSessionService.complete_session(session, current_user["user_id"])
+        observe_upload("chunked", file_info["size"], time.perf_counter() - started)
+        return upload_response(file_id, file_info)
+    
+    except HTTPException as e:
+        if e.status_code >= 500:
+            count_failure("upload")
+        raise
+    except Exception as e:
+        count_failure("upload")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload_session(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Abandon a chunked upload and discard the chunks received
+    """
+    session = await run_in_threadpool(UploadSessionService.get_session, upload_id, current_user["user_id"])
+    await run_in_threadpool(UploadSessionService.abort_session, session)
+
+
+def upload_response(file_id: str, file_info: dict) -> JSONResponse:
+    """Describe a new upload"""
+    return JSONResponse(
+        status_code=200,
+        content={
+            "message": "File uploaded successfully",
+            "file_id": file_id,
+            "size": file_info["size"],
+            "sha256": file_info["sha256"],
+            "line_count": file_info["line_count"],
+            "inferred_schema": file_info["inferred_schema"]
+        }
+    )
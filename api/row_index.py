@@ -0,0 +1,123 @@
+"""Sparse row -> byte offset index for processed CSV files
+
+Next to each processed file, <file>.idx records the byte offset of every
+stride-th data row. A page of rows is read by seeking to the closest indexed
+row at or before it and skipping at most stride - 1 rows, so the cost is
+proportional to the page rather than to its position in the file.
+
+Index layout: int64 values [stride, row_count, offset_0, offset_stride, ...]
+
+For compressed outputs (see compression.py) the offsets are those of the
+member each block of stride rows was compressed into.
+"""
+import csv
+import os
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import List, Iterable, Optional
+
+from compression import compression_of, open_output_text
+
+ROW_INDEX_STRIDE = 1024
+
+
+def row_index_path(file_path: Path) -> Path:
+    """Sidecar index file of a processed CSV file"""
+    return file_path.with_name(f"{file_path.name}.idx")
+
+
+def write_row_index(file_path: Path, stride: int, row_count: int, offsets: Iterable[int]) -> None:
+    """Atomically write the index of file_path"""
+    index = array('q', [stride, row_count])
+    index.extend(offsets)
+    
+    path = row_index_path(file_path)
+    temp_path = path.with_name(f".{path.name}.part")
+    with open(temp_path, 'wb') as f:
+        index.tofile(f)
+    os.replace(temp_path, path)
+
+
+def load_row_index(file_path: Path) -> Optional[tuple[int, int, array]]:
+    """
+    Read the index of file_path
+    
+    Returns:
+        tuple: (stride, row_count, offsets), or None if there is no index
+    """
+    try:
+        data = row_index_path(file_path).read_bytes()
+    except FileNotFoundError:
+        return None
+    
+    index = array('q')
+    index.frombytes(data)
+    return index[0], index[1], index[2:]
+
+
+def build_row_index(file_path: Path, stride: int = ROW_INDEX_STRIDE) -> tuple[int, int, array]:
+    """
+    Index an existing uncompressed CSV file by scanning it once
+    
+    Records end at a newline preceded by an even number of quote characters,
+    which holds for everything csv.writer produces (quoted fields with
+    embedded newlines included). The header row is not indexed.
+    """
+    offsets = array('q')
+    row_count = -1  # the first record is the header
+    position = 0
+    record_start = 0
+    quotes = 0
+    
+    with open(file_path, 'rb') as f:
+        for line in f:
+            quotes += line.count(b'"')
+            position += len(line)
+            if quotes % 2:
+                continue
+            if row_count >= 0 and row_count % stride == 0:
+                offsets.append(record_start)
+            row_count += 1
+            record_start = position
+            quotes = 0
+    
+    row_count = max(row_count, 0)
+    write_row_index(file_path, stride, row_count, offsets)
+    return stride, row_count, offsets
+
+
+def read_row_page(file_path: Path, offset: int, limit: int) -> tuple[List[dict], int]:
+    """
+    Read up to limit data rows starting at row offset, as csv.DictReader dicts
+    
+    A missing index of an uncompressed file is built on first use; a
+    compressed file without one is read from the start.
+    
+    Returns:
+        tuple: (rows, row_count) where row_count is the total number of data
+        rows in the file
+    """
+    index = load_row_index(file_path)
+    if index is None and not compression_of(file_path):
+        index = build_row_index(file_path)
+    
+    with open_output_text(file_path) as f:
+        headers = next(csv.reader(f), [])
+        if index is None:
+            rows, row_count = [], 0
+            for row_count, row in enumerate(csv.DictReader(f, fieldnames=headers), 1):
+                if offset < row_count <= offset + limit:
+                    rows.append(row)
+            return rows, row_count
+    
+    stride, row_count, offsets = index
+    if offset >= row_count:
+        return [], row_count
+    
+    block = offset // stride
+    with open_output_text(file_path, offsets[block]) as f:
+        reader = csv.DictReader(f, fieldnames=headers)
+        for _ in range(offset - block * stride):
+            next(reader.reader)
+        return list(islice(reader, limit)), row_count
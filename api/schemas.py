@@ -3,24 +3,55 @@ from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
 
 
+class PipelineStep(BaseModel):
+    """One step of a multi-step operation pipeline"""
+    operation: str
+    column: Optional[str] = None
+    filter_conditions: Optional[Dict] = None
+    seen_set: Optional[str] = None
+
+
 class OperationRequest(BaseModel):
     """Request schema for performing operations on uploaded files"""
     file_id: str
-    operation: str
+    operation: Optional[str] = None
     column: Optional[str] = None
     filter_conditions: Optional[Dict] = None
+    engine: Optional[str] = None  # "auto" | "row" | "columnar"
+    seen_set: Optional[str] = None  # "exact" | "fingerprint" | "fingerprint_verify"
+    sheet: Optional[str] = None  # Excel worksheet name
+    steps: Optional[List[PipelineStep]] = None  # pipeline, instead of operation
+    compression: Optional[str] = None  # "gzip" | "zstd" processed output
+    output_format: Optional[str] = None  # "csv" | "ndjson" | "parquet" | "arrow"
 
 
 class UploadResponse(BaseModel):
     """Response schema for file upload"""
     message: str
     file_id: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    line_count: Optional[int] = None
+    inferred_schema: Optional[dict] = None  # encoding/delimiter (CSV), header guess, column types
+
+
+class UploadSessionRequest(BaseModel):
+    """Request schema for opening a chunked upload session"""
+    filename: str
+    size: int  # bytes
+    chunk_size: Optional[int] = None  # bytes per chunk, UPLOAD_SESSION_CHUNK_SIZE by default
+    sha256: Optional[str] = None  # hex digest of the whole file, checked on completion
 
 
 class OperationResponse(BaseModel):
     """Response schema for operation initiation"""
     message: str
     task_id: str
+    cached: Optional[bool] = None
+    file_link: Optional[str] = None
+    result: Optional[dict] = None
+    queue: Optional[str] = None
+    conversion_task_id: Optional[str] = None  # column store conversion queued by this request
 
 
 class TaskStatusResponse(BaseModel):
@@ -28,5 +59,6 @@ class TaskStatusResponse(BaseModel):
     task_id: str
     status: str
     result: Optional[Dict[str, Any]] = None
+    progress: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
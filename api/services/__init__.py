@@ -1,6 +1,11 @@
 """Services package"""
 from .file_service import FileService
 from .task_service import TaskService
+from .cache_service import CacheService
+from .progress_service import ProgressService
+from .upload_session_service import UploadSessionService
+from .scheduler_service import SchedulerService
+from .retention_service import RetentionService
 
-__all__ = ["FileService", "TaskService"]
+__all__ = ["FileService", "TaskService", "CacheService", "ProgressService", "UploadSessionService", "SchedulerService", "RetentionService"]
 
@@ -1,9 +1,14 @@
 """Authentication service"""
 import hashlib
 import sqlite3
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import HTTPException
+from config import TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_TTL
 from database import get_db
 
 # JWT Configuration
@@ -12,6 +17,59 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
+class _VerifiedTokenCache:
+    """
+    Thread-safe LRU of verified token payloads, keyed by the token's digest
+    
+    An entry is only served until the token's exp (and at most max_ttl
+    seconds after it was verified); after that the token is decoded again,
+    so expiry is reported exactly as without the cache.
+    """
+    
+    def __init__(self, max_size: int, max_ttl: float):
+        self._max_size = max_size
+        self._max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, token: str, payload: dict) -> None:
+        key = self._key(token)
+        expires_at = time.time() + self._max_ttl
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_verified_tokens = _VerifiedTokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_TTL)
+
+
 class AuthService:
     """Service for handling authentication operations"""
     
@@ -38,15 +96,30 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str) -> dict:
-        """Verify JWT token and return payload"""
+        """
+        Verify JWT token and return payload
+        
+        Verified payloads are cached until the token expires, so repeated
+        requests with the same token (e.g. status polling) skip the decode.
+        Invalid and expired tokens are never cached.
+        """
+        payload = _verified_tokens.get(token)
+        if payload is not None:
+            return dict(payload)
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
+            _verified_tokens.put(token, payload)
+            return dict(payload)
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token has expired")
         except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail="Invalid token")
     
+    @staticmethod
+    def token_cache_stats() -> dict:
+        """Hit/miss counters and size of the verified-token cache"""
+        return _verified_tokens.stats()
+    
     @staticmethod
     def register_user(email: str, password: str, confirm_password: str) -> dict:
         """Register a new user"""
@@ -0,0 +1,192 @@
+"""Content-addressed result cache service"""
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+from config import RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_ENTRIES
+from database import get_db
+from row_index import row_index_path
+
+
+class CacheService:
+    """Service for caching processed results by input content and operation"""
+    
+    @staticmethod
+    def build_cache_key(
+        content_hash: str,
+        operation: str,
+        column: Optional[str] = None,
+        filter_conditions: Optional[dict] = None,
+        sheet: Optional[str] = None,
+        steps: Optional[list] = None,
+        compression: Optional[str] = None,
+        output_format: Optional[str] = None
+    ) -> str:
+        """
+        Build a cache key from the input content hash and normalized parameters
+        
+        Only the parameters that affect the output of the operation (or of
+        each pipeline step, in order) are included, and filter conditions are
+        normalized so that key order and an omitted "eq" operator do not
+        produce distinct keys.
+        """
+        if steps is not None:
+            params = {
+                "content": content_hash,
+                "steps": [
+                    CacheService._operation_params(
+                        step["operation"], step.get("column"), step.get("filter_conditions")
+                    )
+                    for step in steps
+                ]
+            }
+        else:
+            params = {
+                "content": content_hash,
+                **CacheService._operation_params(operation, column, filter_conditions)
+            }
+        
+        if sheet is not None:
+            params["sheet"] = sheet
+        if compression is not None:
+            params["compression"] = compression
+        if output_format not in (None, "csv"):
+            params["output_format"] = output_format
+        
+        encoded = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+    
+    @staticmethod
+    def _operation_params(operation: str, column: Optional[str], filter_conditions: Optional[dict]) -> dict:
+        """Output-affecting parameters of one operation"""
+        params = {"operation": operation}
+        
+        if operation == "unique":
+            params["column"] = column
+        
+        if operation == "filter":
+            params["filter_conditions"] = {
+                name: {
+                    "operator": condition.get("operator", "eq"),
+                    "value": condition.get("value")
+                } if isinstance(condition, dict) else condition
+                for name, condition in (filter_conditions or {}).items()
+            }
+        
+        return params
+    
+    @staticmethod
+    def get(cache_key: str) -> Optional[dict]:
+        """
+        Look up a cached result and mark it as recently used
+        
+        Returns:
+            dict: task_id and result of the cached operation, or None on a
+            miss (including entries whose processed file has disappeared)
+        """
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT task_id, processed_file, result FROM result_cache WHERE cache_key = ?",
+                (cache_key,)
+            )
+            entry = cursor.fetchone()
+            
+            if not entry:
+                return None
+            
+            if not Path(entry["processed_file"]).exists():
+                cursor.execute("DELETE FROM result_cache WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                return None
+            
+            cursor.execute(
+                "UPDATE result_cache SET last_used_at = ? WHERE cache_key = ?",
+                (time.time(), cache_key)
+            )
+            conn.commit()
+        
+        return {
+            "task_id": entry["task_id"],
+            "result": json.loads(entry["result"])
+        }
+    
+    @staticmethod
+    def get_by_task_id(task_id: str) -> Optional[dict]:
+        """
+        Look up the cached result stored by a task
+        
+        Cache entries outlive task results in the Celery backend (see
+        TASK_RESULT_EXPIRES), so the task ids returned for cache hits are
+        resolved through here once the backend has forgotten them.
+        
+        Returns:
+            dict: the task's result, or None if no entry with an existing
+            processed file was stored by it
+        """
+        with get_db() as conn:
+            entry = conn.execute(
+                "SELECT processed_file, result FROM result_cache WHERE task_id = ? LIMIT 1",
+                (task_id,)
+            ).fetchone()
+        
+        if not entry or not Path(entry["processed_file"]).exists():
+            return None
+        return json.loads(entry["result"])
+    
+    @staticmethod
+    def put(cache_key: str, task_id: str, result: dict) -> None:
+        """Store a completed result, then evict least recently used entries"""
+        processed_file = Path(result["processed_file"])
+        
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO result_cache
+                    (cache_key, task_id, processed_file, result, size, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    cache_key,
+                    task_id,
+                    str(processed_file),
+                    json.dumps(result),
+                    processed_file.stat().st_size,
+                    time.time()
+                )
+            )
+            conn.commit()
+            CacheService._evict(conn, keep=cache_key)
+    
+    @staticmethod
+    def _evict(conn, keep: str) -> None:
+        """Drop least recently used entries (and their files) beyond the bounds, except keep"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache")
+        entries, total_size = cursor.fetchone()
+        
+        if entries <= RESULT_CACHE_MAX_ENTRIES and total_size <= RESULT_CACHE_MAX_BYTES:
+            return
+        
+        cursor.execute(
+            "SELECT cache_key, processed_file, size FROM result_cache ORDER BY last_used_at"
+        )
+        evicted = []
+        for entry in cursor.fetchall():
+            if entries <= RESULT_CACHE_MAX_ENTRIES and total_size <= RESULT_CACHE_MAX_BYTES:
+                break
+            if entry["cache_key"] == keep:
+                continue
+            evicted.append(entry["cache_key"])
+            Path(entry["processed_file"]).unlink(missing_ok=True)
+            row_index_path(Path(entry["processed_file"])).unlink(missing_ok=True)
+            entries -= 1
+            total_size -= entry["size"]
+        
+        cursor.executemany(
+            "DELETE FROM result_cache WHERE cache_key = ?",
+            [(cache_key,) for cache_key in evicted]
+        )
+        conn.commit()
@@ -1,8 +1,22 @@
 """File handling service"""
+import hashlib
+import json
+import os
+import time
 import uuid
 from pathlib import Path
 from fastapi import HTTPException, UploadFile
-from config import UPLOAD_DIR, PROCESSED_DIR, ALLOWED_EXTENSIONS
+from starlette.concurrency import run_in_threadpool
+from typing import Iterator, Optional
+from config import (
+    UPLOAD_DIR,
+    PROCESSED_DIR,
+    ALLOWED_EXTENSIONS,
+    UPLOAD_CHUNK_SIZE,
+    DOWNLOAD_CHUNK_SIZE,
+    COLUMN_STORE_RETRY_AFTER
+)
+from database import get_db
 from validators import (
     validate_file, 
     validate_file_size, 
@@ -15,12 +29,16 @@ class FileService:
     """Service for handling file operations"""
     
     @staticmethod
-    async def save_uploaded_file(file: UploadFile) -> tuple[str, Path]:
+    async def save_uploaded_file(file: UploadFile, owner_id: Optional[str] = None) -> tuple[str, Path, dict]:
         """
-        Save uploaded file and return file_id and file_path
+        Save uploaded file, record it in the file catalog and return file_id, file_path and upload info
+        
+        Content validation and sniffing run on a worker thread, so parsing
+        a workbook does not hold up other requests.
         
         Returns:
-            tuple: (file_id, file_path)
+            tuple: (file_id, file_path, file_info) where file_info holds
+            the size, sha256, line_count and inferred_schema of the stored file
         """
         # Validate file extension
         file_ext = validate_file(file)
@@ -29,42 +47,223 @@ class FileService:
         file_id = str(uuid.uuid4())
         file_path = UPLOAD_DIR / f"{file_id}{file_ext}"
         
-        # Read and validate file size
-        content = await file.read()
-        validate_file_size(content)
+        # Stream to disk, enforcing the size limit as bytes arrive
+        file_info = await FileService.stream_to_disk(file, file_path)
+        
+        await FileService.register_upload(file_id, file_path, file_info, owner_id)
+        return file_id, file_path, file_info
+    
+    @staticmethod
+    async def register_upload(
+        file_id: str,
+        file_path: Path,
+        file_info: dict,
+        owner_id: Optional[str] = None
+    ) -> None:
+        """
+        Validate a stored upload and add it to the file catalog
         
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(content)
+        Validation and sniffing run on a worker thread; the inferred schema
+        is added to file_info. An invalid file is removed.
         
-        # Validate content
+        Raises:
+            HTTPException: If the content cannot be read
+        """
+        try:
+            file_info["inferred_schema"] = await run_in_threadpool(
+                FileService.inspect_content, file_path, file_path.suffix
+            )
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+        
+        await run_in_threadpool(FileService.record_file_info, file_id, file_path, file_info, owner_id)
+    
+    @staticmethod
+    def inspect_content(file_path: Path, file_ext: str) -> dict:
+        """
+        Validate a stored upload and sniff it (see sniffing.py)
+        
+        Returns:
+            dict: the inferred schema; for CSV files it includes the
+            encoding and delimiter operations read the file with
+            
+        Raises:
+            HTTPException: If the content cannot be read
+        """
         if file_ext == '.csv':
-            validate_csv_content(file_path)
-        else:
-            validate_excel_content(file_path)
+            return validate_csv_content(file_path)
+        return validate_excel_content(file_path)
+    
+    @staticmethod
+    def record_file_info(
+        file_id: str,
+        file_path: Path,
+        file_info: dict,
+        owner_id: Optional[str] = None
+    ) -> None:
+        """Add an uploaded file to the file catalog (the files table)"""
+        inferred_schema = file_info.get("inferred_schema")
+        headers = [column["name"] for column in inferred_schema["columns"]] if inferred_schema else None
+        with get_db() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO files
+                    (file_id, sha256, size, inferred_schema, path, ext, line_count, headers, owner_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    file_id,
+                    file_info["sha256"],
+                    file_info["size"],
+                    json.dumps(inferred_schema) if inferred_schema is not None else None,
+                    str(file_path),
+                    file_path.suffix,
+                    file_info.get("line_count"),
+                    json.dumps(headers) if headers is not None else None,
+                    owner_id
+                )
+            )
+            conn.commit()
+    
+    @staticmethod
+    def claim_column_store(file_id: str) -> bool:
+        """
+        Record that the conversion of a catalogued file into its column store is being queued
         
-        return file_id, file_path
+        Returns:
+            bool: False if one was already queued within COLUMN_STORE_RETRY_AFTER
+            (or the file is not catalogued), so it is not queued twice
+        """
+        now = time.time()
+        with get_db() as conn:
+            claimed = conn.execute(
+                """
+                UPDATE files SET column_store_requested_at = ?
+                WHERE file_id = ? AND (column_store_requested_at IS NULL OR column_store_requested_at < ?)
+                """,
+                (now, file_id, now - COLUMN_STORE_RETRY_AFTER)
+            ).rowcount
+            conn.commit()
+        return claimed == 1
+    
+    @staticmethod
+    def record_row_count(file_id: str, row_count: int) -> None:
+        """Record the exact number of data rows of a catalogued file"""
+        with get_db() as conn:
+            conn.execute("UPDATE files SET row_count = ? WHERE file_id = ?", (row_count, file_id))
+            conn.commit()
     
     @staticmethod
-    def find_file_by_id(file_id: str) -> Path:
+    def get_file_record(file_id: str) -> Optional[dict]:
         """
-        Find uploaded file by file_id with any allowed extension
+        Get the catalog entry of an uploaded file
         
         Returns:
-            Path: Path to the file
+            dict: file_id, sha256, size, path, ext, line_count, row_count,
+            headers, inferred_schema and owner_id (JSON columns decoded;
+            fields recorded after a file was uploaded are None), or None
+            if the file is not catalogued
+        """
+        with get_db() as conn:
+            row = conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        for name in ("headers", "inferred_schema"):
+            if record[name] is not None:
+                record[name] = json.loads(record[name])
+        return record
+    
+    @staticmethod
+    async def stream_to_disk(file: UploadFile, file_path: Path) -> dict:
+        """
+        Copy an upload to file_path in UPLOAD_CHUNK_SIZE chunks
+        
+        Chunks are written to a temporary file next to file_path and
+        hashed/counted in the same pass. The upload is aborted as soon as
+        MAX_FILE_SIZE is crossed; otherwise the temporary file is
+        atomically renamed into place.
+        
+        Returns:
+            dict: size (bytes), sha256 (hex digest) and line_count
             
         Raises:
-            HTTPException: If file not found
+            HTTPException: If the upload exceeds MAX_FILE_SIZE
         """
+        tmp_path = file_path.with_name(f".{file_path.name}.part")
+        hasher = hashlib.sha256()
+        size = 0
+        line_count = 0
+        last_byte = b""
+        
+        out = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                validate_file_size(size)
+                line_count += await run_in_threadpool(_write_chunk, out, hasher, chunk)
+                last_byte = chunk[-1:]
+            await run_in_threadpool(out.close)
+        except BaseException:
+            await run_in_threadpool(out.close)
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        # Count a trailing line that has no terminating newline
+        if last_byte and last_byte != b"\n":
+            line_count += 1
+        
+        os.replace(tmp_path, file_path)
+        
+        return {
+            "size": size,
+            "sha256": hasher.hexdigest(),
+            "line_count": line_count
+        }
+    
+    @staticmethod
+    def locate_file(file_id: str, record: Optional[dict] = None) -> Optional[Path]:
+        """
+        Path of an uploaded file, or None if there is none
+        
+        Catalogued files are found through their recorded path (record, if
+        already fetched, saves the lookup); files uploaded before paths were
+        recorded are found by trying each allowed extension.
+        """
+        if record is None:
+            record = FileService.get_file_record(file_id)
+        if record is not None and record["path"]:
+            path = Path(record["path"])
+            return path if path.exists() else None
+        
         for ext in ALLOWED_EXTENSIONS:
             potential_path = UPLOAD_DIR / f"{file_id}{ext}"
             if potential_path.exists():
                 return potential_path
+        return None
+    
+    @staticmethod
+    def find_file_by_id(file_id: str, record: Optional[dict] = None) -> Path:
+        """
+        Find uploaded file by file_id (see locate_file)
         
-        raise HTTPException(
-            status_code=404,
-            detail="File not found"
-        )
+        Returns:
+            Path: Path to the file
+            
+        Raises:
+            HTTPException: If file not found
+        """
+        file_path = FileService.locate_file(file_id, record)
+        if file_path is None:
+            raise HTTPException(
+                status_code=404,
+                detail="File not found"
+            )
+        return file_path
     
     @staticmethod
     def get_processed_file(filename: str) -> Path:
@@ -81,4 +280,24 @@ class FileService:
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
         return file_path
+    
+    @staticmethod
+    def iter_file_range(file_path: Path, start: int, stop: int) -> Iterator[bytes]:
+        """Yield the bytes of file_path in [start, stop) in DOWNLOAD_CHUNK_SIZE chunks"""
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
 
+def _write_chunk(out, hasher, chunk: bytes) -> int:
+    """Write and hash one chunk, returning the number of newlines in it"""
+    out.write(chunk)
+    hasher.update(chunk)
+    return chunk.count(b"\n")
@@ -0,0 +1,128 @@
+"""Task progress streaming service"""
+import asyncio
+import json
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+from celery import states
+from starlette.concurrency import run_in_threadpool
+from config import TASK_EVENTS_POLL_INTERVAL, TASK_EVENTS_KEEPALIVE, TASK_EVENTS_PENDING_TIMEOUT
+from services.task_service import TaskService
+
+# Final status of streams of tasks still PENDING after TASK_EVENTS_PENDING_TIMEOUT
+UNKNOWN = "UNKNOWN"
+FINAL_STATES = states.READY_STATES | {UNKNOWN}
+
+
+class _TaskWatch:
+    """Latest event of one task, shared by every client streaming it"""
+    
+    def __init__(self):
+        self.event: Optional[dict] = None
+        self.version = 0
+        self.changed = asyncio.Event()
+        self.clients = 0
+        self.poller: Optional[asyncio.Task] = None
+    
+    def publish(self, event: dict) -> None:
+        self.event = event
+        self.version += 1
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+# Watched tasks by id; each is polled by a single coroutine no matter how
+# many clients are streaming it, so waiting clients cost no backend lookups
+_watches: Dict[str, _TaskWatch] = {}
+
+
+class ProgressService:
+    """Service for pushing task state changes to clients"""
+    
+    @staticmethod
+    def get_task_event(task_id: str) -> dict:
+        """
+        Current state of a task as an event payload
+        
+        Returns:
+            dict: task_id and status, plus progress while the task runs, a
+            result summary once it succeeded or the error once it failed
+        """
+        state, info = TaskService.resolve_state(task_id)
+        event = {"task_id": task_id, "status": state}
+        
+        if state == states.SUCCESS:
+            event["result"] = {
+                "operation": info.get("operation"),
+                "original_rows": info.get("original_rows"),
+                "processed_rows": info.get("processed_rows"),
+                "file_link": f"/processed/{Path(info.get('processed_file')).name}",
+                "timings": info.get("timings")
+            }
+        elif state == states.FAILURE:
+            event["error"] = info
+        elif info:
+            event["progress"] = info
+        
+        return event
+    
+    @staticmethod
+    async def stream_events(task_id: str) -> AsyncIterator[str]:
+        """
+        Yield a Server-Sent Event for every state change of a task
+        
+        The current state is sent first. The stream ends after the task
+        finishes, or with an UNKNOWN event if it is still PENDING (queued,
+        or an id the backend does not know) after TASK_EVENTS_PENDING_TIMEOUT
+        seconds; a keep-alive comment is sent after TASK_EVENTS_KEEPALIVE
+        seconds without changes.
+        """
+        watch = _watches.get(task_id)
+        if watch is None:
+            watch = _watches[task_id] = _TaskWatch()
+            watch.poller = asyncio.create_task(ProgressService._poll(task_id, watch))
+        watch.clients += 1
+        
+        try:
+            version = 0
+            while True:
+                if watch.version == version:
+                    try:
+                        await asyncio.wait_for(watch.changed.wait(), TASK_EVENTS_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                    continue
+                
+                version = watch.version
+                yield f"id: {version}\ndata: {json.dumps(watch.event)}\n\n"
+                if watch.event["status"] in FINAL_STATES:
+                    return
+        
+        finally:
+            watch.clients -= 1
+            if not watch.clients:
+                watch.poller.cancel()
+                if _watches.get(task_id) is watch:
+                    del _watches[task_id]
+    
+    @staticmethod
+    async def _poll(task_id: str, watch: _TaskWatch) -> None:
+        """Publish the task's event whenever it changes, until it finishes or stays PENDING too long"""
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + TASK_EVENTS_PENDING_TIMEOUT
+        while True:
+            try:
+                event = await run_in_threadpool(ProgressService.get_task_event, task_id)
+            except Exception:
+                # Result backend unavailable; keep clients waiting and retry
+                event = watch.event
+            
+            if event is not None and event != watch.event:
+                watch.publish(event)
+                if event["status"] in states.READY_STATES:
+                    return
+            
+            if watch.event is not None and watch.event["status"] == states.PENDING and loop.time() >= give_up_at:
+                watch.publish({"task_id": task_id, "status": UNKNOWN})
+                return
+            
+            await asyncio.sleep(TASK_EVENTS_POLL_INTERVAL)
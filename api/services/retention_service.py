@@ -0,0 +1,259 @@
+"""Retention of uploads and processed outputs
+
+UPLOAD_DIR and PROCESSED_DIR are bounded by a periodic sweep (the
+enforce_retention task, scheduled by celery beat):
+
+    1. expired upload sessions are closed (UploadSessionService.expire_sessions)
+    2. abandoned temporary files (hidden .part files, column store work
+       directories, chunk part files) older than RETENTION_STALE_TEMP_AGE
+       are removed, as are sidecars whose file is gone
+    3. files unused for RETENTION_TTL are evicted
+    4. while both directories together use more than RETENTION_MAX_BYTES of
+       disk, the least recently used files are evicted, down to
+       RETENTION_LOW_WATERMARK of it
+
+Disk use is measured in allocated blocks: the sparse part files of open
+upload sessions count for the chunks received so far, not for the size
+they reserve (which is bounded per user, see upload_session_service.py).
+
+A file's last use is the latest of its modification time (upload or
+output written) and the uses recorded with touch: operations requested on
+an upload, cache hits, result previews and downloads of an output. Files
+used within RETENTION_MIN_AGE are never evicted, since queued or running
+tasks may still read them.
+
+An upload is evicted with its column store and its files catalog entry; an
+output with its row index and the result cache entries serving it.
+"""
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import (
+    UPLOAD_DIR,
+    PROCESSED_DIR,
+    RETENTION_MAX_BYTES,
+    RETENTION_LOW_WATERMARK,
+    RETENTION_TTL,
+    RETENTION_MIN_AGE,
+    RETENTION_STALE_TEMP_AGE,
+    RETENTION_TOUCH_INTERVAL
+)
+from database import get_db
+from services.upload_session_service import UploadSessionService
+
+# Suffixes of files stored beside an upload or output (see column_store.py
+# and row_index.py), evicted with it
+SIDECAR_SUFFIXES = (".columns", ".idx")
+# Hidden part files of open upload sessions, removed by expire_sessions
+SESSION_PART_SUFFIX = ".upload"
+
+# Recorded uses are throttled per path; the map is reset when it grows past this
+_TOUCH_CACHE_SIZE = 10000
+_last_touched: Dict[str, float] = {}
+_touch_lock = threading.Lock()
+
+
+class RetentionService:
+    """Service for tracking file use and evicting unused files"""
+    
+    @staticmethod
+    def touch(file_path: Path) -> None:
+        """Record a use of an upload or output (at most once per RETENTION_TOUCH_INTERVAL)"""
+        key = str(file_path)
+        now = time.time()
+        with _touch_lock:
+            if now - _last_touched.get(key, 0) < RETENTION_TOUCH_INTERVAL:
+                return
+            if len(_last_touched) >= _TOUCH_CACHE_SIZE:
+                _last_touched.clear()
+            _last_touched[key] = now
+        
+        with get_db() as conn:
+            conn.execute(
+                """
+                INSERT INTO file_access (path, last_accessed_at) VALUES (?, ?)
+                ON CONFLICT (path) DO UPDATE SET last_accessed_at = MAX(last_accessed_at, excluded.last_accessed_at)
+                """,
+                (key, now)
+            )
+            conn.commit()
+    
+    @staticmethod
+    def enforce(now: Optional[float] = None) -> dict:
+        """
+        Run one retention sweep
+        
+        Returns:
+            dict: reclaimed_bytes, evicted_uploads, evicted_outputs,
+            removed_temp_files, expired_sessions, forgotten_files (catalog
+            entries of missing uploads) and total_bytes (left)
+        """
+        now = time.time() if now is None else now
+        report = {
+            "reclaimed_bytes": 0,
+            "evicted_uploads": 0,
+            "evicted_outputs": 0,
+            "removed_temp_files": 0,
+            "expired_sessions": UploadSessionService.expire_sessions(),
+        }
+        
+        with get_db() as conn:
+            accessed = {
+                row["path"]: row["last_accessed_at"]
+                for row in conn.execute("SELECT path, last_accessed_at FROM file_access")
+            }
+        
+        units, total_bytes = [], 0
+        for directory in (UPLOAD_DIR, PROCESSED_DIR):
+            directory_units, directory_bytes, reclaimed, removed = _scan(directory, accessed, now)
+            units.extend(directory_units)
+            total_bytes += directory_bytes - reclaimed
+            report["reclaimed_bytes"] += reclaimed
+            report["removed_temp_files"] += removed
+        
+        # Forget files that are gone (e.g. evicted from the result cache or
+        # removed by hand): their recorded uses, and catalog entries old
+        # enough not to belong to an upload being stored
+        present = {unit["path"] for unit in units}
+        present_file_ids = {Path(unit["path"]).stem for unit in units if unit["upload"]}
+        gone = [path for path in accessed if path not in present]
+        with get_db() as conn:
+            conn.executemany("DELETE FROM file_access WHERE path = ?", [(path,) for path in gone])
+            missing = [
+                row["file_id"]
+                for row in conn.execute(
+                    "SELECT file_id, path FROM files WHERE created_at < datetime(?, 'unixepoch')",
+                    (now - RETENTION_MIN_AGE,)
+                )
+                if (row["path"] not in present if row["path"] else row["file_id"] not in present_file_ids)
+            ]
+            conn.executemany("DELETE FROM files WHERE file_id = ?", [(file_id,) for file_id in missing])
+            conn.commit()
+        report["forgotten_files"] = len(missing)
+        
+        evictable = sorted(
+            (unit for unit in units if unit["last_used"] < now - RETENTION_MIN_AGE),
+            key=lambda unit: unit["last_used"]
+        )
+        target_bytes = RETENTION_MAX_BYTES * RETENTION_LOW_WATERMARK
+        over_quota = total_bytes > RETENTION_MAX_BYTES
+        for unit in evictable:
+            expired = unit["last_used"] < now - RETENTION_TTL
+            if not expired and not (over_quota and total_bytes > target_bytes):
+                break
+            _evict(unit)
+            total_bytes -= unit["size"]
+            report["reclaimed_bytes"] += unit["size"]
+            report["evicted_uploads" if unit["upload"] else "evicted_outputs"] += 1
+        
+        report["total_bytes"] = total_bytes
+        return report
+
+
+def _scan(directory: Path, accessed: Dict[str, float], now: float) -> tuple[List[dict], int, int, int]:
+    """
+    Group the entries of directory into eviction units, removing stale
+    temporary files and orphaned sidecars on the way
+    
+    Returns:
+        tuple: (units, bytes found, bytes removed, entries removed); a unit
+        is a file with its sidecars: path, paths, size, last_used, upload
+    """
+    units: Dict[str, dict] = {}
+    sidecars: Dict[str, List[tuple]] = {}
+    found = removed_bytes = removed = 0
+    
+    for entry in os.scandir(directory):
+        try:
+            size = _disk_usage(entry)
+            mtime = entry.stat(follow_symlinks=False).st_mtime
+        except OSError:
+            continue
+        found += size
+        path = directory / entry.name
+        
+        if entry.name.startswith("."):
+            if entry.name.endswith(SESSION_PART_SUFFIX) or mtime > now - RETENTION_STALE_TEMP_AGE:
+                continue
+            _remove(path)
+            removed_bytes += size
+            removed += 1
+        elif entry.name.endswith(SIDECAR_SUFFIXES):
+            owner = str(path.with_suffix(""))
+            sidecars.setdefault(owner, []).append((path, size, mtime))
+        else:
+            units[str(path)] = {
+                "path": str(path),
+                "paths": [path],
+                "size": size,
+                "last_used": max(mtime, accessed.get(str(path), 0)),
+                "upload": directory == UPLOAD_DIR
+            }
+    
+    for owner, entries in sidecars.items():
+        unit = units.get(owner)
+        for path, size, mtime in entries:
+            if unit is not None:
+                unit["paths"].append(path)
+                unit["size"] += size
+            elif mtime < now - RETENTION_STALE_TEMP_AGE:
+                # Its file was removed (or never finished) long ago
+                _remove(path)
+                removed_bytes += size
+                removed += 1
+    
+    return list(units.values()), found, removed_bytes, removed
+
+
+def _disk_usage(entry: os.DirEntry) -> int:
+    """Disk space used by a file, or by the files under a directory"""
+    if not entry.is_dir(follow_symlinks=False):
+        return _allocated(entry.stat(follow_symlinks=False))
+    total = 0
+    for root, _, files in os.walk(entry.path):
+        for name in files:
+            try:
+                total += _allocated(os.lstat(os.path.join(root, name)))
+            except OSError:
+                pass
+    return total
+
+
+def _allocated(stat: os.stat_result) -> int:
+    """
+    Bytes allocated to a file
+    
+    Upload session part files are sparse until their chunks arrive, so
+    they count for what has been written rather than their full size.
+    """
+    blocks = getattr(stat, "st_blocks", None)
+    return stat.st_size if blocks is None else blocks * 512
+
+
+def _evict(unit: dict) -> None:
+    """Forget a file in the database, then remove it and its sidecars"""
+    with get_db() as conn:
+        if unit["upload"]:
+            # Files uploaded before paths were recorded are named by their file_id
+            conn.execute(
+                "DELETE FROM files WHERE path = ? OR file_id = ?",
+                (unit["path"], Path(unit["path"]).stem)
+            )
+        else:
+            conn.execute("DELETE FROM result_cache WHERE processed_file = ?", (unit["path"],))
+        conn.execute("DELETE FROM file_access WHERE path = ?", (unit["path"],))
+        conn.commit()
+    
+    for path in unit["paths"]:
+        _remove(path)
+
+
+def _remove(path: Path) -> None:
+    """Remove a file or directory tree if it still exists"""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,127 @@
+"""Size-aware task routing service"""
+import math
+from pathlib import Path
+from typing import List, Optional
+from config import (
+    FAST_QUEUE,
+    BULK_QUEUE,
+    FAST_LANE_MIN_COST,
+    FAST_LANE_MAX_COST,
+    BULK_LANE_MAX_COST,
+    FORMAT_COST_FACTORS,
+    OPERATION_COST_FACTORS,
+    COLUMN_STORE_COST_FACTOR,
+    COLUMN_STORE_MIN_COST,
+    TASK_MAX_PRIORITY
+)
+from column_store import open_column_store
+
+# Operations workers run on the column store (tasks.COLUMNAR_OPERATIONS;
+# importing tasks here would be circular)
+COLUMNAR_OPERATIONS = {"filter", "unique"}
+
+
+class SchedulerService:
+    """Service for picking the queue (lane) and priority of a task from its estimated cost"""
+    
+    @staticmethod
+    def estimate_cost(
+        size: int,
+        ext: str,
+        operations: List[str],
+        engine: str = "auto",
+        sheet: Optional[str] = None,
+        has_column_store: bool = False
+    ) -> float:
+        """
+        Estimate the work of running operations (in order) over an input
+        
+        Returns:
+            float: cost in bytes of plain CSV scanning that would take as long
+        """
+        if not operations:
+            return 0.0
+        
+        # Workers read Excel inputs (other than a named sheet) from the column store
+        reads_store = has_column_store and sheet is None
+        read_factor = 1.0 if reads_store else FORMAT_COST_FACTORS.get(ext.lower(), 1.0)
+        if reads_store and operations[0] in COLUMNAR_OPERATIONS and engine != "row":
+            read_factor = COLUMN_STORE_COST_FACTOR
+        
+        # Each pipeline step sees at most the rows of the input
+        return size * read_factor * sum(OPERATION_COST_FACTORS.get(op, 1.0) for op in operations)
+    
+    @staticmethod
+    def route(cost: float) -> dict:
+        """
+        Pick the lane and priority of a task of the given cost
+        
+        Cheap tasks go to the fast queue. Within each lane, priority grows
+        with the log of the cost, so the cheapest tasks are served first.
+        
+        Returns:
+            dict: apply_async options (queue, priority)
+        """
+        if cost < FAST_LANE_MAX_COST:
+            queue, low, high = FAST_QUEUE, FAST_LANE_MIN_COST, FAST_LANE_MAX_COST
+        else:
+            queue, low, high = BULK_QUEUE, FAST_LANE_MAX_COST, BULK_LANE_MAX_COST
+        
+        position = math.log(max(cost, low) / low) / math.log(high / low)
+        return {"queue": queue, "priority": min(TASK_MAX_PRIORITY, round(position * TASK_MAX_PRIORITY))}
+    
+    @staticmethod
+    def route_operation(
+        file_path: Path,
+        file_record: Optional[dict],
+        operation: str,
+        steps: Optional[List[dict]] = None,
+        engine: str = "auto",
+        sheet: Optional[str] = None
+    ) -> dict:
+        """Queue and priority of process_csv_operation for a request on an upload"""
+        size = file_record["size"] if file_record else file_path.stat().st_size
+        operations = [step["operation"] for step in steps] if steps is not None else [operation]
+        cost = SchedulerService.estimate_cost(
+            size,
+            file_path.suffix,
+            operations,
+            engine,
+            sheet,
+            open_column_store(file_path) is not None
+        )
+        return SchedulerService.route(cost)
+    
+    @staticmethod
+    def route_conversion(
+        file_path: Path,
+        file_record: Optional[dict],
+        operation: str,
+        steps: Optional[List[dict]] = None,
+        engine: str = "auto",
+        sheet: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Queue and priority of build_column_store for an upload, if a request
+        for operation (or steps) on it calls for converting it
+        
+        Workers read Excel inputs (other than a named sheet) from the column
+        store, and CSV inputs for filter/unique unless engine="row". The
+        upload is converted only if it has no store yet and parsing it costs
+        at least COLUMN_STORE_MIN_COST.
+        
+        Returns:
+            dict: apply_async options (queue, priority), or None
+        """
+        first = steps[0]["operation"] if steps is not None else operation
+        if sheet is not None:
+            return None
+        if file_path.suffix.lower() == ".csv" and (first not in COLUMNAR_OPERATIONS or engine == "row"):
+            return None
+        
+        size = file_record["size"] if file_record else file_path.stat().st_size
+        if size * FORMAT_COST_FACTORS.get(file_path.suffix.lower(), 1.0) < COLUMN_STORE_MIN_COST:
+            return None
+        if open_column_store(file_path) is not None:
+            return None
+        return SchedulerService.route(SchedulerService.estimate_cost(size, file_path.suffix, ["convert"]))
@@ -1,73 +1,209 @@
 """Task handling service"""
-import csv
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Hashable, Optional
 from fastapi import HTTPException
+from celery import states
 from celery.result import AsyncResult
-from config import PROCESSED_DIR
+from config import PROCESSED_DIR, TASK_STATE_CACHE_SIZE, TASK_PREVIEW_CACHE_ROWS
+from output_formats import read_output_page
+from services.cache_service import CacheService
+from services.retention_service import RetentionService
+
+# Custom state of running tasks publishing row-level progress (see tasks.py)
+PROGRESS = "PROGRESS"
+
+
+class _LRUCache:
+    """Thread-safe LRU mapping bounded by the total weight of its values"""
+    
+    def __init__(self, max_weight: int):
+        self._max_weight = max_weight
+        self._weight = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key: Hashable, value: Any, weight: int = 1) -> None:
+        if weight > self._max_weight:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._weight -= previous[1]
+            self._entries[key] = (value, weight)
+            self._weight += weight
+            while self._weight > self._max_weight:
+                _, (_, evicted_weight) = self._entries.popitem(last=False)
+                self._weight -= evicted_weight
+    
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._weight -= entry[1]
+
+
+# Finished tasks never change: their state is resolved from the result
+# backend once, and their result previews are built once per page
+_finished_tasks = _LRUCache(TASK_STATE_CACHE_SIZE)
+_previews = _LRUCache(TASK_PREVIEW_CACHE_ROWS)
 
 
 class TaskService:
     """Service for handling Celery task operations"""
     
     @staticmethod
-    def get_task_status(task_id: str, n: int = 100) -> dict:
+    def get_task_status(task_id: str, n: int = 100, offset: int = 0) -> dict:
         """
         Get task status and results
         
         Args:
             task_id: Celery task ID
             n: Number of records to return (max 10000)
+            offset: Index of the first record to return
             
         Returns:
             dict: Task status information
         """
-        task_result = AsyncResult(task_id)
+        return TaskService.get_task_status_with_etag(task_id, n, offset)[0]
+    
+    @staticmethod
+    def get_task_status_with_etag(task_id: str, n: int = 100, offset: int = 0) -> tuple[dict, str]:
+        """
+        Get task status and results together with an ETag for them
         
-        if task_result.state == "PENDING":
-            return {
-                "task_id": task_id,
-                "status": "PENDING"
-            }
+        Responses for finished tasks are memoized per (task_id, n, offset)
+        and carry a stable ETag; in-progress responses are tagged by content.
+        A memoized result is dropped once its processed file is gone
+        (evicted by retention or the result cache).
+        
+        Returns:
+            tuple: (status, etag)
+        """
+        key = (task_id, n, offset)
+        cached = _previews.get(key)
+        if cached is not None:
+            status, etag, processed_file = cached
+            if processed_file is None:
+                return status, etag
+            if processed_file.exists():
+                RetentionService.touch(processed_file)
+                return status, etag
+            _previews.pop(key)
+        
+        state, info = TaskService.resolve_state(task_id)
+        status = TaskService._build_status(task_id, state, info, n, offset)
+        
+        if state not in states.READY_STATES:
+            digest = hashlib.sha256(json.dumps(status, sort_keys=True).encode()).hexdigest()
+            return status, f'W/"{digest[:32]}"'
+        
+        etag = f'"{task_id}-{state}-{n}-{offset}"'
+        rows = len(status.get("result", {}).get("data", ()))
+        processed_file = Path(info["processed_file"]) if state == states.SUCCESS else None
+        _previews.put(key, (status, etag, processed_file), rows + 1)
+        return status, etag
+    
+    @staticmethod
+    def resolve_state(task_id: str) -> tuple[str, Any]:
+        """
+        Look up a task's state, and its result or error once finished
+        
+        While running, info is the progress the task last published with
+        update_state (if any).
+        Only unfinished tasks are looked up in the result backend on every call.
+        Tasks the backend does not know (any more) are resolved from the
+        result cache if they stored a result there.
+        """
+        finished = _finished_tasks.get(task_id)
+        if finished is not None:
+            return finished
         
-        elif task_result.state == "SUCCESS":
-            result = task_result.result
-            processed_file = result.get("processed_file")
+        # Bound to the tasks' app explicitly: the thread-local default app of
+        # a threadpool thread has no result backend (importing tasks at module
+        # level would be circular)
+        from tasks import celery_app
+        task_result = AsyncResult(task_id, app=celery_app)
+        state = task_result.state
+        info = None
+        
+        if state == states.SUCCESS:
+            info = task_result.result
+        elif state == states.FAILURE:
+            info = str(task_result.info) if task_result.info else "Unknown error"
+        elif state == PROGRESS and isinstance(task_result.info, dict):
+            # Meta published with update_state; other states' info (e.g.
+            # the worker pid and hostname of STARTED) is not progress
+            info = task_result.info
+        elif state == states.PENDING:
+            # Unknown to the backend: queued, or a cached task whose result expired
+            cached = CacheService.get_by_task_id(task_id)
+            if cached is not None:
+                state, info = states.SUCCESS, cached
+        
+        if state in states.READY_STATES:
+            _finished_tasks.put(task_id, (state, info))
+        return state, info
+    
+    @staticmethod
+    def _build_status(task_id: str, state: str, info: Any, n: int, offset: int) -> dict:
+        """Build the task status response for a resolved state"""
+        if state == states.SUCCESS:
+            processed_file = info.get("processed_file")
             
-            # Read processed CSV and return first n records
+            # Seek to the requested page of the processed output (row index,
+            # Parquet row groups or Arrow record batches)
             try:
-                data = []
-                with open(processed_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for i, row in enumerate(reader):
-                        if i >= n:
-                            break
-                        data.append(row)
+                data, total_rows = read_output_page(Path(processed_file), offset, n)
+                RetentionService.touch(Path(processed_file))
                 
                 return {
                     "task_id": task_id,
                     "status": "SUCCESS",
                     "result": {
                         "data": data,
-                        "file_link": f"/processed/{Path(processed_file).name}"
+                        "offset": offset,
+                        "total_rows": total_rows,
+                        "file_link": f"/processed/{Path(processed_file).name}",
+                        "timings": info.get("timings"),
+                        "rows_per_second": info.get("rows_per_second"),
+                        "peak_rss_bytes": info.get("peak_rss_bytes")
                     }
                 }
+            except FileNotFoundError:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Processed file no longer available"
+                )
             except Exception as e:
                 raise HTTPException(
                     status_code=500,
                     detail=f"Failed to read processed file: {str(e)}"
                 )
         
-        elif task_result.state == "FAILURE":
-            error_msg = str(task_result.info) if task_result.info else "Unknown error"
+        elif state == states.FAILURE:
             return {
                 "task_id": task_id,
                 "status": "FAILURE",
-                "error": error_msg
+                "error": info
             }
         
         else:
-            return {
+            status = {
                 "task_id": task_id,
-                "status": task_result.state
+                "status": state
             }
-
+            if info:
+                status["progress"] = info
+            return status
@@ -0,0 +1,469 @@
+"""Chunked (resumable) upload service
+
+A file larger than MAX_FILE_SIZE, or one sent over an unreliable link, is
+uploaded through a session:
+
+    1. create a session with the file name and size; the part file is
+       allocated at its full size in UPLOAD_DIR
+    2. PUT the numbered chunks, in any order and in parallel; each is
+       written at its own offset (chunk index * chunk_size) and hashed,
+       and can carry an Upload-Checksum header to be verified against
+    3. after an interruption, ask which chunks were received and send the
+       missing ones again
+    4. complete the session: the recorded chunk hashes are checked against
+       the part file, which then becomes a regular upload (validated,
+       sniffed and catalogued as by FileService.save_uploaded_file)
+
+Unfinished sessions expire after UPLOAD_SESSION_TTL. A user can have at
+most MAX_OPEN_UPLOAD_SESSIONS open sessions, reserving at most
+MAX_UPLOAD_SESSION_BYTES together.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from config import (
+    UPLOAD_DIR,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_SESSION_CHUNK_SIZE,
+    UPLOAD_SESSION_TTL,
+    MAX_OPEN_UPLOAD_SESSIONS,
+    MAX_UPLOAD_SESSION_BYTES
+)
+from database import get_db
+from services.file_service import FileService
+from validators import validate_filename, validate_chunked_upload
+
+# Missing chunk indexes listed in an error response, at most
+MAX_LISTED_CHUNKS = 100
+
+
+class UploadSessionService:
+    """Service for uploading a file in numbered, independently retried chunks"""
+    
+    @staticmethod
+    def create_session(
+        filename: str,
+        size: int,
+        owner_id: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        sha256: Optional[str] = None
+    ) -> dict:
+        """
+        Open an upload session and allocate its part file
+        
+        Args:
+            sha256: Optional hex digest of the whole file, checked on completion
+            
+        Returns:
+            dict: the session (see get_session)
+            
+        Raises:
+            HTTPException: If the file name, size, chunk size or digest is
+            invalid (400, 413), or the user has too many open sessions (429)
+            or would reserve too many bytes with them (413)
+        """
+        file_ext = validate_filename(filename)
+        chunk_size = chunk_size or UPLOAD_SESSION_CHUNK_SIZE
+        validate_chunked_upload(size, chunk_size)
+        if sha256 is not None and not re.fullmatch(r"[0-9a-fA-F]{64}", sha256):
+            raise HTTPException(status_code=400, detail="sha256 must be a hex SHA-256 digest")
+        
+        UploadSessionService.expire_sessions()
+        
+        session = {
+            "upload_id": str(uuid.uuid4()),
+            "owner_id": owner_id,
+            "filename": Path(filename).name,
+            "ext": file_ext,
+            "size": size,
+            "chunk_size": chunk_size,
+            "sha256": sha256.lower() if sha256 else None,
+            "expires_at": time.time() + UPLOAD_SESSION_TTL
+        }
+        
+        with get_db() as conn:
+            # Checked and recorded in one write transaction, so concurrent
+            # requests of a user cannot both pass the limits
+            conn.execute("BEGIN IMMEDIATE")
+            open_sessions, reserved = conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(size), 0) FROM upload_sessions
+                WHERE owner_id IS ? AND expires_at >= ?
+                """,
+                (owner_id, time.time())
+            ).fetchone()
+            if open_sessions >= MAX_OPEN_UPLOAD_SESSIONS:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Too many open upload sessions (at most {MAX_OPEN_UPLOAD_SESSIONS}); complete or abort one first"
+                )
+            if reserved + size > MAX_UPLOAD_SESSION_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=(
+                        f"Open upload sessions would reserve more than "
+                        f"{MAX_UPLOAD_SESSION_BYTES // (1024 * 1024)}MB; complete or abort one first"
+                    )
+                )
+            conn.execute(
+                """
+                INSERT INTO upload_sessions
+                    (upload_id, owner_id, filename, ext, size, chunk_size, sha256, expires_at)
+                VALUES (:upload_id, :owner_id, :filename, :ext, :size, :chunk_size, :sha256, :expires_at)
+                """,
+                session
+            )
+            conn.commit()
+        
+        # Sparse on most filesystems: chunks fill it in at their offsets
+        try:
+            with open(part_path(session["upload_id"]), 'wb') as f:
+                f.truncate(size)
+        except OSError:
+            UploadSessionService.abort_session(session)
+            raise
+        
+        return with_chunk_count(session)
+    
+    @staticmethod
+    def get_session(upload_id: str, owner_id: Optional[str] = None) -> dict:
+        """
+        Get an open upload session of a user
+        
+        Returns:
+            dict: upload_id, owner_id, filename, ext, size, chunk_size,
+            chunk_count, sha256 and expires_at
+            
+        Raises:
+            HTTPException: If the session does not exist, has expired or
+            belongs to another user
+        """
+        with get_db() as conn:
+            row = conn.execute(
+                "SELECT * FROM upload_sessions WHERE upload_id = ?", (upload_id,)
+            ).fetchone()
+        
+        if row is None or row["owner_id"] != owner_id or row["expires_at"] < time.time():
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return with_chunk_count(dict(row))
+    
+    @staticmethod
+    def get_status(session: dict) -> dict:
+        """
+        Progress of an upload session
+        
+        Returns:
+            dict: the session fields plus received and missing (chunk
+            indexes), and offset: the number of bytes received without a
+            gap from the start of the file, for clients sending chunks in order
+        """
+        received = UploadSessionService._received_chunks(session["upload_id"])
+        missing = [index for index in range(session["chunk_count"]) if index not in received]
+        contiguous = missing[0] if missing else session["chunk_count"]
+        return {
+            **{name: value for name, value in session.items() if name != "owner_id"},
+            "received": sorted(received),
+            "missing": missing,
+            "offset": min(contiguous * session["chunk_size"], session["size"])
+        }
+    
+    @staticmethod
+    async def write_chunk(
+        session: dict,
+        index: int,
+        body: AsyncIterator[bytes],
+        checksum: Optional[str] = None
+    ) -> dict:
+        """
+        Write one chunk of an upload at its offset in the part file
+        
+        The body is written in UPLOAD_CHUNK_SIZE pieces on a worker thread as
+        it arrives, so a chunk is never held in memory whole. Every chunk but
+        the last must be exactly chunk_size bytes. A chunk sent again
+        replaces the earlier copy.
+        
+        Args:
+            checksum: Optional Upload-Checksum header value, "sha256 <base64 digest>"
+            
+        Returns:
+            dict: index, size and sha256 (hex digest) of the chunk
+            
+        Raises:
+            HTTPException: If the index is out of range, the chunk has the
+            wrong length or does not match its checksum, or the session
+            ended meanwhile
+        """
+        if not 0 <= index < session["chunk_count"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Chunk index must be between 0 and {session['chunk_count'] - 1}"
+            )
+        expected_digest = parse_checksum(checksum) if checksum else None
+        
+        start = index * session["chunk_size"]
+        expected = min(session["chunk_size"], session["size"] - start)
+        hasher = hashlib.sha256()
+        written = 0
+        
+        try:
+            fd = await run_in_threadpool(os.open, part_path(session["upload_id"]), os.O_WRONLY)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        try:
+            buffer = bytearray()
+            async for data in body:
+                buffer += data
+                if written + len(buffer) > expected:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Chunk {index} must be {expected} bytes"
+                    )
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await run_in_threadpool(_write_piece, fd, hasher, bytes(buffer), start + written)
+                    written += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await run_in_threadpool(_write_piece, fd, hasher, bytes(buffer), start + written)
+                written += len(buffer)
+        finally:
+            os.close(fd)
+        
+        if written != expected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Chunk {index} must be {expected} bytes, received {written}"
+            )
+        if expected_digest is not None and hasher.digest() != expected_digest:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} does not match its checksum")
+        
+        digest = hasher.hexdigest()
+        await run_in_threadpool(UploadSessionService._record_chunk, session["upload_id"], index, digest)
+        return {"index": index, "size": written, "sha256": digest}
+    
+    @staticmethod
+    async def complete_session(session: dict, owner_id: Optional[str] = None) -> tuple[str, Path, dict]:
+        """
+        Turn a fully received upload into a regular upload
+        
+        The session is closed first, so chunks can no longer be recorded.
+        The part file is then read once to check every chunk against the
+        hash recorded when it was written (a chunk re-sent while the
+        session was being completed would not match) and to compute the
+        upload info. A mismatching chunk reopens the session with that
+        chunk missing.
+        
+        Returns:
+            tuple: (file_id, file_path, file_info) as returned by
+            FileService.save_uploaded_file
+            
+        Raises:
+            HTTPException: 409 if chunks are missing, 400 if the file does not
+            match the sha256 given when the session was created, or if its
+            content cannot be read
+        """
+        upload_id = session["upload_id"]
+        chunk_digests = await run_in_threadpool(UploadSessionService._received_chunks, upload_id)
+        missing = [index for index in range(session["chunk_count"]) if index not in chunk_digests]
+        if missing:
+            raise HTTPException(status_code=409, detail=missing_chunks_detail(missing))
+        
+        if not await run_in_threadpool(UploadSessionService._close_session, upload_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        
+        source = part_path(upload_id)
+        try:
+            file_info, corrupt = await run_in_threadpool(
+                scan_part_file, source, session["chunk_size"], chunk_digests
+            )
+        except BaseException:
+            await run_in_threadpool(UploadSessionService._reopen_session, session, chunk_digests, [])
+            raise
+        
+        if corrupt:
+            await run_in_threadpool(UploadSessionService._reopen_session, session, chunk_digests, corrupt)
+            raise HTTPException(status_code=409, detail=missing_chunks_detail(corrupt))
+        
+        if session["sha256"] and file_info["sha256"] != session["sha256"]:
+            source.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=400,
+                detail="Uploaded file does not match the sha256 given for it; start a new upload"
+            )
+        
+        file_id = str(uuid.uuid4())
+        file_path = UPLOAD_DIR / f"{file_id}{session['ext']}"
+        os.replace(source, file_path)
+        
+        await FileService.register_upload(file_id, file_path, file_info, owner_id)
+        return file_id, file_path, file_info
+    
+    @staticmethod
+    def abort_session(session: dict) -> None:
+        """Close an upload session and remove its part file"""
+        UploadSessionService._close_session(session["upload_id"])
+        part_path(session["upload_id"]).unlink(missing_ok=True)
+    
+    @staticmethod
+    def expire_sessions() -> int:
+        """Remove sessions past their expiry time (and their part files), returning how many"""
+        with get_db() as conn:
+            expired = [
+                row["upload_id"]
+                for row in conn.execute(
+                    "SELECT upload_id FROM upload_sessions WHERE expires_at < ?", (time.time(),)
+                )
+            ]
+        
+        for upload_id in expired:
+            if UploadSessionService._close_session(upload_id):
+                part_path(upload_id).unlink(missing_ok=True)
+        return len(expired)
+    
+    @staticmethod
+    def _received_chunks(upload_id: str) -> dict:
+        """Recorded chunk hashes of a session, by chunk index"""
+        with get_db() as conn:
+            return {
+                row["chunk_index"]: row["sha256"]
+                for row in conn.execute(
+                    "SELECT chunk_index, sha256 FROM upload_chunks WHERE upload_id = ?", (upload_id,)
+                )
+            }
+    
+    @staticmethod
+    def _record_chunk(upload_id: str, index: int, digest: str) -> None:
+        """Record a written chunk, unless its session has been closed meanwhile"""
+        with get_db() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR REPLACE INTO upload_chunks (upload_id, chunk_index, sha256)
+                SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM upload_sessions WHERE upload_id = ?)
+                """,
+                (upload_id, index, digest, upload_id)
+            )
+            conn.commit()
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+    
+    @staticmethod
+    def _close_session(upload_id: str) -> bool:
+        """Delete a session and its chunk records; False if it was already closed"""
+        with get_db() as conn:
+            cursor = conn.execute("DELETE FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+            closed = cursor.rowcount > 0
+            conn.execute("DELETE FROM upload_chunks WHERE upload_id = ?", (upload_id,))
+            conn.commit()
+        return closed
+    
+    @staticmethod
+    def _reopen_session(session: dict, chunk_digests: dict, missing: List[int]) -> None:
+        """Restore a session closed for completion, with the given chunks to be sent again"""
+        received = {index: digest for index, digest in chunk_digests.items() if index not in missing}
+        with get_db() as conn:
+            conn.execute(
+                """
+                INSERT INTO upload_sessions
+                    (upload_id, owner_id, filename, ext, size, chunk_size, sha256, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    session["upload_id"],
+                    session["owner_id"],
+                    session["filename"],
+                    session["ext"],
+                    session["size"],
+                    session["chunk_size"],
+                    session["sha256"],
+                    session["expires_at"]
+                )
+            )
+            conn.executemany(
+                "INSERT INTO upload_chunks (upload_id, chunk_index, sha256) VALUES (?, ?, ?)",
+                [(session["upload_id"], index, digest) for index, digest in received.items()]
+            )
+            conn.commit()
+
+
+def part_path(upload_id: str) -> Path:
+    """Part file an upload session writes its chunks into"""
+    return UPLOAD_DIR / f".{upload_id}.upload"
+
+
+def with_chunk_count(session: dict) -> dict:
+    """Add the number of chunks a session's file is split into"""
+    session["chunk_count"] = -(-session["size"] // session["chunk_size"])
+    return session
+
+
+def parse_checksum(checksum: str) -> bytes:
+    """Digest of an Upload-Checksum header ("sha256 <base64 digest>")"""
+    algorithm, _, encoded = checksum.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=400, detail="Upload-Checksum must use sha256")
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error:
+        digest = b""
+    if len(digest) != hashlib.sha256().digest_size:
+        raise HTTPException(status_code=400, detail="Upload-Checksum must be a base64 SHA-256 digest")
+    return digest
+
+
+def missing_chunks_detail(missing: List[int]) -> str:
+    """Error message listing the chunks an upload still needs"""
+    listed = ", ".join(map(str, missing[:MAX_LISTED_CHUNKS]))
+    more = f" and {len(missing) - MAX_LISTED_CHUNKS} more" if len(missing) > MAX_LISTED_CHUNKS else ""
+    return f"Upload is missing chunks {listed}{more}"
+
+
+def scan_part_file(file_path: Path, chunk_size: int, chunk_digests: dict) -> tuple[dict, List[int]]:
+    """
+    Hash a completed part file chunk by chunk and as a whole
+    
+    Returns:
+        tuple: (file_info, corrupt) where file_info holds the size, sha256
+        and line_count (counted as FileService.stream_to_disk does), and
+        corrupt lists the chunks that differ from their recorded hash
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    line_count = 0
+    last_byte = b""
+    corrupt = []
+    
+    with open(file_path, 'rb') as f:
+        for index in range(len(chunk_digests)):
+            chunk_hasher = hashlib.sha256()
+            remaining = chunk_size
+            while remaining and (data := f.read(min(UPLOAD_CHUNK_SIZE, remaining))):
+                remaining -= len(data)
+                size += len(data)
+                hasher.update(data)
+                chunk_hasher.update(data)
+                line_count += data.count(b"\n")
+                last_byte = data[-1:]
+            if chunk_hasher.hexdigest() != chunk_digests[index]:
+                corrupt.append(index)
+    
+    if last_byte and last_byte != b"\n":
+        line_count += 1
+    
+    return {"size": size, "sha256": hasher.hexdigest(), "line_count": line_count}, corrupt
+
+
+def _write_piece(fd: int, hasher, data: bytes, offset: int) -> None:
+    """Write and hash one piece of a chunk at its file offset"""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+    hasher.update(data)
@@ -0,0 +1,195 @@
+"""Upload sniffing
+
+An upload is inspected once, when it is validated: the encoding and
+delimiter of a CSV file are detected, and a column type is inferred for
+each header from a bounded sample of rows. The result is stored with the
+file (see FileService.record_file_info) so that operations read the file
+with the detected layout instead of detecting it again.
+
+Only ASCII-compatible encodings are detected (UTF-8, with or without BOM,
+then cp1252 and latin-1), since CSV chunks are split on raw newline and
+quote bytes (see tasks.split_csv_chunks).
+"""
+import codecs
+import csv
+import io
+from collections import Counter
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+SNIFF_SAMPLE_BYTES = 64 * 1024
+SNIFF_SAMPLE_ROWS = 1000
+CSV_DELIMITERS = (",", ";", "\t", "|")
+BOOLEAN_VALUES = {"true", "false", "yes", "no"}
+
+
+def _is_int(cell: str) -> bool:
+    int(cell)
+    return True
+
+
+def _is_number(cell: str) -> bool:
+    float(cell)
+    return True
+
+
+def _is_boolean(cell: str) -> bool:
+    return cell.strip().lower() in BOOLEAN_VALUES
+
+
+def _is_date(cell: str) -> bool:
+    date.fromisoformat(cell.strip())
+    return True
+
+
+def _is_datetime(cell: str) -> bool:
+    datetime.fromisoformat(cell.strip())
+    return True
+
+
+# Narrowest first; a column gets the first type all of its non-empty cells match
+COLUMN_TYPES: List[tuple[str, Callable[[str], bool]]] = [
+    ("integer", _is_int),
+    ("number", _is_number),
+    ("boolean", _is_boolean),
+    ("date", _is_date),
+    ("datetime", _is_datetime),
+]
+
+
+def _matches(check: Callable[[str], bool], cell: str) -> bool:
+    try:
+        return check(cell)
+    except ValueError:
+        return False
+
+
+def infer_type(cells: List[str]) -> str:
+    """Type of a column from its sampled cells ("empty" if all are blank, "string" if no other type fits)"""
+    values = [cell for cell in cells if cell.strip()]
+    if not values:
+        return "empty"
+    for name, check in COLUMN_TYPES:
+        if all(_matches(check, cell) for cell in values):
+            return name
+    return "string"
+
+
+def infer_columns(headers: List[str], rows: List[List[str]]) -> List[dict]:
+    """Name and inferred type of each header column, from sampled data rows"""
+    return [
+        {"name": name, "type": infer_type([row[index] for row in rows if index < len(row)])}
+        for index, name in enumerate(headers)
+    ]
+
+
+def looks_like_header(headers: List[str], columns: List[dict]) -> bool:
+    """
+    Whether the first row reads as a header rather than data
+    
+    It does not if one of its cells fits the type inferred for the column
+    below it (e.g. a number heading a numeric column).
+    """
+    checks = dict(COLUMN_TYPES)
+    for name, column in zip(headers, columns):
+        check = checks.get(column["type"])
+        if check and name.strip() and _matches(check, name):
+            return False
+    return True
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Encoding of a CSV file from its first bytes"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        raise ValueError("UTF-16 encoded CSV files are not supported; save the file as UTF-8")
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            # A sample cut inside a multi-byte character is still valid
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            pass
+    return "latin-1"
+
+
+def detect_delimiter(text: str, truncated: bool) -> str:
+    """
+    Delimiter that splits the sampled records most consistently
+    
+    Each candidate is scored by the share of records having its most common
+    field count (more than one field), then by that count; comma wins ties.
+    """
+    best, best_score = ",", (0.0, 0)
+    for delimiter in CSV_DELIMITERS:
+        rows = list(csv.reader(io.StringIO(text, newline=''), delimiter=delimiter))
+        if truncated:
+            # The last record may be cut off
+            rows = rows[:-1]
+        widths = Counter(len(row) for row in rows if row)
+        if not widths:
+            continue
+        width, count = widths.most_common(1)[0]
+        score = (count / sum(widths.values()), width)
+        if width > 1 and score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def sniff_csv(file_path: Path) -> dict:
+    """
+    Detect the layout of a CSV file and infer its column types
+    
+    Returns:
+        dict: encoding, delimiter, has_header, columns (name and type of
+        each header) and sample_rows (data rows the types come from)
+        
+    Raises:
+        ValueError: If the file is empty or its encoding is unsupported
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_SAMPLE_BYTES)
+        truncated = bool(f.read(1))
+    if not sample.strip():
+        raise ValueError("File is empty")
+    
+    encoding = detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)().decode(sample, final=not truncated)
+    delimiter = detect_delimiter(text, truncated)
+    
+    with open(file_path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        headers = next(reader)
+        rows = list(islice(reader, SNIFF_SAMPLE_ROWS))
+    
+    columns = infer_columns(headers, rows)
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "has_header": looks_like_header(headers, columns),
+        "columns": columns,
+        "sample_rows": len(rows),
+    }
+
+
+def sniff_rows(headers: List[str], rows: Iterator[List[str]]) -> dict:
+    """Infer the column types of an already-parsed row stream (e.g. an Excel sheet), from a bounded sample"""
+    sample = list(islice(rows, SNIFF_SAMPLE_ROWS))
+    columns = infer_columns(headers, sample)
+    return {
+        "has_header": looks_like_header(headers, columns),
+        "columns": columns,
+        "sample_rows": len(sample),
+    }
+
+
+def csv_dialect(inferred_schema: Optional[dict]) -> dict:
+    """Reader settings for a CSV upload (UTF-8 and comma when it was never sniffed)"""
+    inferred_schema = inferred_schema or {}
+    return {
+        "encoding": inferred_schema.get("encoding", "utf-8"),
+        "delimiter": inferred_schema.get("delimiter", ","),
+    }
@@ -1,9 +1,50 @@
-from celery import Celery
+from celery import Celery, chord, states
+from celery.exceptions import Ignore
+from celery.signals import task_failure, task_postrun
+from celery.utils.log import get_task_logger
 import csv
-import openpyxl
+import io
+import operator
+import os
+import shutil
+import time
+from itertools import chain, islice
 from pathlib import Path
 import uuid
-from typing import Optional, Dict, List, Any
+from array import array
+from typing import Optional, Dict, List, Any, Callable, Iterable, Iterator
+from kombu import Queue
+from config import (
+    BULK_QUEUE,
+    FAST_QUEUE,
+    TASK_MAX_PRIORITY,
+    TASK_VISIBILITY_TIMEOUT,
+    TASK_RESULT_EXPIRES,
+    RETENTION_INTERVAL
+)
+from columnar import iter_batches, iter_columnar_filtering, iter_columnar_unique
+from compression import compressor
+from column_store import (
+    ColumnStore,
+    open_column_store,
+    write_column_store,
+    iter_store_filtering,
+    iter_store_unique
+)
+from excel_reader import stream_excel, excel_row_count, outline_row_count
+from external_dedup import SpillingDeduplicator
+from fingerprint import FingerprintDeduplicator
+from output_formats import output_suffix, write_output
+from metrics import count_failure, observe_task_result
+from resource_usage import peak_rss_bytes, reset_peak_rss
+from row_index import ROW_INDEX_STRIDE, row_index_path, write_row_index, build_row_index
+from services.cache_service import CacheService
+from services.file_service import FileService
+from services.retention_service import RetentionService
+from services.scheduler_service import SchedulerService
+from sniffing import csv_dialect
+
+logger = get_task_logger(__name__)
 
 # Celery configuration
 celery_app = Celery(
@@ -21,11 +62,109 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=3600,  # 1 hour
     task_soft_time_limit=3000,  # 50 minutes
+    # Lanes (see services/scheduler_service.py): operations and conversions
+    # are sent to one of these by estimated cost; chunked jobs are bulk work
+    task_queues=[Queue(FAST_QUEUE), Queue(BULK_QUEUE)],
+    task_default_queue=FAST_QUEUE,
+    task_routes={
+        "tasks.process_csv_chunk": {"queue": BULK_QUEUE},
+        "tasks.merge_csv_chunks": {"queue": BULK_QUEUE},
+    },
+    # A worker process reserves one task at a time, so a long task does not
+    # hold queued ones that an idle worker could run (the fast lane's
+    # workers raise this on their command line)
+    worker_prefetch_multiplier=1,
+    # Acknowledged when finished, so tasks of a worker that is stopped or
+    # crashes are redelivered; a task whose process dies (e.g. out of
+    # memory) still fails instead of being retried forever
+    task_acks_late=True,
+    task_reject_on_worker_lost=False,
+    broker_transport_options={
+        # Redis serves priority 0 first
+        "priority_steps": list(range(TASK_MAX_PRIORITY + 1)),
+        "queue_order_strategy": "priority",
+        # Longer than task_time_limit, or running tasks would be redelivered
+        "visibility_timeout": TASK_VISIBILITY_TIMEOUT,
+    },
+    # Results (and the state task-status reads) are dropped from the
+    # backend after this; their outputs are kept by the retention sweep
+    result_expires=TASK_RESULT_EXPIRES,
+    # Run by celery beat; a run still queued when the next is due is dropped
+    beat_schedule={
+        "enforce-retention": {
+            "task": "tasks.enforce_retention",
+            "schedule": RETENTION_INTERVAL,
+            "options": {"expires": RETENTION_INTERVAL},
+        },
+    },
 )
 
-UPLOAD_DIR = Path("uploads")
+# Task metrics are recorded in the worker running the task (see metrics.py).
+# A chunked run's result is returned by its merge task, and its failure
+# raised by a chunk or the merge
+RESULT_TASKS = {"tasks.process_csv_operation", "tasks.merge_csv_chunks"}
+FAILURE_TASKS = RESULT_TASKS | {"tasks.process_csv_chunk"}
+
+
+@task_postrun.connect
+def observe_finished_task(sender=None, state=None, retval=None, **kwargs):
+    """Record the timings of a successful operation"""
+    if sender is not None and sender.name in RESULT_TASKS and state == states.SUCCESS and isinstance(retval, dict):
+        observe_task_result(retval)
+
+
+@task_failure.connect
+def count_failed_task(sender=None, **kwargs):
+    """Count a failed operation task"""
+    if sender is not None and sender.name in FAILURE_TASKS:
+        count_failure("task")
+
+
 PROCESSED_DIR = Path("processed")
 
+# Columnar engine: used for filter/unique when engine="columnar". With
+# engine="auto" it is picked for filters once the input has at least
+# COLUMNAR_MIN_ROWS rows; unique on string keys is faster with a hash set.
+COLUMNAR_MIN_ROWS = 100_000
+COLUMNAR_BATCH_SIZE = 65_536
+COLUMNAR_OPERATIONS = {"filter", "unique"}
+COLUMNAR_AUTO_OPERATIONS = {"filter"}
+
+# Uploads are converted in the background into a column store (see
+# column_store.py), queued by the first operation request that would read it
+# (see SchedulerService.route_conversion). Once it exists, filter/unique run
+# on it with the columnar engine unless engine="row" is requested, and Excel
+# inputs are read from it; other CSV scans keep parsing the CSV, which
+# rebuilds whole rows faster.
+
+# Dedup spills to hash-partitioned bucket files once its seen-set is
+# estimated to exceed DEDUP_MEMORY_BUDGET bytes (per task)
+DEDUP_MEMORY_BUDGET = 256 * 1024 * 1024
+DEDUP_SPILL_PARTITIONS = 64
+DEDUP_SPILL_DIR = None  # None uses the system temp directory
+
+# seen_set values that store 128-bit key digests instead of full keys
+FINGERPRINT_SEEN_SETS = {"fingerprint", "fingerprint_verify"}
+
+# CSV inputs of at least PARALLEL_MIN_BYTES are split into up to
+# PARALLEL_CHUNKS row-aligned byte ranges processed as parallel subtasks.
+# Single-request uploads are capped at MAX_FILE_SIZE (50MB), below this:
+# only files uploaded through chunked upload sessions are split
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+PARALLEL_MIN_CHUNK_BYTES = 16 * 1024 * 1024
+PARALLEL_CHUNKS = os.cpu_count() or 4
+SPLIT_SCAN_BLOCK = 4 * 1024 * 1024
+# Parsed after each chunk's bytes to check that the chunk ended a record
+RANGE_END_SENTINEL = "\x00end-of-range\x00"
+
+# Row-level progress is published through the result backend at most every
+# PROGRESS_INTERVAL seconds; the clock is checked every PROGRESS_CHECK_ROWS rows
+PROGRESS_INTERVAL = 0.5
+PROGRESS_CHECK_ROWS = 8192
+
+# Stage timers (see StageTimer) read the clock once per STAGE_TIMER_BATCH rows
+STAGE_TIMER_BATCH = 1024
+
 
 def read_csv_file(file_path: Path) -> tuple[List[str], List[List[str]]]:
     """Read CSV file and return headers and data"""
@@ -36,17 +175,10 @@ def read_csv_file(file_path: Path) -> tuple[List[str], List[List[str]]]:
     return headers, data
 
 
-def read_excel_file(file_path: Path) -> tuple[List[str], List[List[str]]]:
+def read_excel_file(file_path: Path, sheet: Optional[str] = None) -> tuple[List[str], List[List[str]]]:
     """Read Excel file and return headers and data"""
-    wb = openpyxl.load_workbook(file_path, read_only=True)
-    ws = wb.active
-    
-    rows = list(ws.iter_rows(values_only=True))
-    headers = [str(cell) if cell is not None else '' for cell in rows[0]]
-    data = [[str(cell) if cell is not None else '' for cell in row] for row in rows[1:]]
-    
-    wb.close()
-    return headers, data
+    headers, rows = stream_excel_file(file_path, sheet)
+    return headers, list(rows)
 
 
 def write_csv_file(file_path: Path, headers: List[str], data: List[List[str]]) -> None:
@@ -57,120 +189,1201 @@ def write_csv_file(file_path: Path, headers: List[str], data: List[List[str]]) -
         writer.writerows(data)
 
 
-def find_input_file(file_id: str) -> Path:
-    """Find input file with any supported extension"""
-    for ext in ['.csv', '.xlsx', '.xls']:
-        file_path = UPLOAD_DIR / f"{file_id}{ext}"
-        if file_path.exists():
-            return file_path
-    raise FileNotFoundError(f"File not found: {file_id}")
+def stream_csv_file(
+    file_path: Path,
+    encoding: str = 'utf-8',
+    delimiter: str = ','
+) -> tuple[List[str], "CsvRows"]:
+    """Open CSV file and return headers and a lazy iterator over data rows"""
+    f = open(file_path, 'r', encoding=encoding, newline='')
+    reader = csv.reader(f, delimiter=delimiter)
+    try:
+        headers = next(reader)
+    except BaseException:
+        f.close()
+        raise
+    
+    return headers, CsvRows(f, reader)
+
+
+class CsvRows:
+    """Data rows of an open CSV file; the file is closed once they run out"""
+    
+    def __init__(self, f, reader: Iterator[List[str]]):
+        self._f = f
+        self._reader = reader
+        self._bytes_read = 0
+    
+    def __iter__(self) -> "CsvRows":
+        return self
+    
+    def __next__(self) -> List[str]:
+        if self._f.closed:
+            raise StopIteration
+        try:
+            return next(self._reader)
+        except BaseException:
+            self.close()
+            raise
+    
+    @property
+    def bytes_read(self) -> int:
+        """Bytes of the file consumed so far (read-ahead included)"""
+        if self._f.closed:
+            return self._bytes_read
+        return self._f.buffer.tell()
+    
+    def close(self) -> None:
+        if not self._f.closed:
+            self._bytes_read = self._f.buffer.tell()
+            self._f.close()
+
+
+def stream_excel_file(file_path: Path, sheet: Optional[str] = None) -> tuple[List[str], Iterator[List[str]]]:
+    """Open a sheet of an Excel file (.xlsx or .xls) and return headers and a lazy iterator over data rows"""
+    return stream_excel(file_path, sheet)
+
+
+def stream_input_file(
+    file_path: Path,
+    sheet: Optional[str] = None,
+    dialect: Optional[Dict[str, str]] = None
+) -> tuple[List[str], Iterator[List[str]]]:
+    """Open CSV (read with dialect, see upload_dialect) or Excel file (optionally a named sheet) as a lazy row stream"""
+    if file_path.suffix == '.csv':
+        return stream_csv_file(file_path, **(dialect or {}))
+    return stream_excel_file(file_path, sheet)
+
+
+def upload_dialect(record: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Encoding and delimiter of a CSV upload, from its catalog record (as sniffed when it was uploaded)"""
+    return csv_dialect(record["inferred_schema"] if record else None)
+
+
+def write_csv_stream(
+    file_path: Path,
+    headers: Optional[List[str]],
+    rows: Iterable[List[str]],
+    index_stride: Optional[int] = None,
+    compression: Optional[str] = None
+) -> int:
+    """
+    Write rows to CSV file as they are produced and return the row count
+    
+    With index_stride, the sparse row-offset index (see row_index.py) is
+    recorded along the way and written next to the file. With compression
+    ("gzip" or "zstd"), the file is written as one member per index block
+    (see compression.py) and always indexed.
+    """
+    count = 0
+    offsets = array('q')
+    try:
+        if compression:
+            index_stride = index_stride or ROW_INDEX_STRIDE
+            count = write_compressed_csv(file_path, headers, rows, index_stride, compression, offsets)
+        else:
+            count = write_plain_csv(file_path, headers, rows, index_stride, offsets)
+        if index_stride:
+            write_row_index(file_path, index_stride, count, offsets)
+    except BaseException:
+        # Don't leave a truncated output behind
+        file_path.unlink(missing_ok=True)
+        row_index_path(file_path).unlink(missing_ok=True)
+        raise
+    return count
+
+
+def write_output_stream(
+    file_path: Path,
+    headers: List[str],
+    rows: Iterable[List[str]],
+    output_format: Optional[str] = None,
+    compression: Optional[str] = None
+) -> int:
+    """Write a processed output in output_format (CSV by default, see output_formats.py) and return the row count"""
+    if output_format in (None, "csv"):
+        return write_csv_stream(file_path, headers, rows, ROW_INDEX_STRIDE, compression)
+    return write_output(file_path, headers, rows, output_format, compression)
+
+
+def write_plain_csv(
+    file_path: Path,
+    headers: Optional[List[str]],
+    rows: Iterable[List[str]],
+    index_stride: Optional[int],
+    offsets: array
+) -> int:
+    """Write an uncompressed CSV file, appending the offset of every index_stride-th row to offsets"""
+    count = 0
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if headers is not None:
+            writer.writerow(headers)
+        if index_stride:
+            for batch in iter_batches(rows, index_stride):
+                offsets.append(f.tell())
+                writer.writerows(batch)
+                count += len(batch)
+        else:
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    return count
+
+
+def write_compressed_csv(
+    file_path: Path,
+    headers: Optional[List[str]],
+    rows: Iterable[List[str]],
+    index_stride: int,
+    compression: str,
+    offsets: array
+) -> int:
+    """Write a compressed CSV file, one member per index block, appending each member's offset to offsets"""
+    compress = compressor(compression)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    
+    def flush(f) -> None:
+        f.write(compress(buffer.getvalue().encode('utf-8')))
+        buffer.seek(0)
+        buffer.truncate()
+    
+    with open(file_path, 'wb') as f:
+        if headers is not None:
+            writer.writerow(headers)
+            flush(f)
+        for batch in iter_batches(rows, index_stride):
+            offsets.append(f.tell())
+            writer.writerows(batch)
+            flush(f)
+            count += len(batch)
+    return count
+
+
+class RowCounter:
+    """
+    Iterator wrapper keeping a running tally of rows passed through
+    
+    progress, if given, is called with the tally every PROGRESS_CHECK_ROWS rows.
+    """
+    
+    def __init__(self, rows: Iterable[List[str]], progress: Optional[Callable[[int], None]] = None):
+        self._rows = iter(rows)
+        self._progress = progress
+        self.count = 0
+    
+    def __iter__(self) -> "RowCounter":
+        return self
+    
+    def __next__(self) -> List[str]:
+        row = next(self._rows)
+        self.count += 1
+        if self._progress is not None and not self.count % PROGRESS_CHECK_ROWS:
+            self._progress(self.count)
+        return row
+
+
+class StageTimer:
+    """
+    Iterator wrapper measuring the time spent producing rows
+    
+    Rows are pulled from the wrapped iterator STAGE_TIMER_BATCH at a time,
+    so the clock is read per batch rather than per row. A timer pulling from
+    another timed stage includes that stage's time in its own seconds.
+    """
+    
+    def __init__(self, rows: Iterable[List[str]]):
+        self._rows = iter(rows)
+        self.seconds = 0.0
+    
+    def __iter__(self) -> Iterator[List[str]]:
+        clock = time.perf_counter
+        while True:
+            started = clock()
+            batch = list(islice(self._rows, STAGE_TIMER_BATCH))
+            self.seconds += clock() - started
+            if not batch:
+                return
+            yield from batch
+
+
+def stage_timings(
+    read: StageTimer,
+    operate: StageTimer,
+    stream_seconds: float,
+    prepare_seconds: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Seconds spent reading, operating and writing in one streaming pass
+    
+    The stages are interleaved: the writer pulls rows from the operation,
+    which pulls them from the reader. operate pulls the operation's output
+    and stream_seconds is the whole pass (see write_output_stream).
+    """
+    timings = {
+        "read_seconds": round(read.seconds, 4),
+        "operate_seconds": round(max(operate.seconds - read.seconds, 0.0), 4),
+        "write_seconds": round(max(stream_seconds - operate.seconds, 0.0), 4)
+    }
+    if prepare_seconds is not None:
+        timings = {"prepare_seconds": round(prepare_seconds, 4), **timings}
+    return timings
+
+
+def queue_wait(queued_at: Optional[float], started_at: float) -> Optional[float]:
+    """Seconds between a task's submission (wall clock) and its start, if known"""
+    if queued_at is None:
+        return None
+    return round(max(started_at - queued_at, 0.0), 4)
+
+
+class ProgressReporter:
+    """
+    Publish throttled row-level progress of a task as PROGRESS state meta
+    
+    Called with the number of input rows processed so far; publishes at
+    most every PROGRESS_INTERVAL seconds. Completion is estimated from
+    bytes_read() / total_bytes when both are known, else from total_rows.
+    """
+    
+    def __init__(
+        self,
+        task,
+        status: str,
+        total_rows: Optional[int] = None,
+        total_bytes: Optional[int] = None,
+        bytes_read: Optional[Callable[[], int]] = None
+    ):
+        self._task = task
+        self._status = status
+        self._total_rows = total_rows
+        self._total_bytes = total_bytes
+        self._bytes_read = bytes_read
+        self._started = time.monotonic()
+        self._published = self._started
+    
+    def __call__(self, rows: int) -> None:
+        now = time.monotonic()
+        if now - self._published < PROGRESS_INTERVAL:
+            return
+        self._published = now
+        self._task.update_state(state="PROGRESS", meta=self.snapshot(rows, now))
+    
+    def snapshot(self, rows: int, now: Optional[float] = None) -> Dict[str, Any]:
+        """Progress meta for the given row count"""
+        elapsed = (now or time.monotonic()) - self._started
+        bytes_read = self._bytes_read() if self._bytes_read else None
+        
+        done = None
+        if bytes_read is not None and self._total_bytes:
+            done = min(bytes_read / self._total_bytes, 1.0)
+        elif self._total_rows:
+            done = min(rows / self._total_rows, 1.0)
+        
+        return {
+            "status": self._status,
+            "rows": rows,
+            "total_rows": self._total_rows,
+            "bytes_read": bytes_read,
+            "total_bytes": self._total_bytes,
+            "percent": round(done * 100, 1) if done is not None else None,
+            "rows_per_second": round(rows / elapsed) if elapsed > 0 else None,
+            "eta_seconds": round(elapsed * (1 - done) / done, 1) if done else None
+        }
+
+
+def estimate_row_count(
+    file_path: Path,
+    sheet: Optional[str] = None,
+    record: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Cheaply estimate the number of data rows without parsing the file
+    
+    The file catalog record (line_count counted at upload; the sheet row
+    counts of a workbook recorded at upload; row_count of the default sheet
+    once the column store is built) answers without reading the file;
+    otherwise CSV newlines are counted and workbooks opened.
+    """
+    if record is not None and sheet is None and record.get("row_count") is not None:
+        return record["row_count"]
+    if file_path.suffix == '.csv':
+        if record is not None and record.get("line_count") is not None:
+            return max(record["line_count"] - 1, 0)
+        newlines = 0
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                newlines += chunk.count(b"\n")
+        return max(newlines - 1, 0)
+    
+    schema = record.get("inferred_schema") if record is not None else None
+    row_count = outline_row_count(schema.get("workbook") if schema else None, sheet)
+    return row_count if row_count is not None else excel_row_count(file_path, sheet)
+
+
+def select_engine(
+    engine: Optional[str],
+    operation: str,
+    file_path: Path,
+    sheet: Optional[str] = None,
+    record: Optional[Dict[str, Any]] = None
+) -> str:
+    """Resolve the requested engine ("auto", "row" or "columnar") for an operation"""
+    if operation not in COLUMNAR_OPERATIONS or engine == "row":
+        return "row"
+    if engine == "columnar":
+        return "columnar"
+    if operation in COLUMNAR_AUTO_OPERATIONS and estimate_row_count(file_path, sheet, record) >= COLUMNAR_MIN_ROWS:
+        return "columnar"
+    return "row"
+
+
+def find_input_file(file_id: str, record: Optional[Dict[str, Any]] = None) -> Path:
+    """Find input file through the file catalog (see FileService.locate_file)"""
+    file_path = FileService.locate_file(file_id, record)
+    if file_path is None:
+        raise FileNotFoundError(f"File not found: {file_id}")
+    return file_path
+
+
+def build_operation_stream(
+    headers: List[str],
+    source: Iterable[List[str]],
+    operation: str,
+    column: Optional[str],
+    filter_conditions: Optional[Dict],
+    engine: str,
+    seen_set: Optional[str],
+    store: Optional[ColumnStore] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> tuple[Iterator[List[str]], Dict[str, Any]]:
+    """
+    Build the lazy output row stream for an operation
+    
+    With a column store, the columnar engine reads it directly instead of
+    consuming source, and reports the rows it has scanned to progress.
+    
+    Returns:
+        tuple: (processed_rows, extras) where extras holds stats dicts to
+        merge into the task result; they are complete once processed_rows
+        has been exhausted
+    """
+    extras = {}
+    
+    if seen_set in FINGERPRINT_SEEN_SETS and operation in ("dedup", "unique"):
+        column_index = None
+        if operation == "unique":
+            if column not in headers:
+                raise KeyError(f"Column '{column}' not found in file")
+            column_index = headers.index(column)
+        processed_rows = FingerprintDeduplicator(
+            source,
+            column_index,
+            verify=seen_set == "fingerprint_verify",
+            spill_dir=DEDUP_SPILL_DIR
+        )
+        extras["seen_set"] = processed_rows.stats
+    
+    elif operation == "dedup":
+        processed_rows = SpillingDeduplicator(
+            source,
+            DEDUP_MEMORY_BUDGET,
+            DEDUP_SPILL_PARTITIONS,
+            DEDUP_SPILL_DIR
+        )
+        extras["spill"] = processed_rows.stats
+    
+    elif operation == "unique" and engine == "columnar":
+        if column not in headers:
+            raise KeyError(f"Column '{column}' not found in file")
+        if store is not None:
+            processed_rows = iter_store_unique(store, headers.index(column), COLUMNAR_BATCH_SIZE, progress)
+        else:
+            processed_rows = iter_columnar_unique(source, headers.index(column), COLUMNAR_BATCH_SIZE)
+    
+    elif operation == "unique":
+        processed_rows = iter_unique_extraction(headers, source, column)
+    
+    elif operation == "filter" and engine == "columnar":
+        conditions = parse_filter_conditions(headers, filter_conditions)
+        if store is not None:
+            processed_rows = iter_store_filtering(store, conditions, COLUMNAR_BATCH_SIZE, progress)
+        else:
+            processed_rows = iter_columnar_filtering(source, conditions, COLUMNAR_BATCH_SIZE)
+    
+    elif operation == "filter":
+        processed_rows = iter_filtering(headers, source, filter_conditions)
+    
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+    
+    return processed_rows, extras
+
+
+def build_pipeline_stream(
+    headers: List[str],
+    source: Iterable[List[str]],
+    steps: List[Dict],
+    engine: str,
+    requested_engine: Optional[str],
+    store: Optional[ColumnStore] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> tuple[Iterator[List[str]], List[tuple[RowCounter, Dict[str, Any]]]]:
+    """
+    Chain the operation streams of each step into a single lazy pass
+    
+    The first step runs on the resolved engine (and the column store, if
+    any, reporting scanned rows to progress); later steps consume the
+    previous step's output and use the columnar engine only when it was
+    requested explicitly.
+    
+    Returns:
+        tuple: (processed_rows, step_streams) where step_streams holds a
+        (RowCounter over the step's output, extras) pair per step
+    """
+    rows = source
+    step_streams = []
+    
+    for index, step in enumerate(steps):
+        if index == 0:
+            step_engine, step_store, step_progress = engine, store, progress
+        else:
+            explicit = requested_engine == "columnar" and step["operation"] in COLUMNAR_OPERATIONS
+            step_engine, step_store, step_progress = ("columnar" if explicit else "row"), None, None
+        
+        rows, extras = build_operation_stream(
+            headers,
+            rows,
+            step["operation"],
+            step.get("column"),
+            step.get("filter_conditions"),
+            step_engine,
+            step.get("seen_set"),
+            step_store,
+            step_progress
+        )
+        rows = RowCounter(rows)
+        step_streams.append((rows, extras))
+    
+    return rows, step_streams
+
+
+def cache_result(cache_key: Optional[str], task_id: str, result: Dict) -> None:
+    """Record a completed result in the result cache; failures only log"""
+    if not cache_key:
+        return
+    try:
+        CacheService.put(cache_key, task_id, result)
+    except Exception as e:
+        logger.warning("Could not cache result of %s: %s", task_id, e)
+
+
+def task_error(error: Exception, file_id: str) -> Exception:
+    """Translate a processing error into the message reported to clients"""
+    if isinstance(error, FileNotFoundError):
+        return Exception(f"File not found: {file_id}")
+    if isinstance(error, KeyError):
+        return Exception(f"Column not found: {str(error)}")
+    return Exception(f"Processing failed: {str(error)}")
 
 
 @celery_app.task(bind=True, name="tasks.process_csv_operation")
 def process_csv_operation(
     self,
     file_id: str,
-    operation: str,
+    operation: Optional[str] = None,
     column: Optional[str] = None,
-    filter_conditions: Optional[Dict] = None
+    filter_conditions: Optional[Dict] = None,
+    engine: Optional[str] = None,
+    seen_set: Optional[str] = None,
+    cache_key: Optional[str] = None,
+    sheet: Optional[str] = None,
+    steps: Optional[List[Dict]] = None,
+    compression: Optional[str] = None,
+    output_format: Optional[str] = None,
+    queued_at: Optional[float] = None,
+    split: bool = True
 ):
     """
     Process CSV/Excel file with specified operation
+    
+    steps, given instead of operation, is a pipeline of operations (dicts
+    with operation, column, filter_conditions and seen_set) that are fused
+    into a single streaming pass; the result reports the rows going into
+    and out of each step.
+    
+    sheet names the worksheet to read from an Excel file (by default the
+    active sheet of an .xlsx file, the first sheet of an .xls file).
+    
+    engine selects the row-based or NumPy columnar implementation for
+    filter/unique; "auto" (the default) picks by input row count.
+    seen_set selects how dedup/unique remember keys: "exact" (the default),
+    "fingerprint" (128-bit digests) or "fingerprint_verify" (digests checked
+    against an on-disk key log).
+    cache_key, when given, stores the completed result in the result cache.
+    output_format writes the processed rows as "csv" (the default),
+    "ndjson", "parquet" or "arrow" (see output_formats.py). compression
+    ("gzip" or "zstd") compresses CSV/NDJSON files (see compression.py,
+    adding a .gz/.zst suffix) and selects the Parquet/Arrow codec.
+    
+    When the upload's column store is ready it is used as described at
+    the top of this module.
+    
+    The result records where the time went: timings holds the seconds
+    spent in each stage (queue_wait from queued_at, the wall-clock time the
+    task was submitted at, to its start; prepare; read, operate and write,
+    which are interleaved in one streaming pass; total run time), along with
+    rows_per_second of run time and peak_rss_bytes of the task.
+    
+    CSV files of at least PARALLEL_MIN_BYTES are split into row-aligned byte
+    ranges and this task is replaced by a chord of process_csv_chunk
+    subtasks followed by merge_csv_chunks, which stores the final result
+    under this task's id. split=False forces a single pass (the merge falls
+    back to it when a chunk boundary turns out to cut a record).
     """
     try:
+        started_at = time.time()
+        started = time.perf_counter()
+        reset_peak_rss()
+        
         # Update task state
         self.update_state(state="PROGRESS", meta={"status": "Reading file"})
         
-        # Find and read input file
-        input_file = find_input_file(file_id)
+        pipeline = steps is not None
+        if not pipeline:
+            steps = [{
+                "operation": operation,
+                "column": column,
+                "filter_conditions": filter_conditions,
+                "seen_set": seen_set
+            }]
+        steps = [{**step, "seen_set": step.get("seen_set") or seen_set} for step in steps]
+        first = steps[0]
         
-        if input_file.suffix == '.csv':
-            headers, data = read_csv_file(input_file)
+        # Find input file and open it as a lazy row stream
+        record = FileService.get_file_record(file_id)
+        input_file = find_input_file(file_id, record)
+        dialect = upload_dialect(record) if input_file.suffix == '.csv' else None
+        # The column store holds the default sheet only
+        store = open_column_store(input_file) if sheet is None else None
+        requested_engine = engine
+        if first["seen_set"] in FINGERPRINT_SEEN_SETS and first["operation"] in ("dedup", "unique"):
+            engine = "row"
+        elif store is not None and first["operation"] in COLUMNAR_OPERATIONS and engine != "row":
+            engine = "columnar"
         else:
-            headers, data = read_excel_file(input_file)
+            engine = select_engine(engine, first["operation"], input_file, sheet, record)
         
-        # Perform operation
-        self.update_state(state="PROGRESS", meta={"status": f"Performing {operation} operation"})
+        if store is not None and engine != "columnar" and input_file.suffix == '.csv':
+            store = None
         
-        if operation == "dedup":
-            processed_data = perform_deduplication(headers, data)
+        if store is None:
+            # Pipelines always run as one fused pass
+            chunks = [] if pipeline or not split else plan_csv_chunks(input_file, dialect)
+            if len(chunks) > 1:
+                self.update_state(state="PROGRESS", meta={"status": f"Processing {len(chunks)} chunks"})
+                return self.replace(build_chunk_chord(
+                    file_id, input_file, chunks, operation, column, filter_conditions, engine, seen_set,
+                    cache_key, compression, output_format, dialect,
+                    timing={"queued_at": queued_at, "started_at": started_at}
+                ))
+            headers, rows = stream_input_file(input_file, sheet, dialect)
+        else:
+            headers, rows = store.headers, store.iter_rows(COLUMNAR_BATCH_SIZE)
         
-        elif operation == "unique":
-            processed_data = perform_unique_extraction(headers, data, column)
+        # Build the operation stream; rows flow read -> transform(s) -> write
+        operation = operation if not pipeline else "pipeline"
+        status = f"Performing {operation} operation"
+        self.update_state(state="PROGRESS", meta={"status": status})
+        if store is not None:
+            progress = ProgressReporter(self, status, total_rows=store.row_count)
+        elif isinstance(rows, CsvRows):
+            progress = ProgressReporter(
+                self, status, total_bytes=input_file.stat().st_size, bytes_read=lambda: rows.bytes_read
+            )
+        else:
+            progress = ProgressReporter(self, status, total_rows=estimate_row_count(input_file, sheet, record))
+        read_timer = StageTimer(rows)
+        source = RowCounter(read_timer, progress)
+        processed_rows, step_streams = build_pipeline_stream(
+            headers, source, steps, engine, requested_engine, store, progress
+        )
+        operate_timer = StageTimer(processed_rows)
         
-        elif operation == "filter":
-            processed_data = perform_filtering(headers, data, filter_conditions)
+        output_path = processed_output_path(operation, compression, output_format)
+        stream_started = time.perf_counter()
+        processed_count = write_output_stream(output_path, headers, operate_timer, output_format, compression)
+        finished = time.perf_counter()
+        original_rows = source.count if store is None else store.row_count
         
+        result = {
+            "status": "completed",
+            "operation": operation,
+            "engine": engine,
+            "source": "file" if store is None else "column_store",
+            "processed_file": str(output_path),
+            "original_rows": original_rows,
+            "processed_rows": processed_count,
+            "timings": {
+                "queue_wait_seconds": queue_wait(queued_at, started_at),
+                **stage_timings(read_timer, operate_timer, finished - stream_started, stream_started - started),
+                "total_seconds": round(finished - started, 4)
+            },
+            "rows_per_second": round(original_rows / (finished - started)) if finished > started else None,
+            "peak_rss_bytes": peak_rss_bytes()
+        }
+        if compression:
+            result["compression"] = compression
+        if output_format not in (None, "csv"):
+            result["output_format"] = output_format
+        if pipeline:
+            input_rows = original_rows
+            result["steps"] = []
+            for step, (output, extras) in zip(steps, step_streams):
+                result["steps"].append({
+                    "operation": step["operation"],
+                    "input_rows": input_rows,
+                    "output_rows": output.count,
+                    **extras
+                })
+                input_rows = output.count
         else:
-            raise ValueError(f"Unsupported operation: {operation}")
-        
-        # Save processed file
-        self.update_state(state="PROGRESS", meta={"status": "Saving processed file"})
+            result.update(step_streams[0][1])
+        cache_result(cache_key, self.request.id, result)
+        return result
+    
+    except Ignore:
+        # Replaced by the chunk chord
+        raise
+    
+    except Exception as e:
+        raise task_error(e, file_id)
+
+
+@celery_app.task(bind=True, name="tasks.build_column_store")
+def build_column_store(self, file_id: str):
+    """
+    Convert an upload into its column store
+    
+    Queued by the first operation request that would read the store; until
+    it completes (or if it fails) operations simply parse the original file.
+    """
+    try:
+        started = time.perf_counter()
+        record = FileService.get_file_record(file_id)
+        input_file = find_input_file(file_id, record)
+        headers, rows = stream_input_file(
+            input_file, dialect=upload_dialect(record) if input_file.suffix == '.csv' else None
+        )
+        meta = write_column_store(input_file, headers, rows, COLUMNAR_BATCH_SIZE)
+        if record is not None:
+            FileService.record_row_count(file_id, meta["rows"])
         
-        output_filename = f"{uuid.uuid4()}_{operation}.csv"
-        output_path = PROCESSED_DIR / output_filename
-        write_csv_file(output_path, headers, processed_data)
+        return {
+            "status": "completed",
+            "rows": meta["rows"],
+            "columns": len(meta["columns"]),
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+    
+    except Exception as e:
+        raise task_error(e, file_id)
+
+
+@celery_app.task(name="tasks.enforce_retention")
+def enforce_retention():
+    """
+    Evict unused uploads and outputs (see services/retention_service.py)
+    
+    Scheduled every RETENTION_INTERVAL; returns and logs the bytes reclaimed.
+    """
+    started = time.perf_counter()
+    report = RetentionService.enforce()
+    report["seconds"] = round(time.perf_counter() - started, 4)
+    logger.info(
+        "Retention: reclaimed %d bytes (%d uploads, %d outputs, %d temporary files, "
+        "%d upload sessions); %d bytes in use",
+        report["reclaimed_bytes"],
+        report["evicted_uploads"],
+        report["evicted_outputs"],
+        report["removed_temp_files"],
+        report["expired_sessions"],
+        report["total_bytes"]
+    )
+    return report
+
+
+def processed_output_path(
+    operation: str,
+    compression: Optional[str] = None,
+    output_format: Optional[str] = None
+) -> Path:
+    """New, unique path for a processed output file"""
+    return PROCESSED_DIR / f"{uuid.uuid4()}_{operation}{output_suffix(output_format, compression)}"
+
+
+def plan_csv_chunks(file_path: Path, dialect: Optional[Dict[str, str]] = None) -> List[tuple[int, int]]:
+    """Byte ranges to process in parallel, or [] for a single-pass run"""
+    if file_path.suffix != '.csv' or file_path.stat().st_size < PARALLEL_MIN_BYTES:
+        return []
+    chunk_count = min(PARALLEL_CHUNKS, file_path.stat().st_size // PARALLEL_MIN_CHUNK_BYTES)
+    if chunk_count < 2:
+        return []
+    return split_csv_chunks(file_path, chunk_count, **(dialect or {}))
+
+
+def split_csv_chunks(
+    file_path: Path,
+    chunk_count: int,
+    encoding: str = 'utf-8',
+    delimiter: str = ','
+) -> List[tuple[int, int]]:
+    """
+    Split a CSV file's data rows into about chunk_count byte ranges
+    
+    The first range starts where csv.reader ends the header record. The
+    others start right after a newline preceded by an even number of quote
+    characters, which ends a record unless an unquoted field holds a stray
+    quote (e.g. 27" monitor) ahead of a quoted multi-line field. Such a
+    boundary cannot be told apart without parsing everything before it, so
+    each chunk checks that its range ends outside a quoted field (see
+    stream_csv_range), and the merge falls back to a single pass otherwise.
+    
+    Returns:
+        list: (start, end) byte offsets covering every data row in order
+    """
+    size = file_path.stat().st_size
+    header_end = csv_header_end(file_path, encoding, delimiter)
+    if header_end is None or header_end >= size:
+        # Header only, no data rows
+        return []
+    targets = [size * i // chunk_count for i in range(1, chunk_count)]
+    boundaries = [header_end]
+    quotes_before = 0
+    offset = header_end
+    
+    with open(file_path, 'rb') as f:
+        f.seek(header_end)
+        while targets and (block := f.read(SPLIT_SCAN_BLOCK)):
+            while targets:
+                pos = block.find(b"\n", max(targets[0] - offset, 0))
+                while pos != -1 and (quotes_before + block.count(b'"', 0, pos)) % 2:
+                    pos = block.find(b"\n", pos + 1)
+                if pos == -1:
+                    break
+                boundary = offset + pos + 1
+                boundaries.append(boundary)
+                while targets and targets[0] < boundary:
+                    targets.pop(0)
+            quotes_before += block.count(b'"')
+            offset += len(block)
+    
+    edges = boundaries + [size]
+    return [(start, end) for start, end in zip(edges, edges[1:]) if end > start]
+
+
+def csv_header_end(file_path: Path, encoding: str = 'utf-8', delimiter: str = ',') -> Optional[int]:
+    """Byte offset where csv.reader ends the header record, or None for an empty file"""
+    consumed = 0
+    
+    def lines() -> Iterator[str]:
+        nonlocal consumed
+        with open(file_path, 'rb') as f:
+            for line in f:
+                consumed += len(line)
+                yield line.decode(encoding)
+    
+    # The reader pulls lines only until the record is complete
+    reader = csv.reader(lines(), delimiter=delimiter)
+    if next(reader, None) is None:
+        return None
+    return consumed
+
+
+class CsvRange:
+    """
+    Rows of a byte range of a CSV file, parsed as if it started a file
+    
+    A sentinel line is parsed after the range: it comes back as a record
+    of its own only if the range ended outside a quoted field. Once the
+    rows run out, aligned tells whether it did, i.e. whether the range
+    ends at a record boundary (given that it starts at one).
+    """
+    
+    def __init__(self, file_path: Path, start: int, end: int, encoding: str = 'utf-8', delimiter: str = ','):
+        self._reader = csv.reader(self._lines(file_path, start, end, encoding), delimiter=delimiter)
+        self.aligned = False
+    
+    @staticmethod
+    def _lines(file_path: Path, start: int, end: int, encoding: str) -> Iterator[str]:
+        remaining = end - start
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                yield line.decode(encoding)
+        yield RANGE_END_SENTINEL + "\n"
+    
+    def __iter__(self) -> "CsvRange":
+        return self
+    
+    def __next__(self) -> List[str]:
+        row = next(self._reader)
+        if len(row) == 1 and row[0] == RANGE_END_SENTINEL:
+            self.aligned = True
+            raise StopIteration
+        return row
+
+
+def stream_csv_range(
+    file_path: Path,
+    start: int,
+    end: int,
+    encoding: str = 'utf-8',
+    delimiter: str = ','
+) -> CsvRange:
+    """Lazily parse the CSV rows in a row-aligned byte range (see CsvRange)"""
+    return CsvRange(file_path, start, end, encoding, delimiter)
+
+
+def build_chunk_chord(
+    file_id: str,
+    input_file: Path,
+    chunks: List[tuple[int, int]],
+    operation: str,
+    column: Optional[str],
+    filter_conditions: Optional[Dict],
+    engine: str,
+    seen_set: Optional[str],
+    cache_key: Optional[str],
+    compression: Optional[str] = None,
+    output_format: Optional[str] = None,
+    dialect: Optional[Dict[str, str]] = None,
+    timing: Optional[Dict[str, Optional[float]]] = None
+):
+    """
+    Validate the request against the header, then fan out per chunk
+    
+    timing (queued_at and started_at of the replaced task) is passed on to
+    the merge, which reports the timings of the whole job.
+    """
+    dialect = dialect or {}
+    headers, rows = stream_csv_file(input_file, **dialect)
+    rows.close()
+    
+    # Surface column and filter configuration errors before fanning out
+    build_operation_stream(headers, iter(()), operation, column, filter_conditions, engine, seen_set)
+    
+    job_id = str(uuid.uuid4())
+    options = {
+        "operation": operation,
+        "column": column,
+        "filter_conditions": filter_conditions,
+        "engine": engine,
+        "seen_set": seen_set
+    }
+    header = [
+        process_csv_chunk.s(file_id, headers, start, end, index, job_id, **options, **dialect)
+        for index, (start, end) in enumerate(chunks)
+    ]
+    return chord(header, merge_csv_chunks.s(
+        file_id, headers, job_id,
+        cache_key=cache_key, compression=compression, output_format=output_format, **options, **(timing or {})
+    ))
+
+
+@celery_app.task(bind=True, name="tasks.process_csv_chunk")
+def process_csv_chunk(
+    self,
+    file_id: str,
+    headers: List[str],
+    start: int,
+    end: int,
+    index: int,
+    job_id: str,
+    operation: str,
+    column: Optional[str] = None,
+    filter_conditions: Optional[Dict] = None,
+    engine: str = "row",
+    seen_set: Optional[str] = None,
+    encoding: str = 'utf-8',
+    delimiter: str = ','
+):
+    """
+    Apply an operation to one byte range of a CSV file
+    
+    Dedup/unique keep only chunk-local first occurrences here; the merge
+    stage re-applies them across chunks. The chunk's rows are written
+    without a header to a part file in PROCESSED_DIR.
+    
+    aligned in the result is False when the range did not end at a record
+    boundary, or could not be parsed or processed (as happens when it starts
+    inside a quoted field); the merge then discards the chunks.
+    """
+    try:
+        started = time.perf_counter()
+        reset_peak_rss()
+        rows = stream_csv_range(find_input_file(file_id), start, end, encoding, delimiter)
+        read_timer = StageTimer(rows)
+        source = RowCounter(read_timer)
+        processed_rows, _ = build_operation_stream(
+            headers, source, operation, column, filter_conditions, engine, seen_set
+        )
+        operate_timer = StageTimer(processed_rows)
+        part_path = PROCESSED_DIR / f".{job_id}_part{index}.csv"
+        stream_started = time.perf_counter()
+        try:
+            processed_count = write_csv_stream(part_path, None, operate_timer)
+        except (csv.Error, ValueError) as e:
+            # Garbage from a misaligned start; a real error is raised again by
+            # the single-pass fallback
+            logger.warning("Chunk %d of %s could not be processed: %s", index, file_id, e)
+            processed_count = 0
+        finished = time.perf_counter()
         
         return {
+            "index": index,
+            "aligned": rows.aligned,
+            "part_file": str(part_path),
+            "original_rows": source.count,
+            "processed_rows": processed_count,
+            "seconds": round(finished - started, 4),
+            "timings": stage_timings(read_timer, operate_timer, finished - stream_started),
+            "peak_rss_bytes": peak_rss_bytes()
+        }
+    
+    except Exception as e:
+        raise task_error(e, file_id)
+
+
+@celery_app.task(bind=True, name="tasks.merge_csv_chunks")
+def merge_csv_chunks(
+    self,
+    chunk_results: List[Dict],
+    file_id: str,
+    headers: List[str],
+    job_id: str,
+    operation: str,
+    column: Optional[str] = None,
+    filter_conditions: Optional[Dict] = None,
+    engine: str = "row",
+    seen_set: Optional[str] = None,
+    cache_key: Optional[str] = None,
+    compression: Optional[str] = None,
+    output_format: Optional[str] = None,
+    queued_at: Optional[float] = None,
+    started_at: Optional[float] = None
+):
+    """
+    Combine chunk outputs into the final processed file
+    
+    Filter parts are concatenated in chunk order (re-encoded when the
+    output is compressed or not CSV). Dedup/unique parts are streamed in
+    chunk order through the operation again, which restores global
+    first-occurrence semantics.
+    
+    The result's timings add up the read/operate/write seconds of the
+    chunks (which may have run in parallel) and the merge; total_seconds
+    runs from the start of the replaced task (started_at) to the end of
+    the merge.
+    
+    If a chunk boundary cut a record (see split_csv_chunks), the chunk
+    outputs are discarded and this task is replaced by a single-pass
+    process_csv_operation, routed by its cost like a new request (a
+    replacement is sent without the original task's queue and priority).
+    """
+    chunk_results = sorted(chunk_results, key=lambda chunk: chunk["index"])
+    part_paths = [Path(chunk["part_file"]) for chunk in chunk_results]
+    
+    try:
+        if not all(chunk["aligned"] for chunk in chunk_results):
+            logger.warning("Chunk boundaries of %s cut a record; processing it in a single pass", file_id)
+            record = FileService.get_file_record(file_id)
+            routing = SchedulerService.route_operation(
+                find_input_file(file_id, record), record, operation, engine=engine
+            )
+            return self.replace(process_csv_operation.s(
+                file_id=file_id,
+                operation=operation,
+                column=column,
+                filter_conditions=filter_conditions,
+                engine=engine,
+                seen_set=seen_set,
+                cache_key=cache_key,
+                compression=compression,
+                output_format=output_format,
+                queued_at=queued_at,
+                split=False
+            ).set(**routing))
+        
+        started = time.perf_counter()
+        reset_peak_rss()
+        output_path = processed_output_path(operation, compression, output_format)
+        extras = {}
+        
+        if operation == "filter" and not compression and output_format in (None, "csv"):
+            with open(output_path, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerow(headers)
+            with open(output_path, 'ab') as out:
+                for part_path in part_paths:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, out)
+            processed_count = sum(chunk["processed_rows"] for chunk in chunk_results)
+            build_row_index(output_path, ROW_INDEX_STRIDE)
+        
+        else:
+            candidates = chain.from_iterable(stream_part_file(path) for path in part_paths)
+            if operation == "filter":
+                processed_rows = candidates
+            else:
+                processed_rows, extras = build_operation_stream(
+                    headers, candidates, operation, column, filter_conditions, engine, seen_set
+                )
+            processed_count = write_output_stream(
+                output_path, headers, processed_rows, output_format, compression
+            )
+        
+        result = {
             "status": "completed",
             "operation": operation,
+            "engine": engine,
+            "source": "file",
             "processed_file": str(output_path),
-            "original_rows": len(data),
-            "processed_rows": len(processed_data)
+            "original_rows": sum(chunk["original_rows"] for chunk in chunk_results),
+            "processed_rows": processed_count,
+            "chunks": len(chunk_results),
+            "chunk_timings": [
+                {
+                    "index": chunk["index"],
+                    "rows": chunk["original_rows"],
+                    "seconds": chunk["seconds"]
+                }
+                for chunk in chunk_results
+            ],
+            "merge_seconds": round(time.perf_counter() - started, 4),
+            **extras
         }
+        result.update(chunk_job_timings(chunk_results, result["merge_seconds"], queued_at, started_at))
+        if compression:
+            result["compression"] = compression
+        if output_format not in (None, "csv"):
+            result["output_format"] = output_format
+        cache_result(cache_key, self.request.id, result)
+        return result
     
-    except FileNotFoundError as e:
-        raise Exception(f"File not found: {file_id}")
-    
-    except KeyError as e:
-        raise Exception(f"Column not found: {str(e)}")
+    except Ignore:
+        # Replaced by the single-pass fallback
+        raise
     
     except Exception as e:
-        raise Exception(f"Processing failed: {str(e)}")
+        raise task_error(e, file_id)
+    
+    finally:
+        for part_path in part_paths:
+            part_path.unlink(missing_ok=True)
+
+
+def chunk_job_timings(
+    chunk_results: List[Dict],
+    merge_seconds: float,
+    queued_at: Optional[float],
+    started_at: Optional[float]
+) -> Dict[str, Any]:
+    """timings, rows_per_second and peak_rss_bytes of a chunked job (see merge_csv_chunks)"""
+    timings = {"queue_wait_seconds": queue_wait(queued_at, started_at) if started_at else None}
+    for stage in ("read_seconds", "operate_seconds", "write_seconds"):
+        timings[stage] = round(sum(chunk.get("timings", {}).get(stage, 0.0) for chunk in chunk_results), 4)
+    timings["merge_seconds"] = merge_seconds
+    
+    total = time.time() - started_at if started_at else None
+    timings["total_seconds"] = round(total, 4) if total is not None else None
+    rows = sum(chunk["original_rows"] for chunk in chunk_results)
+    peaks = [chunk["peak_rss_bytes"] for chunk in chunk_results if chunk.get("peak_rss_bytes")]
+    merge_peak = peak_rss_bytes()
+    if merge_peak:
+        peaks.append(merge_peak)
+    
+    return {
+        "timings": timings,
+        "rows_per_second": round(rows / total) if total else None,
+        "peak_rss_bytes": max(peaks) if peaks else None
+    }
+
+
+def stream_part_file(file_path: Path) -> Iterator[List[str]]:
+    """Lazily read a headerless chunk part file"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.reader(f)
 
 
 def perform_deduplication(headers: List[str], data: List[List[str]]) -> List[List[str]]:
     """
     Remove duplicate rows from data
     """
+    return list(iter_deduplication(headers, data))
+
+
+def iter_deduplication(headers: List[str], rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    """
+    Yield the first occurrence of each distinct row
+    """
     seen = set()
-    unique_data = []
     
-    for row in data:
+    for row in rows:
         # Convert row to tuple for hashing
         row_tuple = tuple(row)
         if row_tuple not in seen:
             seen.add(row_tuple)
-            unique_data.append(row)
-    
-    return unique_data
+            yield row
 
 
 def perform_unique_extraction(headers: List[str], data: List[List[str]], column: str) -> List[List[str]]:
     """
     Extract unique values from a specific column
     """
+    return list(iter_unique_extraction(headers, data, column))
+
+
+def iter_unique_extraction(headers: List[str], rows: Iterable[List[str]], column: str) -> Iterator[List[str]]:
+    """
+    Yield the first row for each distinct value of a column
+    
+    The column is checked eagerly so a bad request fails before any rows are read.
+    """
     if column not in headers:
         raise KeyError(f"Column '{column}' not found in file")
     
     column_index = headers.index(column)
-    seen = set()
-    unique_data = []
     
-    for row in data:
-        if column_index < len(row):
-            value = row[column_index]
-            if value not in seen:
-                seen.add(value)
-                unique_data.append(row)
+    def generate() -> Iterator[List[str]]:
+        seen = set()
+        for row in rows:
+            if column_index < len(row):
+                value = row[column_index]
+                if value not in seen:
+                    seen.add(value)
+                    yield row
     
-    return unique_data
+    return generate()
 
 
 def perform_filtering(headers: List[str], data: List[List[str]], filter_conditions: Dict) -> List[List[str]]:
     """
     Filter data based on conditions
     
+    See iter_filtering for the expected filter_conditions format.
+    """
+    return list(iter_filtering(headers, data, filter_conditions))
+
+
+def iter_filtering(headers: List[str], rows: Iterable[List[str]], filter_conditions: Dict) -> Iterator[List[str]]:
+    """
+    Yield rows matching all filter conditions
+    
     Expected filter_conditions format:
     {
         "column_name": {
@@ -178,6 +1391,39 @@ def perform_filtering(headers: List[str], data: List[List[str]], filter_conditio
             "value": "value_to_compare"
         }
     }
+    
+    The conditions are compiled before any rows are read, so configuration
+    errors surface immediately.
+    """
+    predicate = compile_filters(headers, filter_conditions)
+    return filter(predicate, rows)
+
+
+def matches_filters(row: List[str], headers: List[str], filter_conditions: Dict) -> bool:
+    """Check if a row matches all filter conditions"""
+    return compile_filters(headers, filter_conditions)(row)
+
+
+NUMERIC_OPERATORS = {
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "gte": operator.ge,
+    "lte": operator.le,
+}
+FILTER_OPERATORS = {"eq", "ne", "contains", "in", *NUMERIC_OPERATORS}
+
+
+def parse_filter_conditions(headers: List[str], filter_conditions: Dict) -> List[tuple]:
+    """
+    Validate filter conditions and resolve them once
+    
+    Returns:
+        list: (column, column_index, op, filter_value, filter_numeric) per
+        condition, where filter_numeric is None if the value is not numeric
+        
+    Raises:
+        KeyError: If a filtered column is not in headers
+        ValueError: If a condition is malformed
     """
     if not filter_conditions:
         raise ValueError("Filter conditions cannot be empty")
@@ -187,92 +1433,117 @@ def perform_filtering(headers: List[str], data: List[List[str]], filter_conditio
         if column not in headers:
             raise KeyError(f"Column '{column}' not found in file")
     
-    filtered_data = []
-    
-    for row in data:
-        if matches_filters(row, headers, filter_conditions):
-            filtered_data.append(row)
-    
-    return filtered_data
-
-
-def matches_filters(row: List[str], headers: List[str], filter_conditions: Dict) -> bool:
-    """Check if a row matches all filter conditions"""
+    parsed = []
     for column, condition in filter_conditions.items():
-        column_index = headers.index(column)
-        
-        if column_index >= len(row):
-            return False
+        if not isinstance(condition, dict):
+            raise ValueError(f"Filter condition for column '{column}' must be an object")
         
-        cell_value = row[column_index]
-        operator = condition.get("operator", "eq")
+        op = condition.get("operator", "eq")
         filter_value = condition.get("value")
         
         if filter_value is None:
             raise ValueError(f"Value is required for filtering column '{column}'")
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
         
-        # Try to convert to numeric if possible
         try:
-            cell_numeric = float(cell_value)
             filter_numeric = float(filter_value)
-            is_numeric = True
         except (ValueError, TypeError):
-            is_numeric = False
-            cell_numeric = None
             filter_numeric = None
         
-        # Apply filter based on operator
-        if operator == "eq":
-            if is_numeric:
-                if not (cell_numeric == filter_numeric):
-                    return False
-            else:
-                if not (cell_value == str(filter_value)):
-                    return False
-        
-        elif operator == "ne":
-            if is_numeric:
-                if not (cell_numeric != filter_numeric):
-                    return False
-            else:
-                if not (cell_value != str(filter_value)):
-                    return False
+        if op in NUMERIC_OPERATORS and filter_numeric is None:
+            raise ValueError(f"Cannot use '{op}' operator with non-numeric value for column '{column}'")
+        if op == "in" and not isinstance(filter_value, list):
+            raise ValueError(f"'in' operator requires a list of values")
         
-        elif operator == "gt":
-            if not is_numeric:
-                raise ValueError(f"Cannot use 'gt' operator on non-numeric column '{column}'")
-            if not (cell_numeric > filter_numeric):
-                return False
-        
-        elif operator == "lt":
-            if not is_numeric:
-                raise ValueError(f"Cannot use 'lt' operator on non-numeric column '{column}'")
-            if not (cell_numeric < filter_numeric):
+        parsed.append((column, headers.index(column), op, filter_value, filter_numeric))
+    
+    return parsed
+
+
+def compile_filters(headers: List[str], filter_conditions: Dict) -> Callable[[List[str]], bool]:
+    """
+    Compile filter conditions into a single row predicate
+    
+    Column indexes, numeric operands, lowercased 'contains' needles and 'in'
+    sets are resolved once here instead of on every row.
+    
+    Raises:
+        KeyError: If a filtered column is not in headers
+        ValueError: If a condition is malformed
+    """
+    checks = [compile_condition(*spec) for spec in parse_filter_conditions(headers, filter_conditions)]
+    
+    if len(checks) == 1:
+        return checks[0]
+    
+    def matches_all(row: List[str]) -> bool:
+        for check in checks:
+            if not check(row):
                 return False
+        return True
+    
+    return matches_all
+
+
+def compile_condition(
+    column: str,
+    column_index: int,
+    op: str,
+    filter_value: Any,
+    filter_numeric: Optional[float]
+) -> Callable[[List[str]], bool]:
+    """Compile one parsed column condition into a row predicate"""
+    if op in ("eq", "ne"):
+        # Numeric comparison when both sides parse as numbers, string otherwise
+        filter_text = str(filter_value)
+        negate = op == "ne"
         
-        elif operator == "gte":
-            if not is_numeric:
-                raise ValueError(f"Cannot use 'gte' operator on non-numeric column '{column}'")
-            if not (cell_numeric >= filter_numeric):
-                return False
+        if filter_numeric is None:
+            def check(row: List[str]) -> bool:
+                if column_index >= len(row):
+                    return False
+                return (row[column_index] == filter_text) != negate
+            return check
         
-        elif operator == "lte":
-            if not is_numeric:
-                raise ValueError(f"Cannot use 'lte' operator on non-numeric column '{column}'")
-            if not (cell_numeric <= filter_numeric):
+        def check(row: List[str]) -> bool:
+            if column_index >= len(row):
                 return False
+            cell_value = row[column_index]
+            try:
+                equal = float(cell_value) == filter_numeric
+            except ValueError:
+                equal = cell_value == filter_text
+            return equal != negate
+        return check
+    
+    if op in NUMERIC_OPERATORS:
+        compare = NUMERIC_OPERATORS[op]
         
-        elif operator == "contains":
-            if str(filter_value).lower() not in cell_value.lower():
+        def check(row: List[str]) -> bool:
+            if column_index >= len(row):
                 return False
+            try:
+                cell_numeric = float(row[column_index])
+            except ValueError:
+                raise ValueError(f"Cannot use '{op}' operator on non-numeric column '{column}'") from None
+            return compare(cell_numeric, filter_numeric)
+        return check
+    
+    if op == "contains":
+        needle = str(filter_value).lower()
         
-        elif operator == "in":
-            if not isinstance(filter_value, list):
-                raise ValueError(f"'in' operator requires a list of values")
-            if cell_value not in [str(v) for v in filter_value]:
+        def check(row: List[str]) -> bool:
+            if column_index >= len(row):
                 return False
-        
-        else:
-            raise ValueError(f"Unsupported operator: {operator}")
+            return needle in row[column_index].lower()
+        return check
+    
+    # op == "in"
+    options = frozenset(str(v) for v in filter_value)
     
-    return True
\ No newline at end of file
+    def check(row: List[str]) -> bool:
+        if column_index >= len(row):
+            return False
+        return row[column_index] in options
+    return check
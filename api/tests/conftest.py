@@ -0,0 +1,61 @@
+"""Shared fixtures: each test runs the api modules in a fresh working directory"""
+import importlib
+import uuid
+from pathlib import Path
+
+import pytest
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """
+    Working directory with empty uploads/, processed/ and users.db
+    
+    config and database resolve these relative to the working directory;
+    the connection pool is replaced so no connection to an earlier test's
+    database is reused.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(API_DIR))
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "processed").mkdir()
+    
+    database = importlib.import_module("database")
+    monkeypatch.setattr(database, "_pool", database._ConnectionPool(database.DB_POOL_SIZE))
+    database.init_db()
+    return tmp_path
+
+
+@pytest.fixture
+def tasks(api):
+    """The tasks module, with Celery running tasks eagerly against in-memory transports"""
+    tasks = importlib.import_module("tasks")
+    tasks.celery_app.conf.update(
+        task_always_eager=True,
+        broker_url="memory://",
+        result_backend="cache+memory://"
+    )
+    return tasks
+
+
+@pytest.fixture
+def catalogued(api):
+    """Store content as an upload and add it to the file catalog, returning its file_id"""
+    from services.file_service import FileService
+    
+    def catalogued(content: str, ext: str = ".csv") -> str:
+        file_id = str(uuid.uuid4())
+        path = Path("uploads") / f"{file_id}{ext}"
+        path.write_text(content, encoding="utf-8")
+        info = {
+            "sha256": f"sha-{file_id}",
+            "size": path.stat().st_size,
+            "line_count": content.count("\n"),
+            "inferred_schema": FileService.inspect_content(path, ext)
+        }
+        FileService.record_file_info(file_id, path, info)
+        return file_id
+    
+    return catalogued
@@ -0,0 +1,93 @@
+"""Column store layout (column_store.py) and when uploads are converted"""
+import csv
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+HEADER = ["id", "price", "name", "code"]
+ROWS = [
+    ["1", "2.5", "apple", "7"],
+    ["2", "3", "pear", "x7"],
+    ["3", "-0", "é", "8"],
+    ["4", "1e3", "", "9"],
+]
+
+
+@pytest.fixture
+def column_store(api):
+    import column_store
+    return column_store
+
+
+def stored(column_store, rows, batch_size: int = 2, header=HEADER):
+    path = Path("uploads/data.csv")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([header, *rows])
+    path.write_text(buffer.getvalue(), encoding="utf-8")
+    column_store.write_column_store(path, header, iter(rows), batch_size)
+    return column_store.open_column_store(path), column_store.column_store_path(path)
+
+
+def test_numbers_are_stored_for_numeric_columns_only(column_store):
+    store, path = stored(column_store, ROWS)
+    meta = json.loads((path / "meta.json").read_text())
+    
+    # "code" turns out not to be numeric in the second batch
+    assert [column["numbers"] for column in meta["columns"]] == ["int32", "float64", None, None]
+    assert sorted(p.name for p in path.glob("*.numbers")) == ["c0.numbers", "c1.numbers"]
+    assert [column["offsets"] for column in meta["columns"]] == ["int32"] * 4
+    assert not (path / "lengths.bin").exists()
+    
+    everything = np.arange(len(ROWS))
+    kind, numbers, is_number = store.numbers(1, everything)
+    assert kind == "number" and numbers.dtype == np.float64
+    assert numbers.tolist() == [2.5, 3.0, 0.0, 1000.0] and is_number.all()
+    # Other columns are parsed as the row engine parses them
+    kind, numbers, is_number = store.numbers(3, everything)
+    assert kind == "string" and is_number.tolist() == [True, False, True, True]
+    assert list(store.iter_rows(3)) == ROWS
+
+
+def test_wide_columns_switch_to_int64_offsets(column_store, monkeypatch):
+    monkeypatch.setattr(column_store, "INT32_OFFSET_LIMIT", 10)
+    rows = [[str(i), "x" * i, "y"] for i in range(7)]
+    store, path = stored(column_store, rows, batch_size=3, header=["a", "b", "c"])
+    meta = json.loads((path / "meta.json").read_text())
+    
+    assert [column["offsets"] for column in meta["columns"]] == ["int32", "int64", "int32"]
+    assert list(store.iter_rows(2)) == rows
+    assert store.cells(1, np.array([1, 4, 6])) == ["x", "xxxx", "xxxxxx"]
+
+
+def test_ragged_rows_keep_their_lengths(column_store):
+    rows = [["1", "2"], ["3"], ["4", "5", "6", "7"], []]
+    store, path = stored(column_store, rows, header=["a", "b"])
+    
+    assert (path / "lengths.bin").exists()
+    assert list(store.iter_rows(3)) == rows
+
+
+def test_uploads_are_converted_when_an_operation_would_read_the_store(tasks, catalogued, monkeypatch):
+    import services.scheduler_service as scheduler_service
+    from services.file_service import FileService
+    
+    monkeypatch.setattr(scheduler_service, "COLUMN_STORE_MIN_COST", 1000)
+    route = scheduler_service.SchedulerService.route_conversion
+    small = catalogued("a,b\n1,2\n")
+    large = catalogued("a,b\n" + "1,2\n" * 500)
+    path, record = Path(f"uploads/{large}.csv"), FileService.get_file_record(large)
+    
+    assert route(Path(f"uploads/{small}.csv"), FileService.get_file_record(small), "filter") is None
+    assert route(path, record, "dedup") is None
+    assert route(path, record, "unique", engine="row") is None
+    assert route(path, record, "dedup", steps=[{"operation": "filter"}, {"operation": "dedup"}]) is not None
+    assert route(path, record, "filter")["queue"] == "fast"
+    
+    # Queued once per upload
+    assert FileService.claim_column_store(large)
+    assert not FileService.claim_column_store(large)
+    tasks.build_column_store.apply(kwargs={"file_id": large}).get()
+    assert route(path, record, "filter") is None
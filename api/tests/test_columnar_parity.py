@@ -0,0 +1,118 @@
+"""The columnar engine returns exactly what the row engine returns (filter and unique)"""
+import csv
+import random
+
+import pytest
+
+HEADER = "id,name,price,qty,note\n"
+ROWS = [
+    "1,apple,10,3,Fresh",
+    "2,banana,10.0,,ripe",
+    "3,apple,2.5,7,",
+    "4,cherry,1e1,7,FRESH box",
+    "5,,20,3,fresh",
+    "6,banana,-0,0,",
+    "7,date,0,12,old",
+    "8,apple,10,3,Fresh",
+    "9,elder, 10,5,x",
+    "10,fig,inf,5,Freshness",
+]
+DATA = HEADER + "\n".join(ROWS) + "\n"
+
+FILTERS = [
+    {"price": {"operator": "eq", "value": 10}},
+    {"price": {"operator": "eq", "value": "10"}},
+    {"price": {"operator": "ne", "value": 10}},
+    {"price": {"operator": "gt", "value": 5}},
+    {"price": {"operator": "lte", "value": "2.5"}},
+    {"name": {"operator": "eq", "value": "apple"}},
+    {"name": {"operator": "ne", "value": "apple"}},
+    {"name": {"operator": "eq", "value": ""}},
+    {"note": {"operator": "eq", "value": ""}},
+    {"note": {"operator": "contains", "value": "fresh"}},
+    {"name": {"operator": "in", "value": ["banana", "fig", ""]}},
+    {"qty": {"operator": "in", "value": ["7", "3"]}},
+    {"name": {"operator": "eq", "value": "apple"}, "qty": {"operator": "eq", "value": 3}},
+    {"id": {"operator": "gte", "value": 3}, "note": {"operator": "ne", "value": ""}},
+]
+UNIQUE_COLUMNS = ["id", "name", "price", "qty", "note"]
+
+
+def output_rows(result: dict) -> list:
+    with open(result["processed_file"], newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def run(tasks, file_id: str, engine: str, **options):
+    result = tasks.process_csv_operation.apply(kwargs={"file_id": file_id, "engine": engine, **options})
+    if result.failed():
+        return type(result.result)
+    assert result.get()["engine"] == engine
+    return output_rows(result.get())
+
+
+@pytest.fixture(params=[False, True], ids=["parsed", "column-store"])
+def uploaded(request, tasks, catalogued):
+    """Catalogue content, and convert it to its column store for the column-store variant"""
+    def uploaded(content: str) -> str:
+        file_id = catalogued(content)
+        if request.param:
+            tasks.build_column_store.apply(kwargs={"file_id": file_id}).get()
+        return file_id
+    
+    return uploaded
+
+
+@pytest.mark.parametrize("conditions", FILTERS)
+def test_filter_parity(tasks, uploaded, conditions):
+    file_id = uploaded(DATA)
+    row = run(tasks, file_id, "row", operation="filter", filter_conditions=conditions)
+    assert run(tasks, file_id, "columnar", operation="filter", filter_conditions=conditions) == row
+
+
+@pytest.mark.parametrize("column", UNIQUE_COLUMNS)
+def test_unique_parity(tasks, uploaded, column):
+    file_id = uploaded(DATA)
+    row = run(tasks, file_id, "row", operation="unique", column=column)
+    assert run(tasks, file_id, "columnar", operation="unique", column=column) == row
+
+
+def test_numeric_comparison_on_text_fails_in_both_engines(tasks, uploaded):
+    file_id = uploaded(DATA)
+    conditions = {"qty": {"operator": "gt", "value": 1}}
+    row = run(tasks, file_id, "row", operation="filter", filter_conditions=conditions)
+    assert isinstance(row, type)
+    assert run(tasks, file_id, "columnar", operation="filter", filter_conditions=conditions) == row
+
+
+@pytest.mark.parametrize("operation, options", [
+    ("filter", {"filter_conditions": {"name": {"operator": "eq", "value": "apple"}}}),
+    ("unique", {"column": "name"}),
+])
+def test_header_only_file(tasks, uploaded, operation, options):
+    file_id = uploaded(HEADER)
+    row = run(tasks, file_id, "row", operation=operation, **options)
+    assert row == [HEADER.strip().split(",")]
+    assert run(tasks, file_id, "columnar", operation=operation, **options) == row
+
+
+def test_parity_across_batches(tasks, uploaded, monkeypatch):
+    monkeypatch.setattr(tasks, "COLUMNAR_BATCH_SIZE", 64)
+    rng = random.Random(7)
+    cells = ["", "0", "1", "1.0", "-3", "2.5", "1e2", "abc", "ABC", "a b", "x,y", 'q"t']
+    lines = ["a,b,c"] + [
+        ",".join(csv_cell(rng.choice(cells)) for _ in range(3)) for _ in range(500)
+    ]
+    file_id = uploaded("\n".join(lines) + "\n")
+    
+    for options in (
+        {"operation": "unique", "column": "a"},
+        {"operation": "filter", "filter_conditions": {"a": {"operator": "eq", "value": 1}}},
+        {"operation": "filter", "filter_conditions": {"b": {"operator": "contains", "value": "b"}}},
+        {"operation": "filter", "filter_conditions": {"c": {"operator": "in", "value": ["", "abc", "1"]}}},
+    ):
+        assert run(tasks, file_id, "columnar", **options) == run(tasks, file_id, "row", **options)
+
+
+def csv_cell(value: str) -> str:
+    return f'"{value.replace(chr(34), chr(34) * 2)}"' if any(c in value for c in ',"') else value
@@ -0,0 +1,94 @@
+"""The parallel CSV path: chunk boundaries (tasks.split_csv_chunks) and chunked runs"""
+import csv
+import io
+from pathlib import Path
+
+import pytest
+
+
+def chunk_rows(tasks, path: Path, chunk_count: int):
+    """Rows of each chunk and whether every chunk ended at a record boundary"""
+    rows, aligned = [], True
+    for start, end in tasks.split_csv_chunks(path, chunk_count):
+        chunk = tasks.stream_csv_range(path, start, end)
+        try:
+            rows.extend(chunk)
+        except csv.Error:
+            aligned = False
+        aligned = aligned and chunk.aligned
+    return rows, aligned
+
+
+def write_csv(path: Path, stray_quote: bool) -> str:
+    lines = ["name,note"]
+    for i in range(400):
+        if i == 5 and stray_quote:
+            lines.append('tv,27" monitor')
+        elif i % 50 == 2:
+            lines.append(f'note{i},"line one\nline two"')
+        else:
+            lines.append(f"row{i},plain {i}")
+    data = "\n".join(lines) + "\n"
+    path.write_text(data)
+    return data
+
+
+@pytest.mark.parametrize("stray_quote", [False, True])
+def test_chunks_match_sequential_parse_or_report_misalignment(tasks, tmp_path, stray_quote):
+    path = tmp_path / "input.csv"
+    expected = list(csv.reader(io.StringIO(write_csv(path, stray_quote))))[1:]
+    
+    for chunk_count in range(2, 12):
+        rows, aligned = chunk_rows(tasks, path, chunk_count)
+        if aligned:
+            assert rows == expected
+        else:
+            # An unquoted field's literal quote flips the quote parity, so some
+            # boundary lands inside a quoted field; the merge then runs a single pass
+            assert stray_quote
+    
+    if not stray_quote:
+        assert all(chunk_rows(tasks, path, n)[1] for n in range(2, 12))
+    else:
+        assert not all(chunk_rows(tasks, path, n)[1] for n in range(2, 12))
+
+
+def test_header_with_quoted_newline(tasks, tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text('"first\nname",note\na,1\nb,2\n')
+    start, _ = tasks.split_csv_chunks(path, 2)[0]
+    assert path.read_bytes()[start:].startswith(b"a,1\n")
+
+
+@pytest.fixture
+def parallel(tasks, monkeypatch):
+    """Split even tiny inputs into chunks"""
+    monkeypatch.setattr(tasks, "PARALLEL_MIN_BYTES", 1)
+    monkeypatch.setattr(tasks, "PARALLEL_MIN_CHUNK_BYTES", 1)
+    monkeypatch.setattr(tasks, "PARALLEL_CHUNKS", 4)
+    return tasks
+
+
+def output_rows(result: dict) -> list:
+    with open(result["processed_file"], newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.parametrize("stray_quote", [False, True])
+@pytest.mark.parametrize("operation, options", [
+    ("dedup", {}),
+    ("unique", {"column": "name"}),
+    ("filter", {"filter_conditions": {"note": {"operator": "ne", "value": "plain 7"}}}),
+])
+def test_chunked_run_matches_single_pass(parallel, catalogued, tmp_path, stray_quote, operation, options):
+    file_id = catalogued(write_csv(tmp_path / "source.csv", stray_quote))
+    
+    def run(split: bool) -> dict:
+        return parallel.process_csv_operation.apply(
+            kwargs={"file_id": file_id, "operation": operation, "split": split, **options}
+        ).get()
+    
+    chunked, single = run(True), run(False)
+    assert output_rows(chunked) == output_rows(single)
+    # Chunked unless a boundary cut a record, which falls back to a single pass
+    assert ("chunks" in chunked) != stray_quote
@@ -0,0 +1,113 @@
+"""Seen-sets of dedup/unique: spilling to disk and fingerprints keep the in-memory results"""
+import csv
+import random
+
+import pytest
+
+
+def in_memory_dedup(rows):
+    seen = set()
+    return [row for row in rows if tuple(row) not in seen and not seen.add(tuple(row))]
+
+
+def in_memory_unique(rows, column_index):
+    seen = set()
+    return [
+        row for row in rows
+        if column_index < len(row) and row[column_index] not in seen and not seen.add(row[column_index])
+    ]
+
+
+def sample_rows(count: int = 3000, seed: int = 11):
+    """Rows with many repeats, including ragged rows and cells that need quoting"""
+    rng = random.Random(seed)
+    cells = ["", "a", "b", "1", "1.0", "x,y", 'say "hi"', "two\nlines", "tab\tbed", "é", "\r"]
+    rows = []
+    for _ in range(count):
+        width = rng.choice([0, 1, 3, 3, 3, 4])
+        rows.append([rng.choice(cells) for _ in range(width)])
+    return rows
+
+
+@pytest.fixture
+def external_dedup(api):
+    import external_dedup
+    return external_dedup
+
+
+@pytest.fixture
+def fingerprint(api):
+    import fingerprint
+    return fingerprint
+
+
+@pytest.mark.parametrize("memory_budget", [0, 500, 20_000])
+@pytest.mark.parametrize("partitions", [1, 3, 16])
+def test_spilling_keeps_first_occurrence_order(external_dedup, tmp_path, memory_budget, partitions):
+    rows = sample_rows()
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    dedup = external_dedup.SpillingDeduplicator(rows, memory_budget, partitions, spill_dir=spill_dir)
+    
+    assert list(dedup) == in_memory_dedup(rows)
+    assert dedup.stats["spilled"]
+    assert dedup.stats["spill_partitions"] == partitions
+    # The spill directory is removed once the rows are merged back
+    assert list(spill_dir.iterdir()) == []
+
+
+def test_no_spill_within_budget(external_dedup, tmp_path):
+    rows = sample_rows()
+    dedup = external_dedup.SpillingDeduplicator(rows, 1 << 30, 8, spill_dir=tmp_path)
+    assert list(dedup) == in_memory_dedup(rows)
+    assert not dedup.stats["spilled"]
+
+
+@pytest.mark.parametrize("verify", [False, True])
+@pytest.mark.parametrize("column_index", [None, 0, 2])
+def test_fingerprint_matches_exact_set(fingerprint, verify, column_index):
+    # Enough distinct keys to grow the table several times
+    rows = sample_rows(20_000) + [[str(i), str(i % 7), str(i % 13)] for i in range(5000)]
+    dedup = fingerprint.FingerprintDeduplicator(rows, column_index, verify)
+    expected = in_memory_dedup(rows) if column_index is None else in_memory_unique(rows, column_index)
+    
+    assert list(dedup) == expected
+    assert dedup.stats["distinct_keys"] == len(expected)
+
+
+def test_verified_fingerprints_survive_digest_collisions(fingerprint, monkeypatch):
+    # Every key gets the same digest: only the key log tells them apart
+    class Colliding:
+        def __init__(self, key, digest_size):
+            pass
+        
+        def digest(self):
+            return bytes(16)
+    
+    monkeypatch.setattr(fingerprint.hashlib, "blake2b", Colliding)
+    rows = [["a"], ["b"], ["a"], ["c"], ["b"]]
+    
+    assert list(fingerprint.FingerprintDeduplicator(rows, verify=True)) == [["a"], ["b"], ["c"]]
+    # Unverified fingerprints trade this for memory: colliding keys look equal
+    assert list(fingerprint.FingerprintDeduplicator(rows)) == [["a"]]
+
+
+@pytest.mark.parametrize("seen_set", ["exact", "fingerprint", "fingerprint_verify"])
+@pytest.mark.parametrize("operation, column", [("dedup", None), ("unique", "b")])
+def test_task_output_matches_in_memory_set(tasks, catalogued, monkeypatch, seen_set, operation, column):
+    # A zero budget makes exact dedup spill every row after the first
+    monkeypatch.setattr(tasks, "DEDUP_MEMORY_BUDGET", 0)
+    monkeypatch.setattr(tasks, "DEDUP_SPILL_PARTITIONS", 4)
+    rows = [[str(i % 37), str(i % 11), "x" if i % 5 else ""] for i in range(2000)]
+    file_id = catalogued("a,b,c\n" + "".join(",".join(row) + "\n" for row in rows))
+    
+    result = tasks.process_csv_operation.apply(kwargs={
+        "file_id": file_id, "operation": operation, "column": column, "engine": "row", "seen_set": seen_set
+    }).get()
+    with open(result["processed_file"], newline="", encoding="utf-8") as f:
+        output = list(csv.reader(f))
+    
+    expected = in_memory_dedup(rows) if column is None else in_memory_unique(rows, 1)
+    assert output == [["a", "b", "c"], *expected]
+    if seen_set == "exact" and operation == "dedup":
+        assert result["spill"]["spilled"]
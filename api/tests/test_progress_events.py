@@ -0,0 +1,48 @@
+"""Task event streams (services/progress_service.py)"""
+import asyncio
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def progress(tasks, monkeypatch):
+    import services.progress_service as progress_service
+    # States are read back from the in-memory result backend
+    monkeypatch.setattr(tasks.celery_app.conf, "task_store_eager_result", True)
+    monkeypatch.setattr(progress_service, "TASK_EVENTS_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(progress_service, "TASK_EVENTS_PENDING_TIMEOUT", 0.1)
+    return progress_service
+
+
+def streamed(progress, task_id: str) -> list:
+    async def collect():
+        return [
+            json.loads(message.split("data: ", 1)[1])
+            async for message in progress.ProgressService.stream_events(task_id)
+            if message.startswith("id:")
+        ]
+    
+    return asyncio.run(asyncio.wait_for(collect(), 5))
+
+
+def test_stream_of_unknown_task_ends(progress):
+    task_id = str(uuid.uuid4())
+    events = streamed(progress, task_id)
+    
+    assert [event["status"] for event in events] == ["PENDING", "UNKNOWN"]
+    assert progress._watches == {}
+
+
+@pytest.mark.parametrize("state, meta, expected", [
+    ("PROGRESS", {"rows": 10, "percent": 50.0}, {"rows": 10, "percent": 50.0}),
+    ("STARTED", {"pid": 1234, "hostname": "worker@host"}, None),
+])
+def test_only_published_progress_is_forwarded(progress, tasks, state, meta, expected):
+    task_id = str(uuid.uuid4())
+    tasks.celery_app.backend.store_result(task_id, meta, state)
+    
+    event = progress.ProgressService.get_task_event(task_id)
+    assert event["status"] == state
+    assert event.get("progress") == expected
@@ -0,0 +1,183 @@
+"""Retention sweeps (services/retention_service.py) over files with fake modification times"""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+SIZE = 64 * 1024
+
+
+@pytest.fixture
+def retention(api, monkeypatch):
+    import services.retention_service as retention_service
+    monkeypatch.setattr(retention_service, "_last_touched", {})
+    return retention_service
+
+
+@pytest.fixture
+def now():
+    return time.time()
+
+
+def stored(path, age: float, now: float, size: int = SIZE) -> Path:
+    """Write a file (or a directory holding one) last modified age seconds before now"""
+    path = Path(path)
+    if path.name.endswith(".columns"):
+        path.mkdir()
+        (path / "data").write_bytes(b"c" * size)
+    else:
+        path.write_bytes(b"x" * size)
+    os.utime(path, (now - age, now - age))
+    return path
+
+
+def allocated(path: Path) -> int:
+    return os.stat(path).st_blocks * 512
+
+
+def catalogue(file_id: str, path: Path, created_age: float = 0) -> None:
+    from database import get_db
+    with get_db() as conn:
+        conn.execute(
+            """
+            INSERT INTO files (file_id, sha256, size, path, ext, created_at)
+            VALUES (?, '', 0, ?, '.csv', datetime(?, 'unixepoch'))
+            """,
+            (file_id, str(path), time.time() - created_age)
+        )
+        conn.commit()
+
+
+def cache_result(cache_key: str, processed_file: Path) -> None:
+    from database import get_db
+    with get_db() as conn:
+        conn.execute(
+            """
+            INSERT INTO result_cache (cache_key, task_id, processed_file, result, size, last_used_at)
+            VALUES (?, 'task', ?, '{}', 0, 0)
+            """,
+            (cache_key, str(processed_file))
+        )
+        conn.commit()
+
+
+def rows(query: str) -> list:
+    from database import get_db
+    with get_db() as conn:
+        return [tuple(row) for row in conn.execute(query)]
+
+
+def remaining(directory: str) -> set:
+    return {entry.name for entry in Path(directory).iterdir()}
+
+
+def test_least_recently_used_files_are_evicted_over_quota(retention, monkeypatch, now):
+    ages = {"a": 10 * HOUR, "b": 8 * HOUR, "c": 6 * HOUR, "d": 4 * HOUR, "e": 3 * HOUR}
+    paths = {name: stored(f"uploads/{name}.csv", age, now) for name, age in ages.items()}
+    for name, path in paths.items():
+        catalogue(name, path)
+    unit = allocated(paths["a"])
+    # "a" was read recently, which makes "b" the least recently used
+    retention.RetentionService.touch(paths["a"])
+    
+    # Five files over a quota of four evict down to 90% of it: two files
+    monkeypatch.setattr(retention, "RETENTION_MAX_BYTES", 4 * unit)
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert remaining("uploads") == {"a.csv", "d.csv", "e.csv"}
+    assert report["evicted_uploads"] == 2
+    assert report["reclaimed_bytes"] == 2 * unit
+    assert report["total_bytes"] == 3 * unit
+    assert sorted(rows("SELECT file_id FROM files")) == [("a",), ("d",), ("e",)]
+    
+    # Under quota, nothing else goes
+    assert retention.RetentionService.enforce(now=now)["evicted_uploads"] == 0
+    assert remaining("uploads") == {"a.csv", "d.csv", "e.csv"}
+
+
+def test_files_unused_past_ttl_are_evicted_under_quota(retention, now):
+    expired = stored("processed/old.csv", 8 * DAY, now)
+    stored("processed/old.csv.idx", 8 * DAY, now)
+    kept = stored("processed/recent.csv", 6 * DAY, now)
+    reread = stored("processed/reread.csv", 9 * DAY, now)
+    retention.RetentionService.touch(reread)
+    for path in (expired, kept, reread):
+        cache_result(path.stem, path)
+    
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert remaining("processed") == {"recent.csv", "reread.csv"}
+    assert report["evicted_outputs"] == 1
+    assert sorted(rows("SELECT cache_key FROM result_cache")) == [("recent",), ("reread",)]
+    assert str(expired) not in {path for path, in rows("SELECT path FROM file_access")}
+
+
+def test_recently_used_files_are_never_evicted(retention, monkeypatch, now):
+    monkeypatch.setattr(retention, "RETENTION_MAX_BYTES", 1)
+    stored("uploads/fresh.csv", HOUR, now)
+    stored("uploads/stale.csv", 3 * HOUR, now)
+    # Old, but read by a task just queued
+    queued = stored("uploads/queued.csv", 30 * DAY, now)
+    retention.RetentionService.touch(queued)
+    stored("processed/running.csv", 0, now)
+    
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert remaining("uploads") == {"fresh.csv", "queued.csv"}
+    assert remaining("processed") == {"running.csv"}
+    assert report["evicted_uploads"] == 1
+    assert report["total_bytes"] > retention.RETENTION_MAX_BYTES
+
+
+def test_sidecars_are_evicted_with_their_file(retention, monkeypatch, now):
+    upload = stored("uploads/u.csv", 10 * HOUR, now)
+    store = stored("uploads/u.csv.columns", 3 * HOUR, now)
+    output = stored("processed/p.csv", 9 * HOUR, now)
+    stored("processed/p.csv.idx", 9 * HOUR, now)
+    newer = stored("uploads/v.csv", 5 * HOUR, now)
+    stored("uploads/v.csv.columns", 5 * HOUR, now)
+    catalogue("u", upload)
+    cache_result("p", output)
+    # Each unit is its file and its sidecar
+    unit = allocated(upload) + allocated(store / "data")
+    
+    monkeypatch.setattr(retention, "RETENTION_MAX_BYTES", 2 * unit)
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert remaining("uploads") == {"v.csv", "v.csv.columns"}
+    assert remaining("processed") == set()
+    assert report["evicted_uploads"] == report["evicted_outputs"] == 1
+    assert report["reclaimed_bytes"] == 2 * unit
+    assert report["total_bytes"] == unit == allocated(newer) + allocated(Path("uploads/v.csv.columns/data"))
+    assert rows("SELECT * FROM files") == rows("SELECT * FROM result_cache") == []
+
+
+def test_orphans_and_abandoned_temporary_files_are_removed(retention, now):
+    stored("uploads/gone.csv.columns", 7 * HOUR, now)
+    stored("uploads/writing.csv.columns", HOUR, now)
+    stored("processed/gone.csv.idx", 7 * HOUR, now)
+    stored("processed/.gone.csv.idx.part", 7 * HOUR, now)
+    stored("processed/.live.csv.idx.part", HOUR, now)
+    stored("uploads/.session.upload", 7 * HOUR, now)
+    
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert remaining("uploads") == {"writing.csv.columns", ".session.upload"}
+    assert remaining("processed") == {".live.csv.idx.part"}
+    assert report["removed_temp_files"] == 3
+
+
+def test_catalog_entries_of_missing_uploads_are_forgotten(retention, now):
+    present = stored("uploads/present.csv", HOUR, now)
+    catalogue("present", present, created_age=DAY)
+    catalogue("removed", Path("uploads/removed.csv"), created_age=DAY)
+    # Still being written by its upload request
+    catalogue("storing", Path("uploads/storing.csv"))
+    
+    report = retention.RetentionService.enforce(now=now)
+    
+    assert report["forgotten_files"] == 1
+    assert sorted(rows("SELECT file_id FROM files")) == [("present",), ("storing",)]
@@ -0,0 +1,30 @@
+"""Task status responses (services/task_service.py)"""
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+
+@pytest.fixture
+def finished(tasks, catalogued, monkeypatch):
+    """Run an operation eagerly, storing its result in the backend, and return its task id"""
+    monkeypatch.setattr(tasks.celery_app.conf, "task_store_eager_result", True)
+    # Tasks copy the setting when they are first used
+    monkeypatch.setattr(tasks.process_csv_operation, "store_eager_result", True)
+    file_id = catalogued("a,b\n1,x\n2,y\n1,x\n")
+    return tasks.process_csv_operation.apply(kwargs={"file_id": file_id, "operation": "dedup"}).id
+
+
+def test_memoized_result_is_dropped_with_its_file(finished):
+    from services.task_service import TaskService
+    
+    status, etag = TaskService.get_task_status_with_etag(finished, 10, 0)
+    assert status["status"] == "SUCCESS"
+    assert status["result"]["data"] == [{"a": "1", "b": "x"}, {"a": "2", "b": "y"}]
+    assert TaskService.get_task_status_with_etag(finished, 10, 0) == (status, etag)
+    
+    # Evicted by retention or the result cache
+    Path("processed", Path(status["result"]["file_link"]).name).unlink()
+    with pytest.raises(HTTPException) as error:
+        TaskService.get_task_status_with_etag(finished, 10, 0)
+    assert error.value.status_code == 404
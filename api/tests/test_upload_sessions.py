@@ -0,0 +1,168 @@
+"""Resumable chunked uploads (services/upload_session_service.py)"""
+import asyncio
+import base64
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+CHUNK_SIZE = 256 * 1024  # MIN_UPLOAD_SESSION_CHUNK_SIZE
+OWNER = "user-1"
+
+
+def csv_content(size: int) -> bytes:
+    """CSV bytes of exactly size bytes (a header, then numbered rows padded by the last)"""
+    data = bytearray(b"id,value\n")
+    row = 0
+    while len(data) < size - 32:
+        data += f"{row},value {row}\n".encode()
+        row += 1
+    data += f"{row},".encode()
+    return bytes(data + b"x" * (size - len(data) - 1) + b"\n")
+
+
+def chunk_of(content: bytes, index: int) -> bytes:
+    return content[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+
+
+def checksum_of(data: bytes) -> str:
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+async def body(data: bytes, piece: int = 100_000):
+    for start in range(0, len(data), piece):
+        yield data[start:start + piece]
+
+
+@pytest.fixture
+def sessions(api):
+    from services.upload_session_service import UploadSessionService
+    return UploadSessionService
+
+
+@pytest.fixture
+def content():
+    # Three full chunks and a partial last one
+    return csv_content(3 * CHUNK_SIZE + 12_345)
+
+
+def open_session(sessions, content: bytes, **options) -> dict:
+    return sessions.create_session("data.csv", len(content), OWNER, CHUNK_SIZE, **options)
+
+
+def send(sessions, session: dict, content: bytes, index: int, data: bytes = None, checksum: str = None) -> dict:
+    data = chunk_of(content, index) if data is None else data
+    return asyncio.run(sessions.write_chunk(session, index, body(data), checksum))
+
+
+def complete(sessions, session: dict):
+    return asyncio.run(sessions.complete_session(session, OWNER))
+
+
+def test_out_of_order_and_repeated_chunks(sessions, content):
+    session = open_session(sessions, content, sha256=hashlib.sha256(content).hexdigest())
+    assert session["chunk_count"] == 4
+    
+    send(sessions, session, content, 2)
+    send(sessions, session, content, 0)
+    status = sessions.get_status(sessions.get_session(session["upload_id"], OWNER))
+    assert status["received"] == [0, 2]
+    assert status["missing"] == [1, 3]
+    assert status["offset"] == CHUNK_SIZE
+    
+    # A chunk sent again replaces the earlier copy
+    send(sessions, session, content, 3, data=b"\0" * len(chunk_of(content, 3)))
+    send(sessions, session, content, 3)
+    send(sessions, session, content, 1)
+    send(sessions, session, content, 1)
+    
+    file_id, file_path, file_info = complete(sessions, session)
+    assert file_path.read_bytes() == content
+    assert file_info["sha256"] == hashlib.sha256(content).hexdigest()
+    # The session is closed once completed
+    with pytest.raises(HTTPException) as error:
+        sessions.get_session(session["upload_id"], OWNER)
+    assert error.value.status_code == 404
+
+
+def test_missing_chunks_block_completion(sessions, content):
+    session = open_session(sessions, content)
+    send(sessions, session, content, 0)
+    send(sessions, session, content, 3)
+    
+    with pytest.raises(HTTPException) as error:
+        complete(sessions, session)
+    assert error.value.status_code == 409
+    assert "1, 2" in error.value.detail
+
+
+def test_chunk_checksum_and_length_are_checked(sessions, content):
+    session = open_session(sessions, content)
+    
+    with pytest.raises(HTTPException) as error:
+        send(sessions, session, content, 0, checksum=checksum_of(b"something else"))
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        send(sessions, session, content, 1, data=chunk_of(content, 1)[:-1])
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        send(sessions, session, content, 4)
+    assert error.value.status_code == 400
+    assert sessions.get_status(session)["received"] == []
+    
+    assert send(sessions, session, content, 0, checksum=checksum_of(chunk_of(content, 0)))["index"] == 0
+    assert sessions.get_status(session)["received"] == [0]
+
+
+def test_completion_rehashes_chunks(sessions, content):
+    from services.upload_session_service import part_path
+    
+    session = open_session(sessions, content)
+    for index in range(session["chunk_count"]):
+        send(sessions, session, content, index)
+    
+    # Chunk 2 changes on disk after it was recorded
+    with open(part_path(session["upload_id"]), "r+b") as f:
+        f.seek(2 * CHUNK_SIZE + 10)
+        f.write(b"#")
+    
+    with pytest.raises(HTTPException) as error:
+        complete(sessions, session)
+    assert error.value.status_code == 409
+    # The session is reopened with only that chunk missing
+    assert sessions.get_status(sessions.get_session(session["upload_id"], OWNER))["missing"] == [2]
+    
+    send(sessions, session, content, 2)
+    _, file_path, _ = complete(sessions, session)
+    assert file_path.read_bytes() == content
+
+
+def test_whole_file_digest_is_checked(sessions, content):
+    session = open_session(sessions, content, sha256=hashlib.sha256(b"other").hexdigest())
+    for index in range(session["chunk_count"]):
+        send(sessions, session, content, index)
+    
+    with pytest.raises(HTTPException) as error:
+        complete(sessions, session)
+    assert error.value.status_code == 400
+
+
+def test_open_sessions_and_reserved_bytes_are_capped_per_user(sessions, monkeypatch):
+    import services.upload_session_service as upload_session_service
+    monkeypatch.setattr(upload_session_service, "MAX_OPEN_UPLOAD_SESSIONS", 2)
+    monkeypatch.setattr(upload_session_service, "MAX_UPLOAD_SESSION_BYTES", 10 * CHUNK_SIZE)
+    
+    first = sessions.create_session("a.csv", 6 * CHUNK_SIZE, OWNER)
+    with pytest.raises(HTTPException) as error:
+        sessions.create_session("b.csv", 5 * CHUNK_SIZE, OWNER)
+    assert error.value.status_code == 413
+    
+    sessions.create_session("b.csv", 4 * CHUNK_SIZE, OWNER)
+    with pytest.raises(HTTPException) as error:
+        sessions.create_session("c.csv", 1, OWNER)
+    assert error.value.status_code == 429
+    
+    # Other users have their own limits, and aborting frees a slot
+    sessions.create_session("c.csv", 6 * CHUNK_SIZE, "user-2")
+    sessions.abort_session(first)
+    sessions.create_session("c.csv", 6 * CHUNK_SIZE, OWNER)
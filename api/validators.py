@@ -1,17 +1,23 @@
 """File validation functions"""
 from fastapi import HTTPException, UploadFile
 from pathlib import Path
-import csv
-import openpyxl
+from typing import Optional
+from excel_reader import inspect_excel, excel_sheet_names
+from sniffing import sniff_csv, sniff_rows
 from config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE
 
 
 def validate_file(file: UploadFile) -> str:
     """Validate uploaded file and return file extension"""
-    if not file.filename:
+    return validate_filename(file.filename)
+
+
+def validate_filename(filename: str) -> str:
+    """Validate the name of a file to upload and return its extension"""
+    if not filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    file_ext = Path(file.filename).suffix.lower()
+    file_ext = Path(filename).suffix.lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
@@ -20,21 +26,39 @@ def validate_file(file: UploadFile) -> str:
     return file_ext
 
 
-def validate_file_size(content: bytes) -> None:
-    """Validate file size"""
-    if len(content) > MAX_FILE_SIZE:
+def validate_file_size(size: int) -> None:
+    """Validate file size (in bytes) against MAX_FILE_SIZE"""
+    if size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400,
-            detail="File size exceeds maximum allowed size of 50MB"
+            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE // (1024 * 1024)}MB"
         )
 
 
-def validate_csv_content(file_path: Path) -> None:
-    """Validate CSV file can be read"""
+def validate_chunked_upload(size: int, chunk_size: int) -> None:
+    """Validate the total size and chunk size of a chunked upload session"""
+    from config import MAX_CHUNKED_UPLOAD_SIZE, MIN_UPLOAD_SESSION_CHUNK_SIZE, MAX_UPLOAD_SESSION_CHUNK_SIZE
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    if size > MAX_CHUNKED_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum allowed size of {MAX_CHUNKED_UPLOAD_SIZE // (1024 * 1024)}MB"
+        )
+    if not MIN_UPLOAD_SESSION_CHUNK_SIZE <= chunk_size <= MAX_UPLOAD_SESSION_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"chunk_size must be between {MIN_UPLOAD_SESSION_CHUNK_SIZE} "
+                f"and {MAX_UPLOAD_SESSION_CHUNK_SIZE} bytes"
+            )
+        )
+
+
+def validate_csv_content(file_path: Path) -> dict:
+    """Validate CSV file can be read and return its sniffed layout and column types (see sniffing.py)"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)  # Try to read header
+        return sniff_csv(file_path)
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -42,14 +66,19 @@ def validate_csv_content(file_path: Path) -> None:
         )
 
 
-def validate_excel_content(file_path: Path) -> None:
-    """Validate Excel file can be read"""
+def validate_excel_content(file_path: Path) -> dict:
+    """
+    Validate Excel file (.xlsx or .xls) can be read and return its column
+    types (see sniffing.py), plus its sheets under "workbook" (see
+    excel_reader.inspect_excel)
+    """
     try:
-        wb = openpyxl.load_workbook(file_path, read_only=True)
-        ws = wb.active
-        # Try to read first row
-        next(ws.iter_rows(min_row=1, max_row=1))
-        wb.close()
+        # Read the sheets and a sample of the default sheet, opening the workbook once
+        outline, headers, rows = inspect_excel(file_path)
+        try:
+            return {**sniff_rows(headers, rows), "workbook": outline}
+        finally:
+            rows.close()
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -57,6 +86,27 @@ def validate_excel_content(file_path: Path) -> None:
         )
 
 
+def validate_sheet(file_path: Path, sheet: str, file_record: Optional[dict] = None) -> None:
+    """
+    Validate that a worksheet exists in an uploaded Excel file
+    
+    The sheets recorded in the file catalog at upload are used when present;
+    otherwise the workbook is opened.
+    """
+    if file_path.suffix == '.csv':
+        raise HTTPException(
+            status_code=400,
+            detail="Sheet selection is only supported for Excel files"
+        )
+    outline = ((file_record or {}).get("inferred_schema") or {}).get("workbook")
+    sheet_names = outline["sheet_rows"] if outline else excel_sheet_names(file_path)
+    if sheet not in sheet_names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sheet '{sheet}' not found in workbook"
+        )
+
+
 def validate_operation(operation: str) -> None:
     """Validate operation type"""
     from config import VALID_OPERATIONS
@@ -67,8 +117,137 @@ def validate_operation(operation: str) -> None:
         )
 
 
-def validate_operation_request(operation: str, column: str = None, filter_conditions: dict = None) -> None:
-    """Validate operation-specific requirements"""
+def validate_engine(engine: str) -> None:
+    """Validate execution engine"""
+    from config import VALID_ENGINES
+    if engine not in VALID_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid engine. Allowed engines: {', '.join(VALID_ENGINES)}"
+        )
+
+
+def validate_seen_set(seen_set: str) -> None:
+    """Validate dedup/unique seen-set mode"""
+    from config import VALID_SEEN_SETS
+    if seen_set not in VALID_SEEN_SETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid seen_set. Allowed values: {', '.join(VALID_SEEN_SETS)}"
+        )
+
+
+def validate_compression(compression: str) -> None:
+    """Validate processed output compression"""
+    from config import VALID_COMPRESSIONS
+    if compression not in VALID_COMPRESSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid compression. Allowed values: {', '.join(VALID_COMPRESSIONS)}"
+        )
+
+
+def validate_output_format(output_format: str, compression: str = None) -> None:
+    """Validate processed output format (and its combination with compression)"""
+    from config import VALID_OUTPUT_FORMATS
+    if output_format not in VALID_OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid output_format. Allowed values: {', '.join(VALID_OUTPUT_FORMATS)}"
+        )
+    if output_format == "arrow" and compression not in (None, "zstd"):
+        raise HTTPException(
+            status_code=400,
+            detail="Arrow IPC output supports only zstd compression"
+        )
+
+
+def validate_pipeline_steps(steps: list) -> None:
+    """Validate each step of an operation pipeline"""
+    from config import MAX_PIPELINE_STEPS
+    if not steps:
+        raise HTTPException(
+            status_code=400,
+            detail="Pipeline requires at least one step"
+        )
+    if len(steps) > MAX_PIPELINE_STEPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pipeline allows at most {MAX_PIPELINE_STEPS} steps"
+        )
+    
+    for index, step in enumerate(steps, 1):
+        try:
+            validate_operation_request(
+                step.get("operation"),
+                step.get("column"),
+                step.get("filter_conditions"),
+                seen_set=step.get("seen_set")
+            )
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"Step {index}: {e.detail}")
+
+
+def validate_columns(
+    headers: list,
+    operation: str = None,
+    column: str = None,
+    filter_conditions: dict = None,
+    steps: list = None
+) -> None:
+    """Validate that the columns an operation (or each pipeline step) refers to exist in headers"""
+    pipeline = steps is not None
+    if not pipeline:
+        steps = [{"operation": operation, "column": column, "filter_conditions": filter_conditions}]
+    
+    for index, step in enumerate(steps, 1):
+        referenced = []
+        if step.get("operation") == "unique":
+            referenced.append(step.get("column"))
+        if step.get("operation") == "filter":
+            referenced.extend(step.get("filter_conditions") or {})
+        
+        for name in referenced:
+            if name not in headers:
+                prefix = f"Step {index}: " if pipeline else ""
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{prefix}Column '{name}' not found in file"
+                )
+
+
+def validate_operation_request(
+    operation: str,
+    column: str = None,
+    filter_conditions: dict = None,
+    engine: str = None,
+    seen_set: str = None,
+    steps: list = None,
+    compression: str = None,
+    output_format: str = None
+) -> None:
+    """Validate operation-specific requirements (or each step of a pipeline)"""
+    if engine is not None:
+        validate_engine(engine)
+    
+    if seen_set is not None:
+        validate_seen_set(seen_set)
+    
+    if compression is not None:
+        validate_compression(compression)
+    
+    if output_format is not None:
+        validate_output_format(output_format, compression)
+    
+    if steps is not None:
+        if operation is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="Provide either 'operation' or 'steps', not both"
+            )
+        validate_pipeline_steps(steps)
+        return
+    
     validate_operation(operation)
     
     if operation == "unique" and not column: